@@ -1,39 +1,147 @@
+import argparse
+import csv
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, List, Dict, Set, Tuple
 
 import numpy as np
+import dimod
 import matplotlib.pyplot as plt
 
-from Benchmark.Routing.generators import regular_graph_bqm
+from Benchmark.Routing.generators import regular_graph_bqms
 from Devices.quantum_hardware import Grid2dQPU
 from Router.GreedyRouter.greedy_router import greedy_router
 
 
-def greedy_router_benchmark():
-    data = {n**2: regular_graph_bqm(4, n**2, 20) for n in range(3, 7)}
-    layer_count_avg = np.zeros(len(data))
-    layer_count_20perc = np.zeros(len(data))
-    layer_count_80perc = np.zeros(len(data))
-    i = -1
-    for size, data_point in data.items():
-        print(size)
-        i += 1
-        qpu = Grid2dQPU(int(np.sqrt(size)), int(np.sqrt(size)))
-        layer_counts = np.zeros(len(data_point))
-        for bqm_index, bqm in enumerate(data_point):
-            route = greedy_router(bqm, qpu)
-            assert route.remaining_interactions.size() == 0, 'routing not finished with success'
-            layer_counts[bqm_index] = len(route.layers)
-        layer_count_avg[i] = np.mean(layer_counts)
-        layer_count_20perc[i] = np.percentile(layer_counts, 20)
-        layer_count_80perc[i] = np.percentile(layer_counts, 80)
-    sys_size = np.zeros(len(data))
-    for ind, sze in enumerate(data):
-        sys_size[ind] = sze
-    plt.plot(sys_size, layer_count_avg, color='blue')
-    plt.fill_between(sys_size, layer_count_20perc, layer_count_80perc, facecolor='blue', alpha=0.5)
-    plt.show()
+RESULT_FIELDS = ['size', 'degree', 'instance', 'layers', 'swaps', 'wall_time', 'peak_memory']
+
+
+def route_instance(size: int, degree: int, instance: int, bqm: dimod.BinaryQuadraticModel,
+                   trace_memory: bool = True) -> Dict:
+    """
+    Routes a single instance on a square grid with size qubits and returns one result row. wall_time is taken without
+    memory tracing; with trace_memory the instance is routed a second time under tracemalloc for peak_memory.
+    """
+    side = int(np.sqrt(size))
+    qpu = Grid2dQPU(side, side)
+    start = time.perf_counter()
+    route = greedy_router(bqm, qpu)
+    wall_time = time.perf_counter() - start
+    peak_memory = 0
+    if trace_memory:
+        tracemalloc.start()
+        greedy_router(bqm, qpu)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert route.remaining_interactions.size() == 0, 'routing not finished with success'
+    return {'size': size, 'degree': degree, 'instance': instance, 'layers': len(route.layers),
+            'swaps': int(sum(np.count_nonzero(layer.swap) for layer in route.layers)),
+            'wall_time': wall_time, 'peak_memory': peak_memory}
+
+
+def drop_partial_row(result_file: str):
+    """Truncates result_file after its last complete line, i.e. drops a row cut off by an interrupted sweep."""
+    if not os.path.exists(result_file):
+        return
+    with open(result_file, 'rb+') as file:
+        content = file.read()
+        if content and not content.endswith(b'\n'):
+            file.truncate(content.rfind(b'\n') + 1)
+
+
+def completed_instances(result_file: str) -> Set[Tuple[int, int, int]]:
+    """(size, degree, instance) of every complete row in result_file; incomplete or unparsable rows are skipped."""
+    if not os.path.exists(result_file):
+        return set()
+    done = set()
+    with open(result_file, newline='') as file:
+        for row in csv.DictReader(file):
+            try:
+                if any(row.get(field) in (None, '') for field in RESULT_FIELDS):
+                    continue
+                done.add((int(row['size']), int(row['degree']), int(row['instance'])))
+            except ValueError:
+                continue
+    return done
+
+
+def read_results(result_file: str) -> List[Dict]:
+    with open(result_file, newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def greedy_router_benchmark(sizes: Iterable[int] = (3, 4, 5, 6), degree: int = 4, copy_count: int = 20,
+                            result_file: str = './Data/results/greedy_router_runs.csv', workers: int = None,
+                            trace_memory: bool = True, seed: int = 0) -> List[Dict]:
+    """
+    Routes copy_count random degree-regular instances on every sizes x sizes grid, fanned out over a process pool.
+    Every finished instance is appended to result_file right away; instances already present in result_file are
+    skipped, so an interrupted sweep resumes where it stopped (a row cut off by the interruption is dropped first).
+    peak_memory is traced in a separate run of every instance if trace_memory is set (in bytes, 0 otherwise). The instances of every size are drawn from seed,
+    so a resumed sweep routes the same instances.
+    """
+    drop_partial_row(result_file)
+    done = completed_instances(result_file)
+    os.makedirs(os.path.dirname(os.path.abspath(result_file)), exist_ok=True)
+    write_header = not os.path.exists(result_file) or os.path.getsize(result_file) == 0
+    with open(result_file, 'a', newline='') as file, ProcessPoolExecutor(workers) as executor:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        if write_header:
+            writer.writeheader()
+            file.flush()
+        futures = []
+        for side in sizes:
+            size = side ** 2
+            for instance, bqm in enumerate(regular_graph_bqms(degree, size, copy_count, seed=[seed, size])):
+                if (size, degree, instance) not in done:
+                    futures.append(executor.submit(route_instance, size, degree, instance, bqm, trace_memory))
+        for future in as_completed(futures):
+            result = future.result()
+            writer.writerow(result)
+            file.flush()
+            print(f"size {result['size']}, instance {result['instance']}: {result['layers']} layers, "
+                  f"{result['wall_time']:.3f} s")
+    return read_results(result_file)
+
+
+def summarize(result_file: str, summary_file: str = None, plot: bool = False) -> np.ndarray:
+    """Layer count average and 20th/80th percentiles per system size, as previously written to results/*.dat."""
+    layer_counts = {}
+    for row in read_results(result_file):
+        layer_counts.setdefault(int(row['size']), []).append(int(row['layers']))
+    sys_size = np.array(sorted(layer_counts), dtype=float)
+    layer_count_avg = np.array([np.mean(layer_counts[size]) for size in sorted(layer_counts)])
+    layer_count_20perc = np.array([np.percentile(layer_counts[size], 20) for size in sorted(layer_counts)])
+    layer_count_80perc = np.array([np.percentile(layer_counts[size], 80) for size in sorted(layer_counts)])
     data = np.column_stack((sys_size, layer_count_avg, layer_count_20perc, layer_count_80perc))
-    header = 'system size, layer count average, layer count 20th percentile, layer count 80th percentile'
-    np.savetxt('./Data/results/greedy_router_v2.dat', data, header=header)
+    if summary_file is not None:
+        header = 'system size, layer count average, layer count 20th percentile, layer count 80th percentile'
+        np.savetxt(summary_file, data, header=header)
+    if plot:
+        plt.plot(sys_size, layer_count_avg, color='blue')
+        plt.fill_between(sys_size, layer_count_20perc, layer_count_80perc, facecolor='blue', alpha=0.5)
+        plt.show()
+    return data
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Parallel layer count benchmark of the greedy router on square grids.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5, 6], help='grid side lengths')
+    parser.add_argument('--degree', type=int, default=4, help='degree of the random regular problem graphs')
+    parser.add_argument('--copies', type=int, default=20, help='number of instances per size')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random instances')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: all cores)')
+    parser.add_argument('--output', default='./Data/results/greedy_router_runs.csv', help='per-instance CSV file')
+    parser.add_argument('--summary', default=None, help='write layer count statistics to this .dat file')
+    parser.add_argument('--no-memory', action='store_true', help='do not trace peak memory')
+    parser.add_argument('--plot', action='store_true', help='plot layer counts after the sweep')
+    args = parser.parse_args(argv)
+    greedy_router_benchmark(args.sizes, args.degree, args.copies, args.output, args.workers, not args.no_memory,
+                            args.seed)
+    summarize(args.output, args.summary, args.plot)
 
 
-greedy_router_benchmark()
+if __name__ == '__main__':
+    main()
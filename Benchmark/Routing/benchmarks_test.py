@@ -0,0 +1,24 @@
+import csv
+import os
+import tempfile
+from unittest import TestCase
+
+from Benchmark.Routing.benchmarks import RESULT_FIELDS, completed_instances, greedy_router_benchmark
+
+
+class TestResume(TestCase):
+    def test_truncated_result_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result_file = os.path.join(directory, 'runs.csv')
+            greedy_router_benchmark(sizes=(3,), copy_count=3, result_file=result_file, workers=1, trace_memory=False)
+            with open(result_file) as file:
+                content = file.read()
+            with open(result_file, 'w') as file:
+                file.write(content[:content.rstrip('\n').rfind('\n') + 6])
+            self.assertEqual(2, len(completed_instances(result_file)), msg='half-written row counted as complete')
+            rows = greedy_router_benchmark(sizes=(3,), copy_count=3, result_file=result_file, workers=1,
+                                           trace_memory=False)
+            self.assertEqual({0, 1, 2}, {int(row['instance']) for row in rows}, msg='resumed sweep misses instances')
+            self.assertEqual(3, len(rows), msg='resumed sweep kept the half-written row')
+            with open(result_file, newline='') as file:
+                self.assertEqual(RESULT_FIELDS, csv.DictReader(file).fieldnames, msg='header damaged')
@@ -1,16 +1,37 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
 
 from joblib import Memory
-import networkx as nx
+import numpy as np
 import dimod
 
+from Problem.spin_glass import random_regular_spin_glass_arrays, spin_glass_from_arrays
+
 data_cache = './Data'
 mem = Memory(data_cache)
+# part of the regular_graph_bqm cache key; bump whenever regular_graph_bqms draws different instances
+GENERATOR_VERSION = 2
+
+
+def regular_graph_bqms(degree: int, variable_count: int, copy_count: int, seed=None, workers: int = 1,
+                       low: float = 0.5, high: float = 1.0) -> List[dimod.BinaryQuadraticModel]:
+    """
+    copy_count random regular spin glasses. Instance k is drawn from the k-th child of np.random.SeedSequence(seed),
+    so the instances do not depend on workers, the number of processes generating them. Workers only draw the edge
+    and coupling arrays; the BQMs are built here, since pickling them back from the pool costs more than building.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(copy_count)
+    arguments = ([degree] * copy_count, [variable_count] * copy_count, seeds, [low] * copy_count, [high] * copy_count)
+    if workers is None or workers > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            arrays = list(executor.map(random_regular_spin_glass_arrays, *arguments,
+                                       chunksize=max(1, copy_count // 64)))
+    else:
+        arrays = map(random_regular_spin_glass_arrays, *arguments)
+    return [spin_glass_from_arrays(edges, couplings, variable_count) for edges, couplings in arrays]
 
 
-def regular_graph_bqm(degree: int, variable_count: int, copy_count: int):
-    bqm_arr = []
-    for _ in range(copy_count):
-        problem_graph = nx.random_regular_graph(degree, variable_count)
-        bqm_arr.append(dimod.generators.uniform(problem_graph, dimod.SPIN, low=0.5, high=1.0))
-    return bqm_arr
+def regular_graph_bqm(degree: int, variable_count: int, copy_count: int, generator_version: int = GENERATOR_VERSION):
+    """Cached regular_graph_bqms; instances cached by an older generator_version are not reused."""
+    return regular_graph_bqms(degree, variable_count, copy_count)
 regular_graph_bqm = mem.cache(regular_graph_bqm)
@@ -0,0 +1,182 @@
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Devices.quantum_hardware import Grid2dQPU
+from Router.routing import Layer
+from Router.mapping import Mapping
+from Router.GreedyRouter.edge_coloring import find_edge_coloring
+from Router.GreedyRouter.greedy_router import greedy_router
+from Router.BeamRouter.beam_router import beam_router
+from Router.Mapper.twoColorMapper import twoColorMapper
+from Router.Mapper.mapping_search import mapping_search
+
+
+def problem_instance(degree: int, variable_count: int, seed: int = 0) -> dimod.BinaryQuadraticModel:
+    problem_graph = nx.random_regular_graph(degree, variable_count, seed=seed)
+    return dimod.generators.uniform(problem_graph, dimod.SPIN, low=0.5, high=1.0, seed=seed)
+
+
+def setup_greedy_router(side: int, degree: int) -> Callable[[], None]:
+    qpu, bqm = Grid2dQPU(side, side), problem_instance(degree, side ** 2)
+    return lambda: greedy_router(bqm, qpu)
+
+
+def setup_beam_router(side: int, degree: int) -> Callable[[], None]:
+    qpu, bqm = Grid2dQPU(side, side), problem_instance(degree, side ** 2)
+    return lambda: beam_router(bqm, qpu, seed=0)
+
+
+def setup_mapping_search(side: int, degree: int) -> Callable[[], None]:
+    qpu, bqm = Grid2dQPU(side, side), problem_instance(degree, side ** 2)
+    return lambda: mapping_search(bqm, qpu, seed=0)
+
+
+def setup_two_color_mapper(side: int, degree: int) -> Callable[[], None]:
+    qpu, bqm = Grid2dQPU(side, side), problem_instance(degree, side ** 2)
+    return lambda: twoColorMapper(bqm, qpu)
+
+
+def setup_edge_coloring(side: int, degree: int) -> Callable[[], None]:
+    problem_graph = problem_instance(degree, side ** 2).to_networkx_graph()
+    return lambda: find_edge_coloring(problem_graph.copy())
+
+
+def setup_mapping_swap(side: int, degree: int, swap_count: int = 10000) -> Callable[[], None]:
+    qpu, bqm = Grid2dQPU(side, side), problem_instance(degree, side ** 2)
+    mapping = Mapping(qpu, bqm)
+    edges = list(qpu.edge_index)
+    gates = [edges[index] for index in np.random.default_rng(0).integers(len(edges), size=swap_count)]
+
+    def run():
+        for gate in gates:
+            mapping.swap(gate)
+    return run
+
+
+def setup_layer_construction(side: int, degree: int, layer_count: int = 100) -> Callable[[], None]:
+    qpu = Grid2dQPU(side, side)
+    Layer(qpu)
+    return lambda: [Layer(qpu) for _ in range(layer_count)]
+
+
+BENCHMARKS = {
+    'greedy_router': setup_greedy_router,
+    'beam_router': setup_beam_router,
+    'mapping_search': setup_mapping_search,
+    'twoColorMapper': setup_two_color_mapper,
+    'find_edge_coloring': setup_edge_coloring,
+    'Mapping.swap': setup_mapping_swap,
+    'Layer': setup_layer_construction,
+}
+
+
+def case_name(benchmark: str, side: int, degree: int) -> str:
+    return f'{benchmark}[grid={side}x{side},degree={degree}]'
+
+
+def cases(sizes: List[int], degrees: List[int], name_filter: str = None) -> List[Tuple[str, str, int, int]]:
+    result = []
+    for benchmark in BENCHMARKS:
+        for side in sizes:
+            for degree in degrees:
+                if (side ** 2 * degree) % 2 == 1 or degree >= side ** 2:
+                    continue
+                name = case_name(benchmark, side, degree)
+                if name_filter is None or name_filter in name:
+                    result.append((name, benchmark, side, degree))
+    return result
+
+
+def measure(benchmark: str, side: int, degree: int, repeat: int) -> Dict:
+    """Runs in a fresh process, so that ru_maxrss is the peak resident memory of this case alone."""
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    run = BENCHMARKS[benchmark](side, degree)
+    setup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {'time': min(times), 'mean_time': float(np.mean(times)), 'setup_rss': setup_rss,
+            'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit}
+
+
+def run_suite(sizes: List[int], degrees: List[int], repeat: int = 3, name_filter: str = None) -> Dict[str, Dict]:
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name, benchmark, side, degree in cases(sizes, degrees, name_filter):
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            results[name] = executor.submit(measure, benchmark, side, degree, repeat).result()
+        print(f"{name}: {results[name]['time']:.4f} s, peak RSS {results[name]['peak_rss'] / 2 ** 20:.1f} MiB")
+    return results
+
+
+def case_memory(result: Dict, min_memory: float) -> float:
+    """Peak RSS the case added on top of imports and setup, at least min_memory bytes."""
+    return max(result['peak_rss'] - result.get('setup_rss', 0), min_memory)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], time_threshold: float,
+            memory_threshold: float, min_time: float = 1e-3, min_memory: float = 16 * 2 ** 20) -> List[str]:
+    """
+    Returns a message for every case that got slower (or bigger) than threshold times its baseline. Time ratios of
+    cases that stay below min_time seconds are too noisy and are ignored. Memory is compared as the peak RSS on top
+    of setup_rss, the memory of imports and setup, which would otherwise hide the growth of the case itself; it is
+    counted as at least min_memory bytes, so that small cases do not report noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        time_ratio = result['time'] / baseline[name]['time']
+        memory_ratio = case_memory(result, min_memory) / case_memory(baseline[name], min_memory)
+        if time_ratio > time_threshold and result['time'] >= min_time:
+            regressions.append(f'{name}: time {time_ratio:.2f}x baseline')
+        if memory_ratio > memory_threshold:
+            regressions.append(f'{name}: peak RSS above setup {memory_ratio:.2f}x baseline')
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Wall time and peak memory benchmarks of the routing hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 8, 16, 32], help='grid side lengths')
+    parser.add_argument('--degrees', type=int, nargs='+', default=[3, 4, 5], help='problem graph degrees')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions per case, the fastest one is reported')
+    parser.add_argument('--filter', default=None, help='only run cases whose name contains this string')
+    parser.add_argument('--save', default=None, help='write results as JSON baseline to this file')
+    parser.add_argument('--compare', default=None, help='JSON baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=1.5, help='allowed slowdown factor before failing')
+    parser.add_argument('--memory-threshold', type=float, default=1.5,
+                        help='allowed growth factor of the peak RSS above setup')
+    parser.add_argument('--min-memory', type=float, default=16., help='memory floor of a case in MiB')
+    parser.add_argument('--min-time', type=float, default=1e-3, help='ignore slowdowns of cases faster than this')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.degrees, args.repeat, args.filter)
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold, args.min_time,
+                              args.min_memory * 2 ** 20)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from Benchmark.Routing.performance import compare
+
+MIB = 2 ** 20
+
+
+def result(time: float, setup_rss: float, peak_rss: float):
+    return {'time': time, 'mean_time': time, 'setup_rss': setup_rss * MIB, 'peak_rss': peak_rss * MIB}
+
+
+class TestCompare(TestCase):
+    def setUp(self) -> None:
+        self.baseline = {'case': result(1., 250, 350), 'small': result(1e-4, 250, 251)}
+
+    def test_unchanged(self):
+        self.assertEqual([], compare(self.baseline, self.baseline, 1.5, 1.5), msg='identical results regressed')
+
+    def test_time_regression(self):
+        regressions = compare({'case': result(2., 250, 350), 'small': result(1e-3 / 2, 250, 251)}, self.baseline,
+                              1.5, 1.5)
+        self.assertEqual(1, len(regressions), msg='only the slow case above min_time should be reported')
+        self.assertTrue(regressions[0].startswith('case: time'), msg='wrong case reported')
+
+    def test_memory_above_setup(self):
+        regressions = compare({'case': result(1., 250, 550)}, self.baseline, 1.5, 1.5)
+        self.assertEqual(['case: peak RSS above setup 3.00x baseline'], regressions,
+                         msg='tripled case memory hidden by setup memory')
+        self.assertEqual([], compare({'case': result(1., 400, 500)}, self.baseline, 1.5, 1.5),
+                         msg='growth of setup memory reported as regression')
+
+    def test_memory_floor(self):
+        self.assertEqual([], compare({'small': result(1e-4, 250, 260)}, self.baseline, 1.5, 1.5),
+                         msg='noise of a tiny case reported as regression')
+        self.assertEqual(1, len(compare({'small': result(1e-4, 250, 290)}, self.baseline, 1.5, 1.5)),
+                         msg='memory growth far above the floor not reported')
+
+    def test_new_cases_ignored(self):
+        self.assertEqual([], compare({'new': result(10., 250, 1000)}, self.baseline, 1.5, 1.5),
+                         msg='case without baseline reported')
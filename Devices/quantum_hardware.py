@@ -1,9 +1,10 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import matplotlib.pyplot as plt
 import itertools
 
 import cirq
 import networkx as nx
+import numpy as np
 
 #from Router.mapping import Mapping
 
@@ -12,6 +13,14 @@ class QPU:
     def __init__(self, hardware_graph: nx.Graph(), hardware_layout: Dict):
         self.graph = hardware_graph
         self.layout = hardware_layout
+        self._qubit_list = None
+        self._qubit_index = None
+        self._edge_array = None
+        self._edge_index = None
+        self._incidence = None
+        self._distance_matrix = None
+        self._next_hop_table = None
+        self._long_path = None
 
     def draw(self, mapping=None, gate_lists: Dict[str, List[tuple]] = None, ax=None, show: bool = True, **kwargs):
         nx.draw_networkx_edges(self.graph, pos=self.layout, with_labels=False, ax=ax, **kwargs)
@@ -34,6 +43,206 @@ class QPU:
     def has_edge(self, gate: frozenset):
         return self.graph.has_edge(*gate)
 
+    def _build_index(self):
+        self._qubit_list = sorted(self.graph.nodes())
+        self._qubit_index = {hard_qb: index for index, hard_qb in enumerate(self._qubit_list)}
+        edges = [tuple(sorted((self._qubit_index[hard_qb0], self._qubit_index[hard_qb1])))
+                 for hard_qb0, hard_qb1 in self.graph.edges()]
+        self._edge_array = np.array(sorted(edges), dtype=np.int64).reshape(-1, 2)
+        self._edge_index = {frozenset((self._qubit_list[qb0], self._qubit_list[qb1])): edge_id
+                            for edge_id, (qb0, qb1) in enumerate(self._edge_array)}
+
+    @property
+    def qubit_list(self) -> List:
+        """Hardware qubits in the (stable, sorted) order used by all array representations."""
+        if self._qubit_list is None:
+            self._build_index()
+        return self._qubit_list
+
+    @property
+    def qubit_index(self) -> Dict:
+        """Maps every hardware qubit to its position in qubit_list."""
+        if self._qubit_index is None:
+            self._build_index()
+        return self._qubit_index
+
+    @property
+    def edge_array(self) -> np.ndarray:
+        """(E, 2) array of qubit indices, one row per hardware edge, ordered by edge id."""
+        if self._edge_array is None:
+            self._build_index()
+        return self._edge_array
+
+    @property
+    def edge_index(self) -> Dict[frozenset, int]:
+        """Maps every hardware edge (as frozenset of qubits) to its edge id."""
+        if self._edge_index is None:
+            self._build_index()
+        return self._edge_index
+
+    @property
+    def incidence(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compressed adjacency (indptr, neighbors, edge_ids): the neighbors of qubit index u and the ids of the
+        connecting edges are neighbors[indptr[u]:indptr[u+1]] and edge_ids[indptr[u]:indptr[u+1]].
+        """
+        if self._incidence is None:
+            edges = self.edge_array
+            edge_ids = np.arange(len(edges))
+            sources = np.concatenate((edges[:, 0], edges[:, 1]))
+            order = np.argsort(sources, kind='stable')
+            neighbors = np.concatenate((edges[:, 1], edges[:, 0]))[order]
+            incident_edges = np.concatenate((edge_ids, edge_ids))[order]
+            indptr = np.zeros(len(self.qubit_list) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=len(self.qubit_list)), out=indptr[1:])
+            self._incidence = (indptr, neighbors, incident_edges)
+        return self._incidence
+
+    def edge_id(self, gate: frozenset) -> int:
+        """Edge id of gate, or -1 if the gate is not supported by the hardware graph."""
+        return self.edge_index.get(gate, -1)
+
+    def edge_qubits(self, edge_id: int) -> frozenset:
+        qb0, qb1 = self.edge_array[edge_id]
+        return frozenset((self.qubit_list[qb0], self.qubit_list[qb1]))
+
+    def _build_distance_matrix(self) -> np.ndarray:
+        qubit_count = len(self.qubit_list)
+        distances = np.full((qubit_count, qubit_count), -1, dtype=np.int32)
+        for source, lengths in nx.all_pairs_shortest_path_length(self.graph):
+            targets = [self.qubit_index[target] for target in lengths]
+            distances[self.qubit_index[source], targets] = list(lengths.values())
+        return distances
+
+    def _build_next_hop_table(self) -> np.ndarray:
+        distances = self.distance_matrix
+        next_hops = np.full(distances.shape, -1, dtype=np.int32)
+        for qb, hard_qb in enumerate(self.qubit_list):
+            next_hops[qb, qb] = qb
+            for neighbor in sorted(self.qubit_index[neighbor] for neighbor in self.graph.neighbors(hard_qb)):
+                closer = (next_hops[qb] == -1) & (distances[neighbor] == distances[qb] - 1)
+                next_hops[qb, closer] = neighbor
+        return next_hops
+
+    @property
+    def distance_matrix(self) -> np.ndarray:
+        """
+        Hop distance between every pair of hardware qubits, indexed like qubit_list (-1 for disconnected pairs).
+        Built on first access and cached.
+        """
+        if self._distance_matrix is None:
+            self._distance_matrix = self._build_distance_matrix()
+        return self._distance_matrix
+
+    @property
+    def next_hop_table(self) -> np.ndarray:
+        """
+        next_hop_table[u, v] is the neighbor of u on a shortest path from u to v (indices into qubit_list).
+        Built on first access and cached.
+        """
+        if self._next_hop_table is None:
+            self._next_hop_table = self._build_next_hop_table()
+        return self._next_hop_table
+
+    def _build_long_path(self, start_count: int = 8) -> np.ndarray:
+        """
+        Simple paths covering all qubits, found by Warnsdorff's rule: starting from a qubit of minimum degree, always
+        step to the unvisited neighbor with the fewest unvisited neighbors, and once stuck extend the path the same
+        way from its start. The next path starts at the first unvisited qubit in breadth first order from the first
+        start, so that consecutive paths are close. Every cover takes O(E); the cover with the fewest breaks out of
+        start_count starts is kept.
+        """
+        indptr, neighbors, _ = self.incidence
+        qubit_count = len(self.qubit_list)
+        neighbor_lists = [neighbors[indptr[qb]:indptr[qb + 1]].tolist() for qb in range(qubit_count)]
+        degrees = np.diff(indptr)
+        best_cover, best_break_count = None, qubit_count
+        for start in np.argsort(degrees, kind='stable')[:start_count].tolist():
+            free_degrees = degrees.tolist()
+            visited = [False] * qubit_count
+
+            def next_step(qb):
+                step = -1
+                for neighbor in neighbor_lists[qb]:
+                    if not visited[neighbor] and (step < 0 or free_degrees[neighbor] < free_degrees[step]):
+                        step = neighbor
+                return step
+
+            def walk(qb):
+                steps = []
+                while qb >= 0:
+                    visited[qb] = True
+                    steps.append(qb)
+                    for neighbor in neighbor_lists[qb]:
+                        free_degrees[neighbor] -= 1
+                    qb = next_step(qb)
+                return steps
+
+            cover, break_count = [], -1
+            for segment_start in self._breadth_first_order(start, neighbor_lists):
+                if not visited[segment_start]:
+                    forward = walk(segment_start)
+                    cover.extend(walk(next_step(segment_start))[::-1] + forward)
+                    break_count += 1
+            if break_count < best_break_count or best_cover is None:
+                best_cover, best_break_count = cover, break_count
+            if best_break_count == 0:
+                break
+        return np.array(best_cover, dtype=np.int64)
+
+    @staticmethod
+    def _breadth_first_order(start: int, neighbor_lists: List[List[int]]) -> List[int]:
+        seen = [False] * len(neighbor_lists)
+        seen[start] = True
+        order = [start]
+        for qb in order:
+            for neighbor in neighbor_lists[qb]:
+                if not seen[neighbor]:
+                    seen[neighbor] = True
+                    order.append(neighbor)
+        order.extend(qb for qb in range(len(neighbor_lists)) if not seen[qb])
+        return order
+
+    @property
+    def long_path(self) -> np.ndarray:
+        """
+        All qubit indices, ordered as a few long simple paths through the hardware graph (a single Hamiltonian path
+        for Grid2dQPU and LineQPU), used to embed chains of logical qubits. Consecutive qubits are adjacent except at
+        the breaks between paths. Built on first access and cached.
+        """
+        if self._long_path is None:
+            self._long_path = self._build_long_path()
+        return self._long_path
+
+    def compact_region(self, qubit_count: int) -> List:
+        """
+        qubit_count hardware qubits forming a compact connected region: the ball of the qubit_count qubits closest to
+        a center, choosing the center whose ball has the smallest sum of distances. A ball contains a shortest path
+        to the center from each of its qubits, so it is connected.
+        """
+        distances = self.distance_matrix.astype(np.float64)
+        distances[distances < 0] = np.inf
+        balls = np.argpartition(distances, qubit_count - 1, axis=1)[:, :qubit_count]
+        center = np.argmin(np.take_along_axis(distances, balls, axis=1).sum(axis=1))
+        return [self.qubit_list[qb] for qb in np.sort(balls[center])]
+
+    def subdevice(self, hard_qbs: List) -> 'QPU':
+        """QPU of the subgraph induced by hard_qbs, keeping their layout."""
+        layout = None if self.layout is None else {hard_qb: self.layout[hard_qb] for hard_qb in hard_qbs}
+        return QPU(self.graph.subgraph(hard_qbs).copy(), layout)
+
+    def distance(self, hard_qb0, hard_qb1) -> int:
+        return int(self.distance_matrix[self.qubit_index[hard_qb0], self.qubit_index[hard_qb1]])
+
+    def next_hop(self, hard_qb0, hard_qb1):
+        return self.qubit_list[self.next_hop_table[self.qubit_index[hard_qb0], self.qubit_index[hard_qb1]]]
+
+    def shortest_path(self, hard_qb0, hard_qb1) -> List:
+        path = [hard_qb0]
+        while path[-1] != hard_qb1:
+            path.append(self.next_hop(path[-1], hard_qb1))
+        return path
+
 
 class Grid2dQPU(QPU):
     def __init__(self, num_rows: int, num_columns: int):
@@ -47,14 +256,26 @@ class Grid2dQPU(QPU):
         super().__init__(hardware_graph, hardware_layout)
 
     def embedded_chain(self):
-        for row_ind in range(self.num_rows):
+        """Hamiltonian path through all qubits, snaking row by row."""
+        # nx.grid_2d_graph(num_columns, num_rows) puts num_columns qubits along the row coordinate
+        row_count = max(hard_qb.row for hard_qb in self.qubit_list) + 1
+        column_count = max(hard_qb.col for hard_qb in self.qubit_list) + 1
+        for row_ind in range(row_count):
             if row_ind % 2 == 0:
-                for column_ind in range(self.num_columns):
+                for column_ind in range(column_count):
                     yield cirq.GridQubit(row_ind, column_ind)
             else:
-                for column_ind in range(self.num_columns - 1, -1, -1):
+                for column_ind in range(column_count - 1, -1, -1):
                     yield cirq.GridQubit(row_ind, column_ind)
 
+    def _build_long_path(self) -> np.ndarray:
+        return np.array([self.qubit_index[hard_qb] for hard_qb in self.embedded_chain()], dtype=np.int64)
+
+    def _build_distance_matrix(self) -> np.ndarray:
+        rows = np.array([hard_qb.row for hard_qb in self.qubit_list], dtype=np.int32)
+        columns = np.array([hard_qb.col for hard_qb in self.qubit_list], dtype=np.int32)
+        return np.abs(rows[:, None] - rows[None, :]) + np.abs(columns[:, None] - columns[None, :])
+
     # def loop_embedding(self):
     #     num_rows_even = self.num_rows % 2 == 0
     #     num_columns_even = self.num_columns % 2 == 0
@@ -78,6 +299,16 @@ class LineQPU(QPU):
         hardware_layout = {node: node.x for node in hardware_graph.nodes()}
         super().__init__(hardware_graph, hardware_layout)
 
+    def embedded_chain(self):
+        return iter(self.qubit_list)
+
+    def _build_long_path(self) -> np.ndarray:
+        return np.arange(len(self.qubit_list))
+
+    def _build_distance_matrix(self) -> np.ndarray:
+        positions = np.array([hard_qb.x for hard_qb in self.qubit_list], dtype=np.int32)
+        return np.abs(positions[:, None] - positions[None, :])
+
 
 class XmonQPU(QPU):
     def __init__(self, device: cirq.google.XmonDevice):
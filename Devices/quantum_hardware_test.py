@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+import cirq
+import networkx as nx
+import numpy as np
+
+from Devices.quantum_hardware import QPU, Grid2dQPU, LineQPU, XmonQPU
+
+
+class TestQPU(TestCase):
+    def setUp(self) -> None:
+        self.qpus = [Grid2dQPU(4, 5), LineQPU(7)]
+
+    def test_closed_form_distances(self):
+        for qpu in self.qpus:
+            bfs_distances = QPU._build_distance_matrix(qpu)
+            self.assertTrue(np.array_equal(bfs_distances, qpu.distance_matrix),
+                            msg='closed form distances do not agree with breadth first search')
+
+    def test_shortest_path(self):
+        for qpu in self.qpus:
+            for hard_qb0 in qpu.qubits():
+                for hard_qb1 in qpu.qubits():
+                    path = qpu.shortest_path(hard_qb0, hard_qb1)
+                    self.assertEqual(nx.shortest_path_length(qpu.graph, hard_qb0, hard_qb1), len(path) - 1,
+                                     msg='path found via next hop table is not a shortest path')
+                    for qb0, qb1 in zip(path[:-1], path[1:]):
+                        self.assertTrue(qpu.graph.has_edge(qb0, qb1), msg='path is not connected on hardware graph')
+
+    def test_edge_index(self):
+        for qpu in self.qpus:
+            self.assertEqual(qpu.graph.size(), len(qpu.edge_index))
+            for hard_qb0, hard_qb1 in qpu.graph.edges():
+                gate = frozenset((hard_qb0, hard_qb1))
+                self.assertEqual(gate, qpu.edge_qubits(qpu.edge_id(gate)))
+
+    def test_embedded_chain(self):
+        for qpu in self.qpus + [Grid2dQPU(3, 6), Grid2dQPU(6, 3)]:
+            chain = list(qpu.embedded_chain())
+            self.assertEqual(set(chain), set(qpu.qubits()), msg='chain does not visit every qubit exactly once')
+            self.assertEqual(len(chain), len(qpu.qubit_list), msg='chain does not visit every qubit exactly once')
+            for qb0, qb1 in zip(chain[:-1], chain[1:]):
+                self.assertTrue(qpu.graph.has_edge(qb0, qb1), msg='chain is not connected on hardware graph')
+
+    def test_long_path(self):
+        for qpu in self.qpus:
+            self.assertTrue(np.array_equal(np.array([qpu.qubit_index[hard_qb] for hard_qb in qpu.embedded_chain()]),
+                                           qpu.long_path), msg='long path differs from the embedded chain')
+        for qpu in [XmonQPU(cirq.google.Bristlecone), QPU(nx.random_regular_graph(3, 200, seed=0), None)]:
+            path = qpu.long_path
+            self.assertEqual(list(range(len(qpu.qubit_list))), sorted(path.tolist()),
+                             msg='long path does not visit every qubit exactly once')
+            break_count = np.count_nonzero(qpu.distance_matrix[path[:-1], path[1:]] != 1)
+            self.assertTrue(break_count < len(path) // 10, msg='long path breaks too often')
+
+    def test_compact_region(self):
+        qpu = Grid2dQPU(10, 10)
+        for qubit_count in (1, 9, 30, 100):
+            region = qpu.compact_region(qubit_count)
+            self.assertEqual(qubit_count, len(set(region)))
+            self.assertTrue(nx.is_connected(qpu.graph.subgraph(region)), msg='region is not connected')
+            subdevice = qpu.subdevice(region)
+            self.assertEqual(sorted(region), subdevice.qubit_list)
+        region = qpu.compact_region(9)
+        self.assertTrue(max(qpu.distance(qb0, qb1) for qb0 in region for qb1 in region) <= 4, msg='region not compact')
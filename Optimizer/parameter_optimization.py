@@ -0,0 +1,16 @@
+from typing import Sequence
+
+import numpy as np
+from scipy.optimize import minimize, OptimizeResult
+
+from Optimizer.statevector import StatevectorSimulator
+
+
+def optimize_parameters(simulator: StatevectorSimulator, initial_params: Sequence[float], method: str = 'BFGS',
+                        **kwargs) -> OptimizeResult:
+    """
+    Minimizes <C> over params = (gammas, betas) with scipy.optimize.minimize, using the adjoint gradient of the
+    simulator, so every iteration costs a single forward and backward statevector sweep.
+    """
+    return minimize(simulator.expectation_and_gradient, np.asarray(initial_params, dtype=np.float64),
+                    jac=True, method=method, **kwargs)
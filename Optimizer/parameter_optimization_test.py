@@ -0,0 +1,18 @@
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Optimizer.statevector import StatevectorSimulator
+from Optimizer.parameter_optimization import optimize_parameters
+
+
+class TestOptimizeParameters(TestCase):
+    def test_optimize_parameters(self):
+        problem = dimod.generators.uniform(nx.random_regular_graph(3, 8), dimod.SPIN, low=0.5, high=1.0)
+        simulator = StatevectorSimulator(problem)
+        initial_params = np.array([0.1, 0.1, 0.1, 0.1])
+        result = optimize_parameters(simulator, initial_params)
+        self.assertTrue(result.fun < simulator.expectation(initial_params), msg='optimization did not lower the energy')
+        self.assertAlmostEqual(result.fun, simulator.expectation(result.x))
@@ -0,0 +1,226 @@
+from typing import Dict, List, Any, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import dimod
+
+from Problem.diagonal_cache import DiagonalCache, DEFAULT_DIAGONAL_CACHE, available_memory
+
+
+def apply_phase_separator(state: np.ndarray, diagonal: np.ndarray, gamma) -> np.ndarray:
+    """
+    In place multiplication with exp(-i gamma C). For a batch of states of shape (B, 2^n), gamma may be an array
+    of B angles.
+    """
+    state *= np.exp(-1j * np.multiply.outer(gamma, diagonal)).astype(state.dtype, copy=False)
+    return state
+
+
+MIXER_GROUP_QUBITS = 4
+
+
+def mixer_matrix(beta: float, num_qubits: int) -> np.ndarray:
+    """exp(-i beta X) on num_qubits qubits as dense 2^num_qubits x 2^num_qubits matrix (big endian like cirq)."""
+    cos, sin = np.cos(beta), -1j * np.sin(beta)
+    single = np.array([[cos, sin], [sin, cos]])
+    matrix = np.ones((1, 1), dtype=complex)
+    for _ in range(num_qubits):
+        matrix = np.kron(matrix, single)
+    return matrix
+
+
+def apply_mixer(state: np.ndarray, beta, num_qubits: int, buffer: np.ndarray = None) -> np.ndarray:
+    """
+    In place application of exp(-i beta X) on every qubit. The qubits are processed in groups of
+    MIXER_GROUP_QUBITS: for a group the state is viewed as (2^a, 2^g, 2^b) and the group's mixer_matrix is applied
+    as one matmul into buffer (a second statevector, allocated if not given), alternating between state and
+    buffer. A sweep thus reads and writes the state about n / 2 times instead of making 6 butterfly passes per
+    qubit. For a batch of states of shape (B, 2^n), beta may be an array of B angles.
+    """
+    if state.ndim > 1:
+        rows = state.reshape(-1, state.shape[-1])
+        if buffer is None:
+            buffer = np.empty(state.shape[-1], dtype=state.dtype)
+        for row, row_beta in zip(rows, np.broadcast_to(beta, state.shape[:-1]).ravel()):
+            apply_mixer(row, row_beta, num_qubits, buffer)
+        return state
+    if buffer is None:
+        buffer = np.empty_like(state)
+    current, other = state, buffer
+    for first_qubit in range(0, num_qubits, MIXER_GROUP_QUBITS):
+        group_size = min(MIXER_GROUP_QUBITS, num_qubits - first_qubit)
+        matrix = mixer_matrix(beta, group_size).astype(state.dtype, copy=False)
+        trailing = 2 ** (num_qubits - first_qubit - group_size)
+        if trailing == 1:
+            np.matmul(current.reshape(-1, 2 ** group_size), matrix.T, out=other.reshape(-1, 2 ** group_size))
+        else:
+            np.matmul(matrix, current.reshape(-1, 2 ** group_size, trailing),
+                      out=other.reshape(-1, 2 ** group_size, trailing))
+        current, other = other, current
+    if current is not state:
+        state[...] = current
+    return state
+
+
+def apply_mixer_hamiltonian(state: np.ndarray, num_qubits: int) -> np.ndarray:
+    """Returns (sum_k X_k) |state> as a new array."""
+    result = np.zeros_like(state)
+    for qubit in range(num_qubits):
+        view, result_view = state.reshape(2 ** qubit, 2, -1), result.reshape(2 ** qubit, 2, -1)
+        result_view[:, 0, :] += view[:, 1, :]
+        result_view[:, 1, :] += view[:, 0, :]
+    return result
+
+
+def split_parameters(params: Sequence[float]):
+    """Splits a parameter vector (gamma_0, ..., gamma_p-1, beta_0, ..., beta_p-1) into gammas and betas."""
+    params = np.asarray(params, dtype=np.float64)
+    assert len(params) % 2 == 0, 'parameter vector must contain as many gammas as betas'
+    depth = len(params) // 2
+    return params[:depth], params[depth:]
+
+
+class StatevectorSimulator:
+    """
+    Exact QAOA simulation of a BQM with the X mixer. The cost diagonal is taken from diagonal_cache (by default a
+    process wide in-memory cache), so it is computed once per problem; every evaluation then costs p elementwise
+    phase multiplications and p mixer sweeps (see apply_mixer) over the statevector.
+    """
+    def __init__(self, problem: dimod.BinaryQuadraticModel, variable_order: List[Any] = None,
+                 dtype=np.complex128, diagonal_cache: DiagonalCache = None):
+        self.problem = problem
+        self.variables = list(problem.variables) if variable_order is None else list(variable_order)
+        self.num_qubits = len(self.variables)
+        self.dtype = np.dtype(dtype)
+        if diagonal_cache is None:
+            diagonal_cache = DEFAULT_DIAGONAL_CACHE
+        self.diagonal = diagonal_cache.diagonal(problem, self.variables, dtype=np.finfo(self.dtype).dtype)
+
+    def initial_state(self) -> np.ndarray:
+        return np.full(2 ** self.num_qubits, 2 ** (-self.num_qubits / 2), dtype=self.dtype)
+
+    def state(self, gammas: Sequence[float], betas: Sequence[float]) -> np.ndarray:
+        state = self.initial_state()
+        for gamma, beta in zip(gammas, betas):
+            apply_phase_separator(state, self.diagonal, gamma)
+            apply_mixer(state, beta, self.num_qubits)
+        return state
+
+    def expectation_from_state(self, state: np.ndarray) -> float:
+        return float(np.dot(np.abs(state) ** 2, self.diagonal))
+
+    def expectation(self, params: Sequence[float]) -> float:
+        """<C> for params = (gamma_0, ..., gamma_p-1, beta_0, ..., beta_p-1)."""
+        gammas, betas = split_parameters(params)
+        return self.expectation_from_state(self.state(gammas, betas))
+
+    def expectation_and_gradient(self, params: Sequence[float]) -> Tuple[float, np.ndarray]:
+        """
+        <C> and its gradient with respect to params = (gammas, betas), computed with the adjoint method: one forward
+        sweep, then one backward sweep uncomputing the state together with lambda = U^dagger C |psi>. The signature
+        matches scipy.optimize.minimize(..., jac=True).
+        """
+        gammas, betas = split_parameters(params)
+        depth = len(gammas)
+        state = self.state(gammas, betas)
+        energy = self.expectation_from_state(state)
+        adjoint = self.diagonal * state
+        gradient = np.zeros(2 * depth)
+        for layer in range(depth - 1, -1, -1):
+            gradient[depth + layer] = 2 * np.vdot(adjoint, apply_mixer_hamiltonian(state, self.num_qubits)).imag
+            apply_mixer(state, -betas[layer], self.num_qubits)
+            apply_mixer(adjoint, -betas[layer], self.num_qubits)
+            gradient[layer] = 2 * np.vdot(adjoint, self.diagonal * state).imag
+            apply_phase_separator(state, self.diagonal, -gammas[layer])
+            apply_phase_separator(adjoint, self.diagonal, -gammas[layer])
+        return energy, gradient
+
+    def phase_vector(self, gamma: float) -> np.ndarray:
+        """Diagonal of exp(-i gamma C)."""
+        return np.exp(-1j * gamma * self.diagonal).astype(self.dtype, copy=False)
+
+    @staticmethod
+    def default_batch_bytes(workers: int = 1) -> int:
+        """A quarter of the available memory split over workers, at least 16 MiB."""
+        return max(available_memory() // (4 * workers), 2 ** 24)
+
+    def batch_size(self, max_batch_bytes: int, depth: int = 1) -> int:
+        """Number of stacked states fitting into max_batch_bytes, together with up to depth phase vectors each."""
+        return max(1, max_batch_bytes // ((depth + 1) * self.dtype.itemsize * 2 ** self.num_qubits))
+
+    def _expectation_stack(self, params: np.ndarray, phases: Dict[float, np.ndarray]) -> np.ndarray:
+        """
+        <C> for a stack of rows. phases holds the phase vectors of the previous stack; those of gammas that do
+        not occur in this stack are dropped, the missing ones computed.
+        """
+        depth = params.shape[1] // 2
+        gammas = set(params[:, :depth].ravel().tolist())
+        for gamma in [gamma for gamma in phases if gamma not in gammas]:
+            del phases[gamma]
+        for gamma in gammas - phases.keys():
+            phases[gamma] = self.phase_vector(gamma)
+        states = np.tile(self.initial_state(), (len(params), 1))
+        buffer = np.empty(2 ** self.num_qubits, dtype=self.dtype)
+        for row, state in zip(params.tolist(), states):
+            for layer in range(depth):
+                state *= phases[row[layer]]
+                apply_mixer(state, row[depth + layer], self.num_qubits, buffer)
+        return (np.abs(states) ** 2) @ self.diagonal
+
+    def _expectation_batches(self, params: np.ndarray, batch_size: int) -> np.ndarray:
+        phases = {}
+        return np.concatenate([self._expectation_stack(params[start:start + batch_size], phases)
+                               for start in range(0, len(params), batch_size)])
+
+    def expectation_batch(self, params: np.ndarray, max_batch_bytes: int = None, workers: int = 1) -> np.ndarray:
+        """
+        <C> for every row of the (N, 2p) array params. The rows are sorted by their gammas and simulated as
+        stacked states of at most max_batch_bytes per stack (by default a quarter of the available memory, split
+        over the workers), so that the phase vector of every distinct gamma is computed about once, however large
+        the grid. With workers > 1 the sorted rows are split into contiguous chunks over a process pool; the
+        simulator (and with it the diagonal) is sent to every worker only once, and the default diagonal cache of
+        every worker gets its share of the memory budget (see DiagonalCache.default_max_bytes).
+        """
+        params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+        assert params.shape[1] % 2 == 0, 'parameter vectors must contain as many gammas as betas'
+        depth = params.shape[1] // 2
+        workers = 1 if workers is None or workers < 1 else workers
+        if max_batch_bytes is None:
+            max_batch_bytes = self.default_batch_bytes(workers)
+        batch_size = self.batch_size(max_batch_bytes, depth)
+        order = np.lexsort(params[:, depth - 1::-1].T) if depth > 0 else np.arange(len(params))
+        expectations = np.empty(len(params))
+        if workers == 1 or len(params) <= batch_size:
+            expectations[order] = self._expectation_batches(params[order], batch_size)
+            return expectations
+        chunks = np.array_split(params[order], min(workers, -(-len(params) // batch_size)))
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self, workers)) as executor:
+            results = executor.map(_worker_expectation_batches, chunks, [batch_size] * len(chunks))
+            expectations[order] = np.concatenate(list(results))
+        return expectations
+
+
+_worker_simulator = None
+
+
+def _init_worker(simulator: StatevectorSimulator, workers: int):
+    global _worker_simulator
+    _worker_simulator = simulator
+    DEFAULT_DIAGONAL_CACHE.resize(DiagonalCache.default_max_bytes(workers))
+
+
+def _worker_expectation_batches(params: np.ndarray, batch_size: int) -> np.ndarray:
+    return _worker_simulator._expectation_batches(params, batch_size)
+
+
+def parameter_grid(gammas: Sequence[float], betas: Sequence[float]) -> np.ndarray:
+    """(len(gammas) * len(betas), 2) array of all p=1 parameter points, gamma varying slowest."""
+    gamma_grid, beta_grid = np.meshgrid(gammas, betas, indexing='ij')
+    return np.column_stack((gamma_grid.ravel(), beta_grid.ravel()))
+
+
+def landscape(simulator: StatevectorSimulator, gammas: Sequence[float], betas: Sequence[float],
+              **kwargs) -> np.ndarray:
+    """p=1 expectation landscape of shape (len(gammas), len(betas)); kwargs are passed to expectation_batch."""
+    expectations = simulator.expectation_batch(parameter_grid(gammas, betas), **kwargs)
+    return expectations.reshape(len(gammas), len(betas))
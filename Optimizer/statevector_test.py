@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Optimizer.statevector import *
+
+
+def reference_expectation(problem: dimod.BinaryQuadraticModel, gammas, betas) -> float:
+    variables = list(problem.variables)
+    num_qubits = len(variables)
+    energies = np.array([problem.energy({variable: 1 - 2 * ((index >> (num_qubits - 1 - k)) & 1)
+                                         for k, variable in enumerate(variables)})
+                         for index in range(2 ** num_qubits)])
+    state = np.full(2 ** num_qubits, 2 ** (-num_qubits / 2), dtype=complex)
+    for gamma, beta in zip(gammas, betas):
+        state = np.exp(-1j * gamma * energies) * state
+        mixer = np.array([[np.cos(beta), -1j * np.sin(beta)], [-1j * np.sin(beta), np.cos(beta)]])
+        full_mixer = np.array([[1.0]])
+        for _ in range(num_qubits):
+            full_mixer = np.kron(full_mixer, mixer)
+        state = full_mixer @ state
+    return float(np.sum(np.abs(state) ** 2 * energies))
+
+
+class TestStatevectorSimulator(TestCase):
+    def setUp(self) -> None:
+        self.problem = dimod.generators.uniform(nx.random_regular_graph(3, 6), dimod.SPIN, low=-1.0, high=1.0)
+        for variable in self.problem.variables:
+            self.problem.set_linear(variable, np.random.uniform(-1, 1))
+        self.simulator = StatevectorSimulator(self.problem)
+
+    def test_cost_diagonal(self):
+        variables = list(self.problem.variables)
+        for index in np.random.choice(2 ** len(variables), 10):
+            sample = {variable: 1 - 2 * ((index >> (len(variables) - 1 - k)) & 1) for k, variable in enumerate(variables)}
+            self.assertAlmostEqual(self.problem.energy(sample), self.simulator.diagonal[index],
+                                   msg='cost diagonal does not agree with the energy of the bqm')
+
+    def test_expectation(self):
+        for depth in (1, 2, 3):
+            params = np.random.uniform(-np.pi, np.pi, 2 * depth)
+            self.assertAlmostEqual(reference_expectation(self.problem, params[:depth], params[depth:]),
+                                   self.simulator.expectation(params),
+                                   msg='statevector expectation does not agree with dense matrix reference')
+
+    def test_normalization(self):
+        state = self.simulator.state([0.4, 1.3], [0.2, -0.7])
+        self.assertAlmostEqual(1.0, np.linalg.norm(state), msg='evolution is not unitary')
+
+    def test_expectation_batch(self):
+        params = np.random.uniform(-np.pi, np.pi, (7, 4))
+        expected = [self.simulator.expectation(row) for row in params]
+        state_bytes = 16 * 2 ** self.simulator.num_qubits
+        for max_batch_bytes, workers in ((2 ** 28, 1), (3 * state_bytes, 1), (2 * state_bytes, 2)):
+            expectations = self.simulator.expectation_batch(params, max_batch_bytes=max_batch_bytes, workers=workers)
+            self.assertTrue(np.allclose(expected, expectations),
+                            msg='batched evaluation does not agree with single evaluations')
+
+    def test_stacked_batches(self):
+        problem = dimod.generators.uniform(nx.random_regular_graph(3, 20, seed=0), dimod.SPIN, seed=0)
+        simulator = StatevectorSimulator(problem)
+        stack_sizes = []
+        expectation_stack = simulator._expectation_stack
+
+        def recorded_stack(params, phases):
+            stack_sizes.append(len(params))
+            return expectation_stack(params, phases)
+        simulator._expectation_stack = recorded_stack
+        params = np.array([[0.3, 0.2], [0.1, 0.4], [0.3, -0.5]])
+        expectations = simulator.expectation_batch(params)
+        self.assertEqual([3], stack_sizes, msg='default arguments do not stack the states of n=20')
+        for row, expectation in zip(params, expectations):
+            self.assertAlmostEqual(simulator.expectation(row), expectation,
+                                   msg='stacked evaluation does not agree with single evaluations')
+
+    def test_mixer(self):
+        state = np.random.normal(size=2 ** 7) + 1j * np.random.normal(size=2 ** 7)
+        expected = mixer_matrix(0.7, 7) @ state
+        self.assertTrue(np.allclose(expected, apply_mixer(state, 0.7, 7)), msg='grouped mixer differs from dense mixer')
+
+    def test_landscape(self):
+        gammas, betas = np.linspace(0, 1, 3), np.linspace(0, 0.5, 4)
+        values = landscape(self.simulator, gammas, betas)
+        self.assertEqual((3, 4), values.shape)
+        self.assertAlmostEqual(self.simulator.expectation([gammas[1], betas[2]]), values[1, 2])
+
+    def test_expectation_and_gradient(self):
+        for depth in (1, 3):
+            params = np.random.uniform(-np.pi, np.pi, 2 * depth)
+            energy, gradient = self.simulator.expectation_and_gradient(params)
+            self.assertAlmostEqual(self.simulator.expectation(params), energy)
+            for index in range(2 * depth):
+                shift = np.zeros(2 * depth)
+                shift[index] = 1e-6
+                finite_difference = (self.simulator.expectation(params + shift)
+                                     - self.simulator.expectation(params - shift)) / 2e-6
+                self.assertAlmostEqual(finite_difference, gradient[index], places=4,
+                                       msg='adjoint gradient does not agree with finite differences')
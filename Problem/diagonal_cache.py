@@ -0,0 +1,178 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, List
+
+import numpy as np
+import dimod
+
+
+def cost_diagonal(problem: dimod.BinaryQuadraticModel, variable_order: List[Any] = None,
+                  dtype=np.float64) -> np.ndarray:
+    """
+    Energies of all 2^n spin configurations of problem, i.e. the diagonal of the cost Hamiltonian. Variable k of
+    variable_order is qubit k in big endian order (like cirq), bit value 0 corresponding to spin +1.
+    The diagonal is grown one variable at a time: appending variable k as new least significant bit splits every
+    entry into entry + field_k and entry - field_k, field_k being its local field from the variables before it.
+    This costs O(deg * 2^n) vectorized operations instead of one problem.energy call per sample.
+    """
+    if problem.vartype is dimod.BINARY:
+        problem = problem.change_vartype(dimod.SPIN, inplace=False)
+    if variable_order is None:
+        variable_order = list(problem.variables)
+    num_qubits = len(variable_order)
+    linear, (row, col, quadratic), offset = problem.to_numpy_vectors(variable_order=variable_order)
+    couplings = [[] for _ in range(num_qubits)]
+    for qb0, qb1, bias in zip(row, col, quadratic):
+        couplings[max(qb0, qb1)].append((min(qb0, qb1), bias))
+    signs = np.array([1, -1], dtype=dtype)
+    diagonal = np.full((), offset, dtype=dtype)
+    for qubit in range(num_qubits):
+        field = np.full((2,) * qubit, linear[qubit], dtype=dtype)
+        for other_qubit, bias in couplings[qubit]:
+            field += bias * signs.reshape((1,) * other_qubit + (2,) + (1,) * (qubit - other_qubit - 1))
+        diagonal = np.stack((diagonal + field, diagonal - field), axis=-1)
+    return diagonal.reshape(-1)
+
+
+def field_diagonal(fields: np.ndarray, dtype=np.float64) -> np.ndarray:
+    """Diagonal of sum_k fields[k] Z_k, built like cost_diagonal."""
+    diagonal = np.zeros((), dtype=dtype)
+    for field in fields:
+        diagonal = np.stack((diagonal + field, diagonal - field), axis=-1)
+    return diagonal.reshape(-1)
+
+
+def write_cost_diagonal(problem: dimod.BinaryQuadraticModel, out: np.ndarray, variable_order: List[Any] = None,
+                        block_qubits: int = 20) -> np.ndarray:
+    """
+    cost_diagonal written block by block into out (e.g. a memory-mapped array), so that no second 2^n array is
+    needed. The last block_qubits qubits span one block: the diagonal of their own terms is computed once and
+    every block adds the energy of its leading spins and the diagonal of their fields on the block qubits.
+    """
+    if problem.vartype is dimod.BINARY:
+        problem = problem.change_vartype(dimod.SPIN, inplace=False)
+    if variable_order is None:
+        variable_order = list(problem.variables)
+    num_qubits = len(variable_order)
+    block_qubits = min(block_qubits, num_qubits)
+    prefix_qubits = num_qubits - block_qubits
+    linear, (row, col, quadratic), offset = problem.to_numpy_vectors(variable_order=variable_order)
+    couplings = np.zeros((num_qubits, num_qubits))
+    np.add.at(couplings, (np.minimum(row, col), np.maximum(row, col)), quadratic)
+
+    block_couplings = couplings[prefix_qubits:, prefix_qubits:]
+    block_row, block_col = np.nonzero(block_couplings)
+    block_problem = dimod.BinaryQuadraticModel.from_numpy_vectors(
+        linear[prefix_qubits:], (block_row, block_col, block_couplings[block_row, block_col]), offset, dimod.SPIN)
+    block_diagonal = cost_diagonal(block_problem, list(range(block_qubits)), dtype=out.dtype)
+    block_size = 2 ** block_qubits
+    for prefix in range(2 ** prefix_qubits):
+        spins = 1. - 2. * ((prefix >> np.arange(prefix_qubits - 1, -1, -1)) & 1)
+        prefix_energy = spins @ linear[:prefix_qubits] + spins @ couplings[:prefix_qubits, :prefix_qubits] @ spins
+        block = out[prefix * block_size:(prefix + 1) * block_size]
+        np.add(block_diagonal, prefix_energy, out=block)
+        block += field_diagonal(spins @ couplings[:prefix_qubits, prefix_qubits:], dtype=out.dtype)
+    return out
+
+
+def available_memory() -> int:
+    """Bytes of physical memory available to new allocations (MemAvailable on Linux), 0 if unknown."""
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def bqm_hash(problem: dimod.BinaryQuadraticModel, variable_order: List[Any] = None) -> str:
+    """Hash of the biases of problem in the given variable order; equal problems have equal hashes."""
+    if variable_order is None:
+        variable_order = list(problem.variables)
+    linear, (row, col, quadratic), offset = problem.to_numpy_vectors(variable_order=variable_order)
+    order = np.lexsort((np.maximum(row, col), np.minimum(row, col)))
+    digest = hashlib.sha256(f'{problem.vartype.name} {variable_order!r} {float(offset)!r}'.encode())
+    for array in (linear, np.minimum(row, col)[order], np.maximum(row, col)[order], quadratic[order]):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class DiagonalCache:
+    """
+    LRU cache of cost diagonals keyed by bqm_hash, holding at most max_bytes of diagonals in memory. With a
+    spill_directory, diagonals of spill_qubits or more qubits are written there as .npy (see write_cost_diagonal)
+    and served as read-only memory maps; they do not count towards max_bytes, and later runs on the same instance,
+    also in other processes, reuse the file instead of recomputing it. max_bytes defaults to default_max_bytes().
+    """
+    def __init__(self, max_bytes: int = None, spill_directory: str = None, spill_qubits: int = 24):
+        self.max_bytes = self.default_max_bytes() if max_bytes is None else max_bytes
+        self.spill_directory = spill_directory
+        self.spill_qubits = spill_qubits
+        self._diagonals = OrderedDict()
+        self._bytes = 0
+        if spill_directory is not None:
+            os.makedirs(spill_directory, exist_ok=True)
+
+    @staticmethod
+    def default_max_bytes(workers: int = 1) -> int:
+        """An eighth of the available memory split over workers, the processes holding a cache each, at least 16 MiB."""
+        return max(available_memory() // (8 * workers), 2 ** 24)
+
+    def __len__(self) -> int:
+        return len(self._diagonals)
+
+    def resize(self, max_bytes: int):
+        """Sets max_bytes, evicting least recently used diagonals beyond it."""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self._diagonals.clear()
+        self._bytes = 0
+
+    def diagonal(self, problem: dimod.BinaryQuadraticModel, variable_order: List[Any] = None,
+                 dtype=np.float64) -> np.ndarray:
+        if variable_order is None:
+            variable_order = list(problem.variables)
+        dtype = np.dtype(dtype)
+        key = (bqm_hash(problem, variable_order), dtype.str)
+        diagonal = self._diagonals.get(key)
+        if diagonal is not None:
+            self._diagonals.move_to_end(key)
+            return diagonal
+        if self.spill_directory is not None and len(variable_order) >= self.spill_qubits:
+            diagonal = self._spilled_diagonal(key, problem, variable_order, dtype)
+        else:
+            diagonal = cost_diagonal(problem, variable_order, dtype=dtype)
+            diagonal.setflags(write=False)
+            self._bytes += diagonal.nbytes
+        self._diagonals[key] = diagonal
+        self._evict()
+        return diagonal
+
+    def _spilled_diagonal(self, key, problem: dimod.BinaryQuadraticModel, variable_order: List[Any],
+                          dtype: np.dtype) -> np.ndarray:
+        path = os.path.join(self.spill_directory, f'{key[0]}_{dtype.name}.npy')
+        if not os.path.exists(path):
+            partial_path = path + f'.{os.getpid()}.partial'
+            out = np.lib.format.open_memmap(partial_path, mode='w+', dtype=dtype, shape=(2 ** len(variable_order),))
+            write_cost_diagonal(problem, out, variable_order)
+            out.flush()
+            del out
+            os.replace(partial_path, path)
+        return np.load(path, mmap_mode='r')
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._diagonals) > 1:
+            _, diagonal = self._diagonals.popitem(last=False)
+            if not isinstance(diagonal, np.memmap):
+                self._bytes -= diagonal.nbytes
+
+
+DEFAULT_DIAGONAL_CACHE = DiagonalCache()
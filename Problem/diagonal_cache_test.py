@@ -0,0 +1,65 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Problem.diagonal_cache import DiagonalCache, cost_diagonal, write_cost_diagonal, bqm_hash
+from Problem.spin_glass_deb import spinGlass
+
+
+class TestDiagonalCache(TestCase):
+    def setUp(self) -> None:
+        self.bqm = dimod.generators.uniform(nx.random_regular_graph(3, 10, seed=0), dimod.SPIN, seed=0)
+        self.bqm.add_linear_from({variable: 0.1 * variable for variable in self.bqm.variables})
+        self.bqm.offset = 0.7
+
+    def test_write_cost_diagonal(self):
+        out = np.empty(2 ** 10)
+        write_cost_diagonal(self.bqm, out, block_qubits=4)
+        self.assertTrue(np.allclose(cost_diagonal(self.bqm), out), msg='block wise diagonal differs')
+        samples = 1 - 2 * ((np.arange(2 ** 10)[:, None] >> np.arange(9, -1, -1)) & 1)
+        energies = self.bqm.energies((samples, list(self.bqm.variables)))
+        self.assertTrue(np.allclose(energies, out), msg='diagonal does not match bqm energies')
+
+    def test_hash(self):
+        other = self.bqm.copy()
+        self.assertEqual(bqm_hash(self.bqm), bqm_hash(other))
+        other.add_quadratic(0, 5, 0.25)
+        self.assertNotEqual(bqm_hash(self.bqm), bqm_hash(other), msg='hash ignores couplings')
+
+    def test_lru(self):
+        cache = DiagonalCache(max_bytes=2 * 8 * 2 ** 10)
+        diagonal = cache.diagonal(self.bqm)
+        self.assertIs(diagonal, cache.diagonal(self.bqm.copy()), msg='diagonal was recomputed')
+        for seed in range(1, 4):
+            cache.diagonal(dimod.generators.uniform(nx.random_regular_graph(3, 10, seed=seed), dimod.SPIN))
+        self.assertEqual(2, len(cache), msg='cache exceeds its size limit')
+        self.assertIsNot(diagonal, cache.diagonal(self.bqm), msg='least recently used diagonal was not evicted')
+
+    def test_resize(self):
+        cache = DiagonalCache()
+        self.assertGreaterEqual(cache.max_bytes, 2 ** 24, msg='default budget below its minimum')
+        for seed in range(3):
+            cache.diagonal(dimod.generators.uniform(nx.random_regular_graph(3, 10, seed=seed), dimod.SPIN))
+        cache.resize(8 * 2 ** 10)
+        self.assertEqual(1, len(cache), msg='shrinking the budget did not evict diagonals')
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as directory:
+            diagonal = DiagonalCache(spill_directory=directory, spill_qubits=8).diagonal(self.bqm)
+            self.assertIsInstance(diagonal, np.memmap, msg='large diagonal was not memory mapped')
+            self.assertTrue(np.allclose(cost_diagonal(self.bqm), diagonal))
+            path = os.path.join(directory, os.listdir(directory)[0])
+            modified = os.path.getmtime(path)
+            reloaded = DiagonalCache(spill_directory=directory, spill_qubits=8).diagonal(self.bqm)
+            self.assertEqual(modified, os.path.getmtime(path), msg='spilled diagonal was recomputed')
+            self.assertTrue(np.array_equal(diagonal, reloaded))
+            del diagonal, reloaded
+
+    def test_spin_glass(self):
+        problem = spinGlass(self.bqm)
+        self.assertTrue(np.allclose(cost_diagonal(self.bqm), problem.diagonal()))
+        self.assertEqual(len(list(problem.interactions())), len(self.bqm.linear) + len(self.bqm.quadratic))
@@ -1,5 +1,6 @@
-from typing import Callable, List
+from typing import Callable, List, Sequence, Tuple
 
+import numpy as np
 import dimod
 import networkx as nx
 
@@ -16,3 +17,70 @@ def max_cut(graph: nx.Graph) -> dimod.BinaryQuadraticModel:
     def int_dist(size):
         return [1] * size
     return spin_glass(graph, int_dist)
+
+
+def spin_glass_from_arrays(edges: np.ndarray, couplings: np.ndarray, variable_count: int = None,
+                           linear: np.ndarray = None, variable_order: Sequence = None) -> dimod.BinaryQuadraticModel:
+    """
+    Spin glass on variables 0, ..., variable_count - 1 (or the labels in variable_order) with the couplings of the
+    (E, 2) index array edges, built in one call to dimod's array constructor.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if variable_count is None:
+        variable_count = int(edges.max(initial=-1)) + 1 if variable_order is None else len(variable_order)
+    if linear is None:
+        linear = np.zeros(variable_count)
+    return dimod.BinaryQuadraticModel.from_numpy_vectors(linear, (edges[:, 0], edges[:, 1], couplings), 0.,
+                                                         dimod.SPIN, variable_order=variable_order)
+
+
+def random_regular_edges(degree: int, variable_count: int, rng: np.random.Generator,
+                         max_rounds: int = 1000) -> np.ndarray:
+    """
+    Edges of a random degree-regular simple graph as (E, 2) index array, drawn with the configuration model: all
+    degree * variable_count edge stubs are shuffled and paired. Self-loops and multi-edges are repaired by
+    reshuffling their stubs together with as many randomly chosen valid edges until the graph is simple, so the
+    result is approximately (not exactly) uniformly distributed. Graphs denser than half the complete graph are
+    drawn as complement of a sparse one.
+    """
+    assert (degree * variable_count) % 2 == 0, 'degree * variable_count must be even'
+    assert degree < variable_count, 'degree must be smaller than variable_count'
+    if 2 * degree > variable_count - 1:
+        complement = random_regular_edges(variable_count - 1 - degree, variable_count, rng, max_rounds)
+        adjacency = ~np.eye(variable_count, dtype=bool)
+        adjacency[complement[:, 0], complement[:, 1]] = adjacency[complement[:, 1], complement[:, 0]] = False
+        return np.argwhere(np.triu(adjacency))
+    stubs = rng.permutation(np.repeat(np.arange(variable_count, dtype=np.int64), degree))
+    edges = np.sort(stubs.reshape(-1, 2), axis=1)
+    for _ in range(max_rounds):
+        keys = edges[:, 0] * variable_count + edges[:, 1]
+        _, first_occurrence = np.unique(keys, return_index=True)
+        bad = np.ones(len(edges), dtype=bool)
+        bad[first_occurrence] = False
+        bad |= edges[:, 0] == edges[:, 1]
+        bad_count = np.count_nonzero(bad)
+        if bad_count == 0:
+            return edges
+        good = np.flatnonzero(~bad)
+        redrawn = np.concatenate((np.flatnonzero(bad), rng.choice(good, min(bad_count, len(good)), replace=False)))
+        edges[redrawn] = np.sort(rng.permutation(edges[redrawn].ravel()).reshape(-1, 2), axis=1)
+    raise RuntimeError('could not draw a simple regular graph')
+
+
+def random_regular_spin_glass_arrays(degree: int, variable_count: int, seed=None, low: float = 0.5,
+                                     high: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Edges and couplings of random_regular_spin_glass, e.g. to ship them between processes instead of the BQM."""
+    rng = np.random.default_rng(seed)
+    edges = random_regular_edges(degree, variable_count, rng)
+    return edges, rng.uniform(low, high, len(edges))
+
+
+def random_regular_spin_glass(degree: int, variable_count: int, seed=None, low: float = 0.5,
+                              high: float = 1.0) -> dimod.BinaryQuadraticModel:
+    """
+    Spin glass on a random degree-regular graph with couplings drawn uniformly from [low, high), like
+    dimod.generators.uniform(nx.random_regular_graph(...), dimod.SPIN, low, high) but without networkx. seed may be
+    anything accepted by np.random.default_rng, e.g. one of the children of np.random.SeedSequence(...).spawn(n).
+    """
+    edges, couplings = random_regular_spin_glass_arrays(degree, variable_count, seed, low, high)
+    return spin_glass_from_arrays(edges, couplings, variable_count)
@@ -1,9 +1,11 @@
-from typing import Union, Any, Mapping, Generator, Tuple
+from typing import Union, Any, List, Mapping, Generator, Tuple
 
+import numpy as np
 import networkx as nx
 import dimod
 
-from QAOA.Problem import BaseProblem
+from Problem.problem_abc import BaseProblem
+from Problem.diagonal_cache import DiagonalCache, DEFAULT_DIAGONAL_CACHE
 
 class spinGlass(BaseProblem):
 
@@ -29,7 +31,12 @@ class spinGlass(BaseProblem):
         quadratic = {frozenset(variables): bias for variables, bias in quadratic.items()}
         ints = {**linear, **quadratic}
 
-        generator = (frozenset(variables), bias for variables, bias in ints.items())
+        generator = ((frozenset(variables), bias) for variables, bias in ints.items())
 
         return generator
 
+    def diagonal(self, variable_order: List[Any] = None, dtype=np.float64, cache: DiagonalCache = None) -> np.ndarray:
+        """Energies of all 2^n spin configurations, computed once per BQM and kept in cache."""
+        if cache is None:
+            cache = DEFAULT_DIAGONAL_CACHE
+        return cache.diagonal(self.bqm, variable_order, dtype)
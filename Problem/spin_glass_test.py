@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Problem.spin_glass import random_regular_edges, random_regular_spin_glass, spin_glass_from_arrays
+
+
+class TestSpinGlass(TestCase):
+    def test_random_regular_edges(self):
+        for degree, variable_count in [(3, 10), (4, 100), (5, 6), (9, 10)]:
+            for seed in range(5):
+                edges = random_regular_edges(degree, variable_count, np.random.default_rng(seed))
+                graph = nx.Graph()
+                graph.add_nodes_from(range(variable_count))
+                graph.add_edges_from(edges.tolist())
+                self.assertEqual(len(edges), graph.number_of_edges(), msg='multi-edge drawn')
+                self.assertEqual(0, nx.number_of_selfloops(graph), msg='self-loop drawn')
+                self.assertEqual({degree}, set(dict(graph.degree()).values()), msg='graph is not regular')
+
+    def test_seed(self):
+        seeds = np.random.SeedSequence(7).spawn(2)
+        self.assertEqual(random_regular_spin_glass(3, 20, seeds[0]), random_regular_spin_glass(3, 20, seeds[0]),
+                         msg='same seed gave different instances')
+        self.assertNotEqual(random_regular_spin_glass(3, 20, seeds[0]), random_regular_spin_glass(3, 20, seeds[1]),
+                            msg='different seeds gave the same instance')
+
+    def test_spin_glass_from_arrays(self):
+        edges = np.array([[0, 1], [1, 2], [0, 3]])
+        bqm = spin_glass_from_arrays(edges, np.array([0.5, -1., 2.]), 5)
+        self.assertEqual(bqm.vartype, dimod.SPIN)
+        self.assertEqual(5, len(bqm.variables), msg='isolated variables missing')
+        self.assertEqual(-1., bqm.adj[2][1])
+        self.assertEqual(2., bqm.adj[0][3])
@@ -0,0 +1,240 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Type
+
+import numpy as np
+import dimod
+
+from Router.routing import Routing
+from Router.region import route_on_region
+from Router.GreedyRouter import edge_coloring
+from Router.GreedyRouter.greedy_router import swap_distance_changes
+from Router.Mapper.twoColorMapper import twoColorMapper
+from Devices.quantum_hardware import QPU
+
+
+class BeamState:
+    """
+    One partial solution of the beam search for a color set: log2hard is the position (hardware qubit index) of
+    every logical qubit index, remaining marks the pairs of the color set still waiting for their int gate and
+    steps links back to the (swap edge ids, executed pair ids) of every swap layer leading to this state.
+    """
+    def __init__(self, log2hard: np.ndarray, remaining: np.ndarray, steps: tuple = None):
+        self.log2hard = log2hard
+        self.remaining = remaining
+        self.steps = steps
+        self.distance = 0
+        self.score = 0.
+
+    def step_list(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        step_list, steps = [], self.steps
+        while steps is not None:
+            steps, step = steps
+            step_list.append(step)
+        return step_list[::-1]
+
+
+def pair_distances(qpu: Type[QPU], log2hard: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Number of swaps still needed to make every (logical index) pair adjacent."""
+    return qpu.distance_matrix[log2hard[pairs[:, 0]], log2hard[pairs[:, 1]]] - 1
+
+
+def lookahead_cost(qpu: Type[QPU], log2hard: np.ndarray, lookahead_pairs: List[np.ndarray], decay: float) -> float:
+    return sum(decay ** (k + 1) * pair_distances(qpu, log2hard, pairs).sum() for k, pairs in enumerate(lookahead_pairs))
+
+
+def candidate_swap_layer(qpu: Type[QPU], gains: np.ndarray, rng: np.random.Generator, noise: float) -> np.ndarray:
+    """Edge ids of a set of disjoint swaps with positive gain, picked greedily by gain (perturbed by noise)."""
+    edge_ids = np.flatnonzero(gains > 0)
+    scores = gains[edge_ids] + noise * rng.random(len(edge_ids))
+    busy = np.zeros(len(qpu.qubit_list), dtype=bool)
+    layer = []
+    for edge_id in edge_ids[np.argsort(-scores, kind='stable')]:
+        qb0, qb1 = qpu.edge_array[edge_id]
+        if not busy[qb0] and not busy[qb1]:
+            busy[qb0] = busy[qb1] = True
+            layer.append(edge_id)
+    return np.array(layer, dtype=np.int64)
+
+
+def fallback_swap_layer(qpu: Type[QPU], log2hard: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """A single swap moving the first pair that is not adjacent one step along a shortest path."""
+    hard_qb0, hard_qb1 = log2hard[pairs[np.argmax(pair_distances(qpu, log2hard, pairs) > 0)]]
+    hop = qpu.next_hop_table[hard_qb0, hard_qb1]
+    return np.array([qpu.edge_index[frozenset((qpu.qubit_list[hard_qb0], qpu.qubit_list[hop]))]], dtype=np.int64)
+
+
+def expand(qpu: Type[QPU], state: BeamState, pairs: np.ndarray, lookahead_pairs: List[np.ndarray], decay: float,
+           candidate_count: int, seed: int) -> List[BeamState]:
+    """
+    All children of state, one per distinct candidate swap layer. Without lookahead only children reducing the
+    remaining distance are kept, falling back to the best single swap and finally to a shortest path step of the
+    first pair that is not adjacent yet.
+    """
+    rng = np.random.default_rng(seed)
+    log2hard = state.log2hard
+    primary_gains = swap_distance_changes(qpu, log2hard[pairs[state.remaining]])
+    gains = primary_gains.astype(float)
+    for k, lookahead in enumerate(lookahead_pairs):
+        gains += decay ** (k + 1) * swap_distance_changes(qpu, log2hard[lookahead])
+    layers = [candidate_swap_layer(qpu, gains, rng, noise=0. if index == 0 else 1.)
+              for index in range(candidate_count)]
+    hard2log = np.full(len(qpu.qubit_list), -1, dtype=np.int64)
+    hard2log[log2hard] = np.arange(len(log2hard))
+
+    children, seen = [], set()
+    for layer in layers:
+        if len(layer) > 0 and layer.tobytes() not in seen:
+            seen.add(layer.tobytes())
+            children.append(child_state(qpu, state, hard2log, layer, pairs, lookahead_pairs, decay))
+    if len(lookahead_pairs) == 0:
+        distance = pair_distances(qpu, log2hard, pairs[state.remaining]).sum()
+        children = [child for child in children if child.distance < distance]
+        if len(children) == 0:
+            if primary_gains.max(initial=0) > 0:
+                layer = np.array([np.argmax(primary_gains)], dtype=np.int64)
+            else:
+                layer = fallback_swap_layer(qpu, log2hard, pairs[state.remaining])
+            children = [child_state(qpu, state, hard2log, layer, pairs, lookahead_pairs, decay)]
+    elif len(children) == 0:
+        layer = fallback_swap_layer(qpu, log2hard, pairs[state.remaining])
+        children = [child_state(qpu, state, hard2log, layer, pairs, lookahead_pairs, decay)]
+    return children
+
+
+def child_state(qpu: Type[QPU], state: BeamState, hard2log: np.ndarray, layer: np.ndarray, pairs: np.ndarray,
+                lookahead_pairs: List[np.ndarray], decay: float) -> BeamState:
+    child_hard2log = hard2log.copy()
+    swapped = qpu.edge_array[layer]
+    child_hard2log[swapped[:, 0]], child_hard2log[swapped[:, 1]] = hard2log[swapped[:, 1]], hard2log[swapped[:, 0]]
+    occupied = np.flatnonzero(child_hard2log >= 0)
+    child_log2hard = np.empty_like(state.log2hard)
+    child_log2hard[child_hard2log[occupied]] = occupied
+    distances = pair_distances(qpu, child_log2hard, pairs)
+    executed = np.flatnonzero(state.remaining & (distances == 0))
+    remaining = state.remaining & (distances > 0)
+    child = BeamState(child_log2hard, remaining, (state.steps, (layer, executed)))
+    child.distance = distances[remaining].sum()
+    child.score = child.distance + lookahead_cost(qpu, child_log2hard, lookahead_pairs, decay)
+    return child
+
+
+_worker_qpu = None
+
+
+def _init_worker(qpu: Type[QPU]):
+    global _worker_qpu
+    _worker_qpu = qpu
+
+
+def _worker_expand(log2hard: np.ndarray, remaining: np.ndarray, pairs: np.ndarray,
+                   lookahead_pairs: List[np.ndarray], decay: float, candidate_count: int,
+                   seed: int) -> List[BeamState]:
+    """expand in a worker process; the children link to a detached parent (steps is reattached by expand_all)."""
+    return expand(_worker_qpu, BeamState(log2hard, remaining), pairs, lookahead_pairs, decay, candidate_count, seed)
+
+
+def expand_all(qpu: Type[QPU], beam: List[BeamState], pairs: np.ndarray, lookahead_pairs: List[np.ndarray],
+               decay: float, candidate_count: int, seeds: np.ndarray, executor) -> List[BeamState]:
+    """
+    Children of all beam states, in beam order. With an executor (see beam_router) the states are expanded in
+    worker processes, which only receive log2hard and remaining of every state and the seed drawn for it here, so
+    the result does not depend on the number of workers.
+    """
+    if executor is None:
+        children = [expand(qpu, state, pairs, lookahead_pairs, decay, candidate_count, seed)
+                    for state, seed in zip(beam, seeds)]
+    else:
+        count = len(beam)
+        children = list(executor.map(_worker_expand, [state.log2hard for state in beam],
+                                     [state.remaining for state in beam], [pairs] * count,
+                                     [lookahead_pairs] * count, [decay] * count, [candidate_count] * count,
+                                     seeds.tolist()))
+        for state, state_children in zip(beam, children):
+            for child in state_children:
+                child.steps = (state.steps, child.steps[1])
+    return [child for state_children in children for child in state_children]
+
+
+def beam_search(qpu: Type[QPU], log2hard: np.ndarray, pairs: np.ndarray, lookahead_pairs: List[np.ndarray],
+                beam_width: int, candidate_count: int, decay: float, deadline: float,
+                rng: np.random.Generator, executor=None) -> BeamState:
+    """Swap layers making all pairs adjacent, found by a beam search ranked by remaining and lookahead distance."""
+    remaining = pair_distances(qpu, log2hard, pairs) > 0
+    beam = [BeamState(log2hard, remaining)]
+    max_steps = 4 * len(qpu.qubit_list)
+    for step in range(max_steps):
+        finished = [state for state in beam if not state.remaining.any()]
+        if len(finished) > 0:
+            return min(finished, key=lambda state: state.score)
+        if time.perf_counter() > deadline or step > max_steps // 2:
+            beam, width, candidates, step_decay = beam[:1], 1, 1, 0.
+        else:
+            width, candidates, step_decay = beam_width, candidate_count, decay
+        step_lookahead = lookahead_pairs if step_decay > 0 else []
+        seeds = rng.integers(2 ** 32, size=len(beam))
+        children = expand_all(qpu, beam, pairs, step_lookahead, step_decay, candidates, seeds, executor)
+        beam = sorted(children, key=lambda state: state.score)[:width]
+    raise RuntimeError('beam search did not make all pairs adjacent')
+
+
+def beam_router(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], beam_width: int = 4,
+                lookahead: int = 2, candidate_count: int = 4, decay: float = 0.5, time_budget: float = None,
+                seed: int = None, workers: int = 1, compact: bool = True) -> Routing:
+    """
+    Drop-in alternative to greedy_router. The initial mapping and the first two color sets come from
+    twoColorMapper as in greedy_router; every further color set is routed by a beam search over whole swap
+    layers. Children of a beam state are built from the per-edge distance gains for the current color set plus the
+    next lookahead color sets (weighted by decay^k), and the beam keeps the beam_width states with the smallest
+    remaining distance. With workers > 1 the beam states of a step are expanded in a pool of workers processes;
+    the children are merged in beam order, so the routing only depends on seed. Once time_budget seconds are used
+    up the search continues with a beam width of 1 and no lookahead, i.e. a greedy layer router. On devices larger
+    than the problem the search runs on a compact region unless compact is False (see greedy_router).
+    """
+    if compact and len(qpu.qubit_list) > len(problem_instance.variables):
+        return route_on_region(problem_instance, qpu, beam_router, beam_width=beam_width, lookahead=lookahead,
+                               candidate_count=candidate_count, decay=decay, time_budget=time_budget, seed=seed,
+                               workers=workers)
+    start = time.perf_counter()
+    deadline = np.inf if time_budget is None else start + time_budget
+    rng = np.random.default_rng(seed)
+
+    initial_mapping, int_layers = twoColorMapper(problem_instance, qpu)
+    route = Routing(problem_instance, qpu, initial_mapping=initial_mapping)
+    for int_layer in int_layers:
+        for int_gate in int_layer:
+            route.apply_int(int_gate)
+
+    log_qbs, edges = edge_coloring.graph_edge_array(route.remaining_interactions)
+    colors = edge_coloring.edge_coloring_from_array(edges, len(log_qbs))
+    log_index = route.mapping.log_index
+    to_log_index = np.array([log_index[log_qb] for log_qb in log_qbs], dtype=np.int64).reshape(-1)
+    color_pairs = [to_log_index[edges[colors == color]].reshape(-1, 2) for color in range(colors.max(initial=-1) + 1)]
+    color_pairs = sorted([pairs for pairs in color_pairs if len(pairs) > 0], key=len, reverse=True)
+
+    executor = None
+    if workers is None or workers > 1:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(qpu,))
+    try:
+        for set_index, pairs in enumerate(color_pairs):
+            lookahead_pairs = color_pairs[set_index + 1:set_index + 1 + lookahead]
+            state = beam_search(qpu, route.mapping.log2hard_array.copy(), pairs, lookahead_pairs, beam_width,
+                                candidate_count, decay, deadline, rng, executor)
+            apply_pairs(route, pairs[pair_distances(qpu, route.mapping.log2hard_array, pairs) == 0])
+            for swap_layer, executed in state.step_list():
+                for edge_id in swap_layer:
+                    route.apply_swap(qpu.edge_qubits(edge_id))
+                apply_pairs(route, pairs[executed])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return route
+
+
+def apply_pairs(route: Routing, pairs: np.ndarray):
+    """Int gates for the (logical index) pairs, which must be adjacent under the current mapping."""
+    log_qb_list, hard_qb_list = route.mapping.log_qb_list, route.mapping.hard_qb_list
+    for log_index0, log_index1 in pairs:
+        hard_qb0 = hard_qb_list[route.mapping.log2hard_array[log_index0]]
+        hard_qb1 = hard_qb_list[route.mapping.log2hard_array[log_index1]]
+        route.apply_int(frozenset((hard_qb0, hard_qb1)))
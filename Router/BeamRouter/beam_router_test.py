@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Router.BeamRouter.beam_router import beam_router
+from Devices.quantum_hardware import Grid2dQPU
+
+
+class TestBeamRouter(TestCase):
+    def setUp(self) -> None:
+        self.bqm_arr = [dimod.generators.uniform(nx.random_regular_graph(4, 16), dimod.SPIN, low=0.5, high=1.0) for _ in range(10)]
+        self.qpu = Grid2dQPU(4, 4)
+
+    def test_beam_router(self):
+        for bqm in self.bqm_arr:
+            route = beam_router(bqm, self.qpu, seed=0)
+            self.assertEqual(0, route.remaining_interactions.size(), msg='router did not finish all interactions')
+
+    def test_time_budget(self):
+        for bqm in self.bqm_arr:
+            route = beam_router(bqm, self.qpu, time_budget=0., seed=0)
+            self.assertEqual(0, route.remaining_interactions.size(), msg='router did not finish all interactions')
+
+    def test_seed(self):
+        bqm = dimod.generators.uniform(nx.random_regular_graph(4, 36, seed=0), dimod.SPIN, seed=0)
+        qpu = Grid2dQPU(6, 6)
+        route = beam_router(bqm, qpu, seed=1)
+        repeated_route = beam_router(bqm, qpu, seed=1)
+        self.assertEqual(len(route.layers), len(repeated_route.layers), msg='result not determined by the seed')
+        for layer, repeated_layer in zip(route.layers, repeated_route.layers):
+            self.assertTrue(np.array_equal(layer.swap, repeated_layer.swap), msg='result not determined by the seed')
+
+    def test_workers(self):
+        bqm = dimod.generators.uniform(nx.random_regular_graph(4, 36, seed=0), dimod.SPIN, seed=0)
+        qpu = Grid2dQPU(6, 6)
+        route = beam_router(bqm, qpu, seed=1)
+        parallel_route = beam_router(bqm, qpu, workers=2, seed=1)
+        self.assertEqual(len(route.layers), len(parallel_route.layers), msg='result depends on the number of workers')
+        for layer, parallel_layer in zip(route.layers, parallel_route.layers):
+            self.assertTrue(np.array_equal(layer.swap, parallel_layer.swap) and
+                            np.array_equal(layer.int, parallel_layer.int), msg='result depends on the number of workers')
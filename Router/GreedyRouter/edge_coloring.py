@@ -1,5 +1,11 @@
+from typing import Any, List, Sequence, Set, Tuple
+
+import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+import dimod
+
+from Router.GreedyRouter.misra_gries import misra_gries_edge_coloring
 
 
 def ec_is_valid(graph):
@@ -141,15 +147,57 @@ def color_edge(graph, node1, node2, color_palette):
     #plot_edge_coloring(graph, ex_pos)
     #plt.show()
 
-def find_edge_coloring(graph):
-
-    graph_degree = max([graph.degree(node) for node in graph])
-    color_palette = tuple(range(graph_degree + 1))
-    for edge in graph.edges():
-        color_edge(graph, edge[0], edge[1], color_palette)
+def problem_edge_array(problem: dimod.BinaryQuadraticModel, variable_order: List[Any] = None) -> Tuple[List, np.ndarray]:
+    """
+    Variables of problem and its interactions as (E, 2) array of indices into them, in the order of
+    graph_edge_array(problem.to_networkx_graph()) for the default variable order, so that both color alike.
+    """
+    if variable_order is None:
+        variable_order = list(problem.variables)
+    _, (row, col, _), _ = problem.to_numpy_vectors(variable_order=variable_order)
+    first, second = np.minimum(row, col).astype(np.int64), np.maximum(row, col).astype(np.int64)
+    # networkx lists the edges node by node, every edge at its earlier node in insertion order
+    order = np.lexsort((np.arange(len(first)), first))
+    return list(variable_order), np.column_stack((first[order], second[order]))
+
+
+def graph_edge_array(graph: nx.Graph) -> Tuple[List, np.ndarray]:
+    """Nodes of graph and its edges as (E, 2) array of indices into them, in the order of graph.edges()."""
+    nodes = list(graph.nodes())
+    node_index = {node: index for index, node in enumerate(nodes)}
+    edges = np.array([(node_index[u], node_index[v]) for u, v in graph.edges()], dtype=np.int64).reshape(-1, 2)
+    return nodes, edges
+
+
+def edge_coloring_from_array(edges: np.ndarray, num_nodes: int = None) -> np.ndarray:
+    """
+    Color of every row of the (E, 2) index array edges in an edge coloring with at most max degree + 1 colors.
+    Neither edges nor any graph is modified, so this can run on shared problem data in threads or processes.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if num_nodes is None:
+        num_nodes = int(edges.max(initial=-1)) + 1
+    return misra_gries_edge_coloring(num_nodes, edges)
+
+
+def color_sets_from_array(nodes: Sequence, edges: np.ndarray, colors: np.ndarray) -> List[Set[frozenset]]:
+    """Groups the edges by color into the color_sets returned by find_edge_coloring (max degree + 1 sets)."""
+    degrees = np.bincount(np.asarray(edges, dtype=np.int64).ravel(), minlength=len(nodes))
+    color_sets = [set() for _ in range(int(degrees.max(initial=0)) + 1)]
+    for (index0, index1), color in zip(edges.tolist(), colors.tolist()):
+        color_sets[color].add(frozenset((nodes[index0], nodes[index1])))
+    return color_sets
 
-    color_sets = [set() for _ in range(graph_degree + 1)]
-    for u, v, color in graph.edges.data('color'):
-        color_sets[color].add(frozenset((u,v)))
 
-    return color_sets
\ No newline at end of file
+def find_edge_coloring(graph):
+    """
+    Colors the edges of graph with at most max degree + 1 colors, stored as 'color' edge attribute, and returns the
+    edges of every color as a list of sets of frozensets. The coloring itself is done by the indexed Misra-Gries
+    engine in misra_gries.py; color_edge above is the reference implementation on the networkx graph. Use
+    edge_coloring_from_array to color without modifying a graph.
+    """
+    nodes, edges = graph_edge_array(graph)
+    colors = edge_coloring_from_array(edges, len(nodes))
+    for (index0, index1), color in zip(edges.tolist(), colors.tolist()):
+        graph.edges[nodes[index0], nodes[index1]]['color'] = color
+    return color_sets_from_array(nodes, edges, colors)
@@ -1,15 +1,18 @@
-from typing import Set, Type
+from typing import Set, Type, Dict, List, Any, Iterator
 from functools import lru_cache
 from copy import copy
 
 import networkx as nx
+import numpy as np
 import dimod
 
-from Router.routing import Layer, Routing
+from Router.routing import Routing, StreamedLayer, stream_layers
 from Router.GreedyRouter import edge_coloring
 from Router.mapping import Mapping
 from Devices.quantum_hardware import QPU
 from Router.Mapper.twoColorMapper import twoColorMapper
+from Router.profiling import NullProfiler, NULL_PROFILER
+from Router.region import route_on_region
 
 
 def int_pair_mapper(qpu: Type[QPU], problem_instance: dimod.BinaryQuadraticModel, interaction_pairs):
@@ -34,29 +37,77 @@ def int_pair_mapper(qpu: Type[QPU], problem_instance: dimod.BinaryQuadraticModel
 
 
 def int_pair_distance(routing: Routing, int_pairs: Set[frozenset]) -> int:
-    r = 0
+    if len(int_pairs) == 0:
+        return 0
+    hard_pairs = int_pair_hard_indices(routing, int_pairs)
+    return int((routing.qpu.distance_matrix[hard_pairs[:, 0], hard_pairs[:, 1]] - 1).sum())
+
+
+def int_pair_partners(int_pairs: Set[frozenset]) -> Dict[Any, List]:
+    partners = {}
     for pair in int_pairs:
-        hard_qb0, hard_qb1 = routing.mapping.log2hard[list(pair)[0]], routing.mapping.log2hard[list(pair)[1]]
-        r += len(nx.shortest_path(routing.qpu.graph, hard_qb0, hard_qb1)) - 2
-    return r
+        log_qb0, log_qb1 = list(pair)
+        partners.setdefault(log_qb0, []).append(log_qb1)
+        partners.setdefault(log_qb1, []).append(log_qb0)
+    return partners
+
+
+def int_pair_hard_indices(routing: Routing, int_pairs: Set[frozenset]) -> np.ndarray:
+    log_index = routing.mapping.log_index
+    log_indices = np.array([log_index[log_qb] for pair in int_pairs for log_qb in pair], dtype=np.int64)
+    return routing.mapping.log2hard_array[log_indices].reshape(-1, 2)
+
+
+def swap_distance_change(routing: Routing, partners: Dict[Any, List], swap: frozenset) -> int:
+    """
+    Decrease of the int_pair_distance caused by swap, evaluated without applying it. Only the interaction pairs
+    touching the two swapped qubits are visited, partners being the output of int_pair_partners.
+    """
+    hard_qb0, hard_qb1 = list(swap)
+    change = 0
+    for hard_qb, other_hard_qb in ((hard_qb0, hard_qb1), (hard_qb1, hard_qb0)):
+        for partner in partners.get(routing.mapping.hard2log[hard_qb], ()):
+            partner_hard_qb = routing.mapping.log2hard[partner]
+            if partner_hard_qb != other_hard_qb:
+                change += routing.qpu.distance(hard_qb, partner_hard_qb) - routing.qpu.distance(other_hard_qb, partner_hard_qb)
+    return change
+
+
+def swap_distance_changes(qpu: Type[QPU], hard_pairs: np.ndarray) -> np.ndarray:
+    """
+    Vectorized swap_distance_change for every hardware edge at once. hard_pairs is the (P, 2) array of qubit
+    indices currently holding the interaction pairs (see int_pair_hard_indices). Returns one value per edge id.
+    """
+    indptr, neighbors, edge_ids = qpu.incidence
+    distances = qpu.distance_matrix
+    hard_qbs = np.concatenate((hard_pairs[:, 0], hard_pairs[:, 1]))
+    partner_qbs = np.concatenate((hard_pairs[:, 1], hard_pairs[:, 0]))
+    degrees = indptr[hard_qbs + 1] - indptr[hard_qbs]
+    offsets = np.arange(degrees.sum()) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+    incident = np.repeat(indptr[hard_qbs], degrees) + offsets
+    hard_qbs, partner_qbs = np.repeat(hard_qbs, degrees), np.repeat(partner_qbs, degrees)
+    targets = neighbors[incident]
+    change = np.where(targets != partner_qbs,
+                      distances[hard_qbs, partner_qbs] - distances[targets, partner_qbs], 0)
+    return np.bincount(edge_ids[incident], weights=change, minlength=len(qpu.edge_array)).astype(np.int64)
 
 
 def int_pair_distance_change(routing: Routing, int_pairs: Set[frozenset], swap: frozenset) -> int:
-    dist_before = int_pair_distance(routing, int_pairs)
-    routing.apply_swap(swap)
-    dist_after = int_pair_distance(routing, int_pairs)
-    routing.apply_swap(swap)
-    return dist_before - dist_after
+    return swap_distance_change(routing, int_pair_partners(int_pairs), swap)
 
 
 def execute_all_possible_int_gates(routing: Routing, int_pairs: Set[frozenset]) -> bool:
+    """
+    Applies the int gates of all pairs of int_pairs that sit on a hardware edge applicable in the last layer. The
+    candidates come from routing.executable_edges, so only edges holding a remaining interaction are looked at.
+    """
     int_graph = nx.Graph()
     gate_executed = False
-    for int_pair in int_pairs:
-        hard_qb0 = routing.mapping.log2hard[list(int_pair)[0]]
-        hard_qb1 = routing.mapping.log2hard[list(int_pair)[1]]
-        if routing.qpu.graph.has_edge(hard_qb0, hard_qb1):
-            if routing.layers[-1].int_gate_applicable(frozenset((hard_qb0, hard_qb1))):
+    hard2log = routing.mapping.hard2log
+    for edge_id in sorted(routing.executable_edges):
+        hard_qb0, hard_qb1 = routing.qpu.edge_qubits(edge_id)
+        if frozenset((hard2log[hard_qb0], hard2log[hard_qb1])) in int_pairs:
+            if routing.layers[-1].edge_applicable(edge_id):
                 int_graph.add_edge(hard_qb1, hard_qb0)
                 gate_executed = True
     matching = nx.maximal_matching(int_graph)
@@ -72,19 +123,36 @@ def execute_all_possible_int_gates(routing: Routing, int_pairs: Set[frozenset])
 
 def decrease_int_pair_distance(routing: Routing, int_pairs: Set[frozenset]) -> bool:
     gate_executed = False
-    for _ in range(routing.qpu.graph.size()):
+    qpu = routing.qpu
+    partners = int_pair_partners(int_pairs)
+    evaluated_count = 0
+    for _ in range(qpu.graph.size()):
         no_swap_gate_executed = True
         swap1_gate = None
-        for hard_qb0, hard_qb1 in routing.qpu.graph.edges():
-            swap_gate = frozenset((hard_qb0, hard_qb1))
-            if routing.layers[-1].swap_gate_applicable(swap_gate):
-                diff = int_pair_distance_change(routing, int_pairs, swap_gate)
-                if diff == 2:
-                    routing.apply_swap(swap_gate)
-                    gate_executed = True
-                    no_swap_gate_executed = False
-                elif diff == 1:
-                    swap1_gate = swap_gate
+        changes = swap_distance_changes(qpu, int_pair_hard_indices(routing, int_pairs))
+        # qubit indices whose incident edges are no longer described by changes
+        stale_qbs = set()
+        candidate_edge_ids = np.flatnonzero(routing.layers[-1].applicable_edges())
+        evaluated_count += len(candidate_edge_ids)
+        for edge_id in candidate_edge_ids:
+            qb0, qb1 = qpu.edge_array[edge_id]
+            if qb0 in stale_qbs or qb1 in stale_qbs:
+                if not routing.layers[-1].edge_applicable(edge_id):
+                    continue
+                diff = swap_distance_change(routing, partners, qpu.edge_qubits(edge_id))
+            else:
+                diff = changes[edge_id]
+            if diff >= 2:
+                swap_gate = qpu.edge_qubits(edge_id)
+                routing.apply_swap(swap_gate)
+                gate_executed = True
+                no_swap_gate_executed = False
+                stale_qbs.update((qb0, qb1))
+                for hard_qb in swap_gate:
+                    for partner in partners.get(routing.mapping.hard2log[hard_qb], ()):
+                        stale_qbs.add(qpu.qubit_index[routing.mapping.log2hard[partner]])
+            elif diff == 1:
+                swap1_gate = qpu.edge_qubits(edge_id)
         if no_swap_gate_executed:
             if swap1_gate is not None:
                 routing.apply_swap(swap1_gate)
@@ -92,6 +160,7 @@ def decrease_int_pair_distance(routing: Routing, int_pairs: Set[frozenset]) -> b
                 continue
             else:
                 break
+    routing.profiler.count('swaps_evaluated', evaluated_count)
     return gate_executed
 
 
@@ -103,26 +172,40 @@ def fallback_routine(routing: Routing, int_pairs: Set[frozenset]) -> None:
     det_pair = deterministic_pair(frozenset(int_pairs))
     hard_qb0 = routing.mapping.log2hard[list(det_pair)[0]]
     hard_qb1 = routing.mapping.log2hard[list(det_pair)[1]]
-    shortest_path = nx.shortest_path(routing.qpu.graph, hard_qb0, hard_qb1)
-    routing.apply_swap(frozenset(shortest_path[:2]))
+    routing.apply_swap(frozenset((hard_qb0, routing.qpu.next_hop(hard_qb0, hard_qb1))))
 
 
-def greedy_pair_mapper(routing: Routing, int_pairs: Set[frozenset]) -> None:
+def greedy_pair_mapper_steps(routing: Routing, int_pairs: Set[frozenset]) -> Iterator[Routing]:
+    """greedy_pair_mapper yielding routing after every layer it finishes."""
     for i in range(len(routing.problem.variables)):
         #print(i)
-        gate_executed = execute_all_possible_int_gates(routing, int_pairs)
+        with routing.profiler.phase('execute_all_possible_int_gates'):
+            gate_executed = execute_all_possible_int_gates(routing, int_pairs)
         if len(int_pairs) > 0:
             if int_pair_distance(routing, int_pairs) > 0:
-                gate_executed = gate_executed or decrease_int_pair_distance(routing, int_pairs)
                 if not gate_executed:
-                    #print('fallback')
-                    fallback_routine(routing, int_pairs)
-            routing.layers.append(Layer(routing.qpu))
+                    with routing.profiler.phase('decrease_int_pair_distance'):
+                        gate_executed = decrease_int_pair_distance(routing, int_pairs)
+                if not gate_executed:
+                    with routing.profiler.phase('fallback_routine'):
+                        fallback_routine(routing, int_pairs)
+            routing.open_layer()
+            yield routing
         else:
             break
 
 
-def greedy_router(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU]):
+def greedy_pair_mapper(routing: Routing, int_pairs: Set[frozenset]) -> None:
+    for _ in greedy_pair_mapper_steps(routing, int_pairs):
+        pass
+
+
+def greedy_router_steps(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU],
+                        profiler: NullProfiler = None, initial_mapping: Mapping = None,
+                        int_layers: List[List[frozenset]] = None) -> Iterator[Routing]:
+    """The greedy router as generator, yielding the routing in progress after every step."""
+    if profiler is None:
+        profiler = NULL_PROFILER
 
     #find edge coloring for problem graph
     #color_sets = edge_coloring.find_edge_coloring(problem_instance.to_networkx_graph())
@@ -130,24 +213,62 @@ def greedy_router(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU]):
 
     # find initial mapping and execute interaction gates
     #initial_mapping, int_layer = int_pair_mapper(qpu, problem_instance, color_sets[0])
-    initial_mapping, int_layers = twoColorMapper(problem_instance, qpu)
+    if initial_mapping is None:
+        with profiler.phase('mapper'):
+            initial_mapping, int_layers = twoColorMapper(problem_instance, qpu)
+    elif int_layers is None:
+        int_layers = []
     route = Routing(problem_instance, qpu, initial_mapping=initial_mapping)
+    route.profiler = profiler
     int_count = 0
     for int_layer in int_layers:
         for int_gate in int_layer:
             int_count += 1
             route.apply_int(int_gate)
-    print(int_count)
+    profiler.record('mapper_int_gates', int_count)
+    yield route
 
     # find valid edge coloring
     #route = Routing(problem_instance, qpu)
-    color_sets = edge_coloring.find_edge_coloring(route.remaining_interactions)
-    color_sets = sorted(color_sets, key=lambda color_set: len(color_set), reverse=True)
+    with profiler.phase('edge_coloring'):
+        log_qbs, edges = edge_coloring.graph_edge_array(route.remaining_interactions)
+        colors = edge_coloring.edge_coloring_from_array(edges, len(log_qbs))
+        color_sets = edge_coloring.color_sets_from_array(log_qbs, edges, colors)
+        color_sets = sorted(color_sets, key=lambda color_set: len(color_set), reverse=True)
 
     #finish remaining layers of color sets
     for color_set in color_sets:
-        greedy_pair_mapper(route, color_set)
+        yield from greedy_pair_mapper_steps(route, color_set)
+    # the last steps may have placed all of their gates in earlier layers
+    while len(route.layers) > 1 and route.layers[-1].is_empty():
+        route.layers.pop()
+        profiler.count('layers_dropped')
+
 
+def greedy_router(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], profiler: NullProfiler = None,
+                  initial_mapping: Mapping = None, int_layers: List[List[frozenset]] = None, compact: bool = True):
+    """
+    Routes problem_instance on qpu. Pass a profiling.RouterProfiler as profiler to collect timings and counts of
+    the router phases. initial_mapping replaces the twoColorMapper mapping, optionally with int_layers of gates to
+    execute on it first (e.g. from Mapper.mapping_search).
+    If qpu has more qubits than the problem has variables, the problem is routed on a compact region of qpu (see
+    region.route_on_region) unless an initial_mapping is given or compact is False; otherwise the spare qubits are
+    empty sites of a partial mapping.
+    """
+    if compact and initial_mapping is None and len(qpu.qubit_list) > len(problem_instance.variables):
+        return route_on_region(problem_instance, qpu, greedy_router, profiler=profiler)
+    with (NULL_PROFILER if profiler is None else profiler).phase('greedy_router'):
+        for route in greedy_router_steps(problem_instance, qpu, profiler, initial_mapping, int_layers):
+            pass
     return route
 
 
+def greedy_router_stream(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], window: int = 8,
+                         profiler: NullProfiler = None) -> Iterator[StreamedLayer]:
+    """
+    Routes like greedy_router, but yields every layer as a StreamedLayer as soon as no later gate can be placed
+    in it, so that circuit construction or simulation can run alongside the routing. Only the open layers at the
+    end of the routing are held in memory, at most window of them. window=None streams exactly the layers of
+    greedy_router, but most of them only once routing is done (see stream_layers).
+    """
+    return stream_layers(greedy_router_steps(problem_instance, qpu, profiler), window)
@@ -4,6 +4,7 @@ import copy as cp
 import networkx as nx
 import cirq
 import dimod
+import numpy as np
 
 from Router.routing import Routing
 from Router.mapping import Mapping
@@ -53,6 +54,22 @@ class TestGreedyRouter(TestCase):
         int_pairs.add(frozenset((log_qb0, log_qb1)))
         self.assertEqual(2, int_pair_distance_change(route, int_pairs, swap), msg='swap distance change is incorrect')
 
+    def test_swap_distance_changes(self):
+        for bqm in self.bqm_arr:
+            color_sets = find_edge_coloring(bqm.to_networkx_graph())
+            route = Routing(bqm, self.qpu)
+            changes = swap_distance_changes(self.qpu, int_pair_hard_indices(route, color_sets[0]))
+            for edge_id in range(len(self.qpu.edge_array)):
+                swap = self.qpu.edge_qubits(edge_id)
+                dist_before = int_pair_distance(route, color_sets[0])
+                self.assertEqual(changes[edge_id], int_pair_distance_change(route, color_sets[0], swap),
+                                 msg='vectorized swap distance change does not match single swap evaluation')
+                route.mapping.swap(swap)
+                self.assertEqual(dist_before - int_pair_distance(route, color_sets[0]), changes[edge_id],
+                                 msg='swap distance change does not match the distance after applying the swap')
+                route.mapping.swap(swap)
+            self.assertEqual(1, len(route.layers), msg='scoring swaps modified the layers of the routing')
+
     def test_execute_all_possible_int_gates(self):
         qpu = Grid2dQPU(2, 2)
         linear = {0: 0.0, 1: 0.0, 2: 0.0, 3: 0.0}
@@ -108,3 +125,47 @@ class TestGreedyRouter(TestCase):
             self.assertEqual(0, route.remaining_interactions.size(), msg='router did not finish all interactions')
 
 
+
+    def test_greedy_router_stream(self):
+        for bqm in self.bqm_arr:
+            route = greedy_router(bqm, self.qpu)
+            streamed_layers = list(greedy_router_stream(bqm, self.qpu, window=None))
+            self.assertEqual(len(route.layers), len(streamed_layers), msg='stream has a different number of layers')
+            mapping = route.initial_mapping.copy()
+            for index, (layer, streamed_layer) in enumerate(zip(route.layers, streamed_layers)):
+                self.assertEqual(index, streamed_layer.index, msg='layers streamed out of order')
+                self.assertTrue(np.array_equal(layer.int, streamed_layer.layer.int) and
+                                np.array_equal(layer.swap, streamed_layer.layer.swap),
+                                msg='streamed layer differs from routed layer')
+                self.assertTrue(np.array_equal(mapping.hard2log_array, streamed_layer.mapping.hard2log_array),
+                                msg='wrong mapping in front of streamed layer')
+                mapping.update(layer)
+                for hard_qb, log_qb in streamed_layer.mapping_delta.items():
+                    self.assertEqual(mapping.hard2log[hard_qb], log_qb, msg='wrong mapping delta')
+
+    def test_greedy_router_stream_default_window(self):
+        qpu = Grid2dQPU(8, 8)
+        bqm = dimod.generators.uniform(nx.random_regular_graph(3, 64, seed=0), dimod.SPIN, seed=0)
+        routing_done = [False]
+
+        def observed_steps():
+            yield from greedy_router_steps(bqm, qpu)
+            routing_done[0] = True
+        early_count = sum(not routing_done[0] for _ in stream_layers(observed_steps()))
+        self.assertGreaterEqual(2 * early_count, len(greedy_router(bqm, qpu).layers),
+                                msg='default stream yields less than half of the layers before routing is done')
+
+    def test_greedy_router_stream_window(self):
+        for bqm in self.bqm_arr:
+            steps = greedy_router_steps(bqm, self.qpu)
+            open_layer_counts = []
+
+            def observed_steps():
+                for route in steps:
+                    yield route
+                    open_layer_counts.append(len(route.layers))
+            streamed_layers = list(stream_layers(observed_steps(), window=3))
+            self.assertTrue(max(open_layer_counts) <= 3 + 1, msg='more layers open than the window allows')
+            route = Routing.from_layers(bqm, self.qpu, streamed_layers[0].mapping,
+                                        [streamed_layer.layer for streamed_layer in streamed_layers])
+            self.assertEqual(0, route.remaining_interactions.size(), msg='windowed stream did not finish all interactions')
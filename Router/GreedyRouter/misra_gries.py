@@ -0,0 +1,96 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+def lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+class MisraGriesColoring:
+    """
+    Misra-Gries edge coloring with at most max_degree + 1 colors on nodes 0, ..., num_nodes - 1.
+    Every node keeps a color -> neighbor table (nbr), a neighbor -> color dict (color_at) and a bitmask of its
+    free colors, so that 'which neighbor has color c', 'which color has edge (u, v)' and 'is c free on u' are O(1)
+    and a cd-path is found and inverted in O(path length).
+    """
+    def __init__(self, num_nodes: int, max_degree: int):
+        self.color_count = max_degree + 1
+        self.nbr = [[-1] * self.color_count for _ in range(num_nodes)]
+        self.color_at = [{} for _ in range(num_nodes)]
+        self.free = [(1 << self.color_count) - 1] * num_nodes
+
+    def set_color(self, node0: int, node1: int, color: int):
+        self.nbr[node0][color], self.nbr[node1][color] = node1, node0
+        self.color_at[node0][node1] = self.color_at[node1][node0] = color
+        self.free[node0] &= ~(1 << color)
+        self.free[node1] &= ~(1 << color)
+
+    def clear_color(self, node0: int, node1: int, color: int):
+        self.nbr[node0][color] = self.nbr[node1][color] = -1
+        del self.color_at[node0][node1], self.color_at[node1][node0]
+        self.free[node0] |= 1 << color
+        self.free[node1] |= 1 << color
+
+    def maximal_fan(self, node: int, first_nbr: int):
+        """
+        Fan of node starting at first_nbr, extended by the neighbor behind the lowest usable color. Every neighbor
+        of node sits behind exactly one color, so clearing that color from the usable ones keeps the fan simple
+        without a membership test.
+        """
+        fan = [first_nbr]
+        usable = ~self.free[node]
+        candidates = self.free[first_nbr] & usable
+        while candidates:
+            color = lowest_bit(candidates)
+            fan.append(self.nbr[node][color])
+            usable &= ~(1 << color)
+            candidates = self.free[fan[-1]] & usable
+        return fan
+
+    def invert_cdpath(self, node: int, c: int, d: int):
+        """Swaps colors c and d on the maximal path starting at node with an edge of color c."""
+        path = []
+        current_node, current_color, other_color = node, c, d
+        while self.nbr[current_node][current_color] != -1:
+            next_node = self.nbr[current_node][current_color]
+            path.append((current_node, next_node, current_color, other_color))
+            current_node, current_color, other_color = next_node, other_color, current_color
+        for node0, node1, color, _ in path:
+            self.clear_color(node0, node1, color)
+        for node0, node1, _, new_color in path:
+            self.set_color(node0, node1, new_color)
+
+    def color_edge(self, node0: int, node1: int):
+        fan = self.maximal_fan(node0, node1)
+        c_color = lowest_bit(self.free[node0])
+        d_color = lowest_bit(self.free[fan[-1]])
+        self.invert_cdpath(node0, d_color, c_color)
+
+        d_bit = 1 << d_color
+        for end, fan_node in enumerate(fan):
+            if self.free[fan_node] & d_bit:
+                break
+        fan = fan[:end + 1]
+
+        for fan_node, next_fan_node in zip(fan[:-1], fan[1:]):
+            color = self.color_at[node0][next_fan_node]
+            self.clear_color(node0, next_fan_node, color)
+            self.set_color(node0, fan_node, color)
+        self.set_color(node0, fan[-1], d_color)
+
+    def color(self, node0: int, node1: int) -> int:
+        return self.color_at[node0][node1]
+
+
+def misra_gries_edge_coloring(num_nodes: int, edges: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """
+    Colors of the edges (pairs of node indices in range(num_nodes)) of a simple graph in an edge coloring with at
+    most max degree + 1 colors.
+    """
+    edges = [(int(node0), int(node1)) for node0, node1 in edges]
+    degrees = np.bincount(np.asarray(edges, dtype=np.int64).ravel(), minlength=num_nodes)
+    coloring = MisraGriesColoring(num_nodes, int(degrees.max(initial=0)))
+    for node0, node1 in edges:
+        coloring.color_edge(node0, node1)
+    return np.array([coloring.color(node0, node1) for node0, node1 in edges], dtype=np.int64)
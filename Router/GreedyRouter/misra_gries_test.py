@@ -0,0 +1,66 @@
+import time
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Router.GreedyRouter.misra_gries import misra_gries_edge_coloring
+from Router.GreedyRouter.edge_coloring import find_edge_coloring, ec_is_valid, ec_is_complete, problem_edge_array, \
+    edge_coloring_from_array, color_sets_from_array
+
+
+def is_proper(num_nodes, edges, colors):
+    seen = set()
+    for (node0, node1), color in zip(edges, colors):
+        if (node0, color) in seen or (node1, color) in seen:
+            return False
+        seen.add((node0, color))
+        seen.add((node1, color))
+    return True
+
+
+class TestMisraGries(TestCase):
+    def test_proper_coloring(self):
+        for seed in range(20):
+            graph = nx.gnm_random_graph(30, 120, seed=seed)
+            edges = list(graph.edges())
+            colors = misra_gries_edge_coloring(30, edges)
+            max_degree = max(degree for _, degree in graph.degree())
+            self.assertTrue(is_proper(30, edges, colors), msg='two edges of one node share a color')
+            self.assertLessEqual(colors.max(), max_degree, msg='more than max degree + 1 colors used')
+
+    def test_find_edge_coloring(self):
+        for degree in [3, 4, 5]:
+            graph = nx.random_regular_graph(degree, 16, seed=degree)
+            color_sets = find_edge_coloring(graph)
+            self.assertEqual(len(color_sets), degree + 1, msg='wrong number of color sets')
+            self.assertEqual(sum(len(color_set) for color_set in color_sets), graph.number_of_edges(),
+                             msg='not every edge is in exactly one color set')
+            self.assertTrue(ec_is_valid(graph) and ec_is_complete(graph), msg='color attributes invalid')
+
+    def test_large_graph(self):
+        for graph in [nx.random_regular_graph(10, 2000, seed=0), nx.gnm_random_graph(300, 10000, seed=0)]:
+            num_nodes, edges = graph.number_of_nodes(), list(graph.edges())
+            start = time.perf_counter()
+            colors = misra_gries_edge_coloring(num_nodes, edges)
+            self.assertLess(time.perf_counter() - start, 1, msg='coloring 10k edges is too slow')
+            self.assertTrue(is_proper(num_nodes, edges, colors), msg='two edges of one node share a color')
+            max_degree = max(degree for _, degree in graph.degree())
+            self.assertLessEqual(int(np.max(colors)), max_degree, msg='more than max degree + 1 colors used')
+
+    def test_edge_coloring_from_array(self):
+        bqms = [dimod.generators.uniform(nx.random_regular_graph(4, 20, seed=seed), dimod.SPIN, seed=seed)
+                for seed in range(8)]
+        edge_arrays = [problem_edge_array(bqm) for bqm in bqms]
+        copies = [edges.copy() for _, edges in edge_arrays]
+        with ThreadPoolExecutor(4) as executor:
+            all_colors = list(executor.map(lambda item: edge_coloring_from_array(item[1], len(item[0])), edge_arrays))
+        for (log_qbs, edges), edges_copy, colors in zip(edge_arrays, copies, all_colors):
+            self.assertTrue(np.array_equal(edges, edges_copy), msg='edge array was modified')
+            self.assertTrue(is_proper(len(log_qbs), edges.tolist(), colors), msg='two edges of one node share a color')
+            color_sets = color_sets_from_array(log_qbs, edges, colors)
+            self.assertEqual(len(color_sets), 5, msg='wrong number of color sets')
+            self.assertEqual(sum(len(color_set) for color_set in color_sets), len(edges),
+                             msg='not every edge is in exactly one color set')
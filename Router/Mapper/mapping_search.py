@@ -0,0 +1,249 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Tuple, Type
+
+import numpy as np
+import dimod
+
+from Devices.quantum_hardware import QPU
+from Router.mapping import Mapping
+from Router.routing import Layer, Routing
+from Router.region import route_on_region
+from Router.GreedyRouter.edge_coloring import problem_edge_array, edge_coloring_from_array
+from Router.GreedyRouter.greedy_router import greedy_router
+from Router.Mapper.twoColorMapper import decompose_into_chains, chain_mapping
+
+
+COLOR_PAIRS = [(0, 1), (0, 2), (1, 2)]
+
+
+class MappingCandidate:
+    """
+    Initial mapping given as log2hard array (hardware index of every logical index, indexed like Mapping), the int
+    layers to execute on it before routing and its distance_sum score. label tells where it comes from.
+    """
+    def __init__(self, log2hard: np.ndarray, int_layers: List[List[frozenset]], label: str):
+        self.log2hard = log2hard
+        self.int_layers = int_layers
+        self.label = label
+        self.score = 0
+
+
+def interaction_pairs(problem_instance: dimod.BinaryQuadraticModel) -> np.ndarray:
+    """(m, 2) array of the logical indices (order of problem_instance.variables) of every interaction."""
+    log_index = {log_qb: index for index, log_qb in enumerate(problem_instance.variables)}
+    return np.array([(log_index[log_qb0], log_index[log_qb1]) for log_qb0, log_qb1 in problem_instance.quadratic],
+                    dtype=np.int64).reshape(-1, 2)
+
+
+def distance_sum(qpu: Type[QPU], log2hard: np.ndarray, pairs: np.ndarray) -> int:
+    """Total number of swaps the interactions are away from being adjacent, the proxy for the routed depth."""
+    return int((qpu.distance_matrix[log2hard[pairs[:, 0]], log2hard[pairs[:, 1]]] - 1).sum())
+
+
+def adjacent_int_layers(qpu: Type[QPU], mapping: Mapping, pairs: np.ndarray) -> List[List[frozenset]]:
+    """Two int layers of disjoint gates, filled first fit with the interactions that are adjacent under mapping."""
+    log2hard = mapping.log2hard_array
+    adjacent = pairs[qpu.distance_matrix[log2hard[pairs[:, 0]], log2hard[pairs[:, 1]]] == 1]
+    int_layers, busy = [[], []], np.zeros((2, len(log2hard)), dtype=bool)
+    for log_index0, log_index1 in adjacent.tolist():
+        for layer_index in range(2):
+            if not busy[layer_index, log_index0] and not busy[layer_index, log_index1]:
+                busy[layer_index, log_index0] = busy[layer_index, log_index1] = True
+                int_layers[layer_index].append(frozenset((mapping.hard_qb_list[log2hard[log_index0]],
+                                                          mapping.hard_qb_list[log2hard[log_index1]])))
+                break
+    return int_layers
+
+
+def candidate_embedding(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], log2hard: np.ndarray) -> Dict:
+    """
+    log2hard as dict from hardware to logical qubits. Unlike the arrays, it stays valid after pickling the problem
+    for another process, which may reorder its variables.
+    """
+    log_qb_list = list(problem_instance.variables)
+    return {qpu.qubit_list[hard_index]: log_qb_list[log_index] for log_index, hard_index in enumerate(log2hard.tolist())}
+
+
+def candidate_mapping(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], log2hard: np.ndarray) -> Mapping:
+    return Mapping(qpu, problem_instance, candidate_embedding(problem_instance, qpu, log2hard))
+
+
+def anneal(qpu: Type[QPU], log2hard: np.ndarray, pairs: np.ndarray, steps: int, rng: np.random.Generator,
+           deadline: float = np.inf, start_temperature: float = 2., end_temperature: float = 0.05) -> np.ndarray:
+    """
+    Simulated annealing of distance_sum over the swaps of the logical qubits on the two ends of a random hardware
+    edge (one of them may be an empty site), with geometric cooling. A move only rescores the interactions of the
+    two moved qubits.
+    """
+    distances = qpu.distance_matrix
+    log2hard = log2hard.copy()
+    hard2log = np.full(len(qpu.qubit_list), -1, dtype=np.int64)
+    hard2log[log2hard] = np.arange(len(log2hard))
+    order = np.argsort(np.concatenate((pairs[:, 0], pairs[:, 1])), kind='stable')
+    partners = np.concatenate((pairs[:, 1], pairs[:, 0]))[order]
+    indptr = np.zeros(len(log2hard) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs.reshape(-1), minlength=len(log2hard)), out=indptr[1:])
+    edges = qpu.edge_array[rng.integers(len(qpu.edge_array), size=steps)]
+    no_partners = np.zeros(0, dtype=np.int64)
+    thresholds = np.log(rng.random(steps)) * start_temperature * (
+        end_temperature / start_temperature) ** (np.arange(steps) / max(steps - 1, 1))
+    for step in range(steps):
+        if step % 256 == 0 and time.perf_counter() > deadline:
+            break
+        hard_index0, hard_index1 = edges[step]
+        log_index0, log_index1 = hard2log[hard_index0], hard2log[hard_index1]
+        if log_index0 < 0 and log_index1 < 0:
+            continue
+        partners0 = log2hard[partners[indptr[log_index0]:indptr[log_index0 + 1]]] if log_index0 >= 0 else no_partners
+        partners1 = log2hard[partners[indptr[log_index1]:indptr[log_index1 + 1]]] if log_index1 >= 0 else no_partners
+        partners0 = partners0[partners0 != hard_index1]
+        partners1 = partners1[partners1 != hard_index0]
+        change = (distances[hard_index1, partners0].sum() - distances[hard_index0, partners0].sum()
+                  + distances[hard_index0, partners1].sum() - distances[hard_index1, partners1].sum())
+        if -change >= thresholds[step]:
+            hard2log[hard_index0], hard2log[hard_index1] = log_index1, log_index0
+            if log_index0 >= 0:
+                log2hard[log_index0] = hard_index1
+            if log_index1 >= 0:
+                log2hard[log_index1] = hard_index0
+    return log2hard
+
+
+def generate_candidates(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], candidate_count: int,
+                        rng: np.random.Generator, deadline: float = np.inf) -> List[MappingCandidate]:
+    """
+    The twoColorMapper mapping followed by variations of it: other pairs of color sets, shuffled and reversed
+    chain orders, and every fourth candidate a random permutation. Stops early (after the first) at deadline.
+    """
+    log_qbs, edges = problem_edge_array(problem_instance)
+    coloring = (log_qbs, edges, edge_coloring_from_array(edges, len(log_qbs)))
+    pairs = interaction_pairs(problem_instance)
+    candidates = []
+    for index in range(candidate_count):
+        if index > 0 and time.perf_counter() > deadline:
+            break
+        if index % 4 == 3:
+            log2hard = rng.permutation(len(qpu.qubit_list))[:len(problem_instance.variables)]
+            mapping = candidate_mapping(problem_instance, qpu, log2hard)
+            candidates.append(MappingCandidate(log2hard, adjacent_int_layers(qpu, mapping, pairs), 'random'))
+            continue
+        color_pair = COLOR_PAIRS[index % len(COLOR_PAIRS)]
+        chains, loops = decompose_into_chains(problem_instance, color_pair, coloring)
+        label = f'two_color{color_pair}'
+        if index >= len(COLOR_PAIRS):
+            chains = [chains[k][::rng.choice((1, -1))] for k in rng.permutation(len(chains))]
+            loops = [loops[k] for k in rng.permutation(len(loops))]
+            label += ' shuffled'
+        mapping, int_layers = chain_mapping(problem_instance, qpu, chains, loops)
+        candidates.append(MappingCandidate(mapping.log2hard_array, int_layers, label))
+    return candidates
+
+
+def route_embedding(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], embedding: Dict,
+                    int_layers: List[List[frozenset]]) -> Routing:
+    return greedy_router(problem_instance, qpu, initial_mapping=Mapping(qpu, problem_instance, embedding),
+                         int_layers=int_layers)
+
+
+def embedding_layers(problem_vectors: Tuple, qpu: Type[QPU], embedding: Dict,
+                     int_layers: List[List[frozenset]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    int and swap masks (layers x hardware edges) of route_embedding, cheap to send back from a worker process.
+    The problem is passed as (variables, vectors, vartype) of to_numpy_vectors, since a pickled BQM does not keep
+    its variable order, which the routing depends on.
+    """
+    variables, (linear, quadratic, offset), vartype = problem_vectors
+    problem_instance = dimod.BinaryQuadraticModel.from_numpy_vectors(linear, quadratic, offset, vartype,
+                                                                     variable_order=variables)
+    layers = route_embedding(problem_instance, qpu, embedding, int_layers).layers
+    return np.array([layer.int for layer in layers]), np.array([layer.swap for layer in layers])
+
+
+def route_candidate(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU],
+                    candidate: MappingCandidate) -> Routing:
+    return route_embedding(problem_instance, qpu, candidate_embedding(problem_instance, qpu, candidate.log2hard),
+                           candidate.int_layers)
+
+
+def mapping_search(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], candidate_count: int = 16,
+                   top_k: int = 4, anneal_steps: int = None, time_budget: float = None, workers: int = 1,
+                   seed: int = None, compact: bool = True) -> Routing:
+    """
+    Drop-in alternative to greedy_router that searches for a better initial mapping: candidate_count candidates
+    (see generate_candidates) are scored by distance_sum, the top_k of them are refined by simulated annealing
+    (anneal_steps moves each, 20 per qubit by default) and the twoColorMapper mapping plus the best top_k - 1 other
+    candidates are routed with greedy_router in a pool of workers processes. The routing of smallest depth is
+    returned, so without a time budget the result is never deeper than that of greedy_router.
+
+    The result only depends on seed unless time_budget (seconds) runs out: then candidate generation and annealing
+    stop, and routing keeps the best routing finished by the deadline (waiting for at least one). On devices larger
+    than the problem the search runs on a compact region unless compact is False (see greedy_router).
+    """
+    if compact and len(qpu.qubit_list) > len(problem_instance.variables):
+        return route_on_region(problem_instance, qpu, mapping_search, candidate_count=candidate_count, top_k=top_k,
+                               anneal_steps=anneal_steps, time_budget=time_budget, workers=workers, seed=seed)
+    deadline = np.inf if time_budget is None else time.perf_counter() + time_budget
+    rng = np.random.default_rng(seed)
+    pairs = interaction_pairs(problem_instance)
+    if anneal_steps is None:
+        anneal_steps = 20 * len(qpu.qubit_list)
+
+    candidates = generate_candidates(problem_instance, qpu, candidate_count, rng, deadline)
+    for candidate in candidates:
+        candidate.score = distance_sum(qpu, candidate.log2hard, pairs)
+    default = candidates[0]
+    candidates.sort(key=lambda candidate: candidate.score)
+    for candidate in candidates[:top_k]:
+        if time.perf_counter() > deadline:
+            break
+        log2hard = anneal(qpu, candidate.log2hard, pairs, anneal_steps, rng, deadline)
+        mapping = candidate_mapping(problem_instance, qpu, log2hard)
+        annealed = MappingCandidate(log2hard, adjacent_int_layers(qpu, mapping, pairs), candidate.label + ' annealed')
+        annealed.score = distance_sum(qpu, log2hard, pairs)
+        candidates.append(annealed)
+    candidates.sort(key=lambda candidate: candidate.score)
+
+    finalists, seen = [default], {default.log2hard.tobytes()}
+    for candidate in candidates:
+        if candidate.log2hard.tobytes() not in seen:
+            seen.add(candidate.log2hard.tobytes())
+            finalists.append(candidate)
+    finalists = finalists[:top_k]
+
+    if workers is None or workers > 1:
+        return _parallel_best_routing(problem_instance, qpu, finalists, workers, deadline)
+    best_routing = None
+    for candidate in finalists:
+        if best_routing is not None and time.perf_counter() > deadline:
+            break
+        routing = route_candidate(problem_instance, qpu, candidate)
+        if best_routing is None or len(routing.layers) < len(best_routing.layers):
+            best_routing = routing
+    return best_routing
+
+
+def _parallel_best_routing(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU],
+                           finalists: List[MappingCandidate], workers: int, deadline: float) -> Routing:
+    """
+    Routing of smallest depth among the finalists routed by deadline (ties go to the lower index). Workers return
+    the layer masks (see embedding_layers), from which the winner is rebuilt without routing it again.
+    """
+    embeddings = [candidate_embedding(problem_instance, qpu, candidate.log2hard) for candidate in finalists]
+    variables = list(problem_instance.variables)
+    problem_vectors = (variables, problem_instance.to_numpy_vectors(variable_order=variables), problem_instance.vartype)
+    executor = ProcessPoolExecutor(workers)
+    try:
+        futures = [executor.submit(embedding_layers, problem_vectors, qpu, embedding, candidate.int_layers)
+                   for embedding, candidate in zip(embeddings, finalists)]
+        timeout = None if deadline == np.inf else max(deadline - time.perf_counter(), 0.)
+        done, _ = wait(futures, timeout=timeout)
+        if len(done) == 0:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        best_index = min((len(future.result()[0]), index) for index, future in enumerate(futures)
+                         if future in done)[1]
+        int_masks, swap_masks = futures[best_index].result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    layers = [Layer.from_arrays(qpu, int_mask, swap_mask) for int_mask, swap_mask in zip(int_masks, swap_masks)]
+    return Routing.from_layers(problem_instance, qpu, Mapping(qpu, problem_instance, embeddings[best_index]), layers)
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Devices.quantum_hardware import Grid2dQPU
+from Router.GreedyRouter.greedy_router import greedy_router
+from Router.Mapper.mapping_search import *
+
+
+class TestMappingSearch(TestCase):
+    def setUp(self) -> None:
+        self.qpu = Grid2dQPU(6, 6)
+        self.bqm = dimod.generators.uniform(nx.random_regular_graph(3, 36, seed=3), dimod.SPIN, seed=3)
+
+    def test_anneal(self):
+        pairs = interaction_pairs(self.bqm)
+        log2hard = np.random.default_rng(0).permutation(36)
+        annealed = anneal(self.qpu, log2hard, pairs, 2000, np.random.default_rng(1))
+        self.assertEqual(list(range(36)), sorted(annealed.tolist()), msg='annealing broke the bijection')
+        self.assertTrue(distance_sum(self.qpu, annealed, pairs) < distance_sum(self.qpu, log2hard, pairs),
+                        msg='annealing did not reduce the distance sum of a random mapping')
+
+    def test_candidates(self):
+        candidates = generate_candidates(self.bqm, self.qpu, 8, np.random.default_rng(0))
+        self.assertEqual(8, len(candidates))
+        for candidate in candidates:
+            mapping = candidate_mapping(self.bqm, self.qpu, candidate.log2hard)
+            for int_layer in candidate.int_layers:
+                qubits = [hard_qb for int_gate in int_layer for hard_qb in int_gate]
+                self.assertEqual(len(qubits), len(set(qubits)), msg='int_layer involves at least one qubit twice')
+                for int_gate in int_layer:
+                    log_qb0, log_qb1 = (mapping.hard2log[hard_qb] for hard_qb in int_gate)
+                    self.assertTrue(self.qpu.has_edge(int_gate), msg='int gate is not a hardware edge')
+                    self.assertIn(log_qb1, self.bqm.adj[log_qb0], msg='int gate is not a problem interaction')
+
+    def test_mapping_search(self):
+        routing = mapping_search(self.bqm, self.qpu, candidate_count=8, top_k=3, seed=5)
+        self.assertEqual(0, routing.remaining_interactions.number_of_edges(), msg='not all interactions were routed')
+        self.assertTrue(len(routing.layers) <= len(greedy_router(self.bqm, self.qpu).layers),
+                        msg='search returned a deeper routing than greedy_router')
+        again = mapping_search(self.bqm, self.qpu, candidate_count=8, top_k=3, seed=5)
+        self.assertTrue(np.array_equal(routing.initial_mapping.log2hard_array, again.initial_mapping.log2hard_array),
+                        msg='search is not deterministic for a fixed seed')
+        parallel = mapping_search(self.bqm, self.qpu, candidate_count=8, top_k=3, seed=5, workers=2)
+        self.assertEqual(len(routing.layers), len(parallel.layers), msg='parallel search found another depth')
+        self.assertEqual(0, parallel.remaining_interactions.number_of_edges(), msg='rebuilt routing is incomplete')
+        self.assertTrue(np.array_equal(routing.mapping.log2hard_array, parallel.mapping.log2hard_array),
+                        msg='rebuilt routing ends in another mapping')
+
+    def test_time_budget(self):
+        routing = mapping_search(self.bqm, self.qpu, candidate_count=1000, time_budget=0.)
+        self.assertEqual(0, routing.remaining_interactions.number_of_edges(), msg='not all interactions were routed')
@@ -1,62 +1,53 @@
-from typing import Type
+from typing import List, Tuple, Type
 import matplotlib.pyplot as plt
 
+import numpy as np
 import dimod
 import networkx as nx
 
-from Router.GreedyRouter.edge_coloring import find_edge_coloring
+from Router.GreedyRouter.edge_coloring import problem_edge_array, edge_coloring_from_array
 from Devices.quantum_hardware import QPU
 from Router.mapping import Mapping
 
 
-def decompose_into_chains(problem_instance: dimod.BinaryQuadraticModel):
-    problem_graph = problem_instance.to_networkx_graph()
-    for log_qb in problem_graph:
-        problem_graph.add_node(log_qb, endnode=False)
-    problem_size = len(problem_graph)
-    color_sets = find_edge_coloring(problem_graph)
-    color_sets = sorted(color_sets, key=lambda color_set: len(color_set), reverse=True)
-    for log_qb0, log_qb1 in problem_graph.edges():
-        if frozenset((log_qb0, log_qb1)) in color_sets[0]:
-            color0 = problem_graph[log_qb0][log_qb1]['color']
-            break
-    for log_qb0, log_qb1 in problem_graph.edges():
-        if frozenset((log_qb0, log_qb1)) in color_sets[1]:
-            color1 = problem_graph[log_qb0][log_qb1]['color']
-            break
-    def filter_edge(log_qb0, log_qb1) -> bool:
-        if problem_graph[log_qb0][log_qb1]['color'] == color0:
-            return True
-        elif problem_graph[log_qb0][log_qb1]['color'] == color1:
-            return True
-        else:
-            return False
-
-    twocolor_graph = nx.subgraph_view(problem_graph, filter_edge=filter_edge)
-    components = [twocolor_graph.subgraph(c).copy() for c in nx.connected_components(twocolor_graph)]
-    chains, loops = [], []
-    for component in components:
-        deg = 3
-        for node in component:
-            if component.degree(node) < deg:
-                node0 = node
-                deg = component.degree(node)
-        for neighbor in component.neighbors(node0):
-            node1 = neighbor
-            break
-        lst = [node0, node1]
-        for _ in range(len(component)-2):
-            for neighbor in component.neighbors(node1):
-                if neighbor is not node0:
-                    node0 = node1
-                    node1 = neighbor
-                    lst.append(node1)
-                    break
-        if deg == 1:
-            chains.append(lst)
-        elif deg == 2:
-            loops.append(lst)
+def decompose_into_chains(problem_instance: dimod.BinaryQuadraticModel, color_pair: Tuple[int, int] = (0, 1),
+                          coloring: Tuple[List, np.ndarray, np.ndarray] = None):
+    """
+    Chains and loops (lists of logical qubits) formed by two color sets, by default the two largest ones; color_pair
+    picks other ranks of the color sets sorted by size. coloring = (log_qbs, edges, colors) reuses an edge coloring
+    of the problem graph. Every qubit has at most one edge of each color, so partner[color][qb] is a table walk
+    alternating between the two colors; O(n) after the edge coloring.
+    """
+    if coloring is None:
+        log_qbs, edges = problem_edge_array(problem_instance)
+        colors = edge_coloring_from_array(edges, len(log_qbs))
+    else:
+        log_qbs, edges, colors = coloring
+    color_ranks = np.argsort(-np.bincount(colors, minlength=max(color_pair) + 1), kind='stable')
+    color0, color1 = color_ranks[list(color_pair)]
+    partner = np.full((2, len(log_qbs)), -1, dtype=np.int64)
+    for slot, color in enumerate((color0, color1)):
+        color_edges = edges[colors == color]
+        partner[slot, color_edges[:, 0]] = color_edges[:, 1]
+        partner[slot, color_edges[:, 1]] = color_edges[:, 0]
+    partner = partner.tolist()
+    visited = [False] * len(log_qbs)
 
+    def walk(qb, slot):
+        component = []
+        while qb >= 0 and not visited[qb]:
+            visited[qb] = True
+            component.append(log_qbs[qb])
+            qb, slot = partner[slot][qb], 1 - slot
+        return component
+
+    chains, loops = [], []
+    for qb in range(len(log_qbs)):
+        if not visited[qb] and (partner[0][qb] < 0) != (partner[1][qb] < 0):
+            chains.append(walk(qb, 0 if partner[0][qb] >= 0 else 1))
+    for qb in range(len(log_qbs)):
+        if not visited[qb] and partner[0][qb] >= 0:
+            loops.append(walk(qb, 0))
     return chains, loops
 
 
@@ -82,36 +73,86 @@ def embed_chain(chain, hardware_graph: nx.Graph):
     return embedding
 
 
+def place_chains(qpu: Type[QPU], chains: List[List], loops: List[List]) -> List:
+    """
+    Order in which chains and loops are laid out along qpu.long_path, concatenated into one list of logical qubits.
+    Whenever the path position reached so far has a hardware neighbor further down the path at which a remaining
+    loop would end, that loop is placed next so that it closes on a hardware cycle; otherwise the next chain (or,
+    without chains left, any loop) follows. Every placement only looks at the neighbors of one qubit, so the whole
+    layout takes O(n + E).
+    """
+    indptr, neighbors, _ = qpu.incidence
+    path = qpu.long_path
+    position = np.full(len(qpu.qubit_list), -1, dtype=np.int64)
+    position[path] = np.arange(len(path))
+    loops_by_length = {}
+    for loop_index, loop in enumerate(loops):
+        loops_by_length.setdefault(len(loop), []).append(loop_index)
+    placed = [False] * len(loops)
+    loop_stack = list(range(len(loops)))[::-1]
+    chain_index = 0
+    sequence = []
+    for _ in range(len(chains) + len(loops)):
+        cursor = len(sequence)
+        loop_index = -1
+        if cursor < len(path):
+            for neighbor in neighbors[indptr[path[cursor]]:indptr[path[cursor] + 1]].tolist():
+                candidates = loops_by_length.get(position[neighbor] - cursor + 1)
+                while candidates and placed[candidates[-1]]:
+                    candidates.pop()
+                if candidates:
+                    loop_index = candidates.pop()
+                    break
+        if loop_index < 0 and chain_index < len(chains):
+            sequence.extend(chains[chain_index])
+            chain_index += 1
+            continue
+        while loop_index < 0:
+            loop_index = loop_stack.pop()
+            if placed[loop_index]:
+                loop_index = -1
+        placed[loop_index] = True
+        sequence.extend(loops[loop_index])
+    return sequence
+
+
 def twoColorMapper(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU]):
+    """
+    Initial mapping placing the chains and loops of the two largest color sets along qpu.long_path (see
+    place_chains), and the two int layers executing them.
+    """
     chains, loops = decompose_into_chains(problem_instance)
-    concatenated_chains = []
-    for chain in chains:
-        concatenated_chains .extend(chain)
-    for loop in loops:
-        concatenated_chains.extend(loop)
-    embedding = {}
-    hardware_chain = list(qpu.embedded_chain())[:len(concatenated_chains)]
-    for hard_qb, log_qb in zip(hardware_chain, concatenated_chains):
-        embedding[hard_qb] = log_qb
+    return chain_mapping(problem_instance, qpu, chains, loops)
+
+
+def chain_mapping(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], chains: List[List], loops: List[List]):
+    """
+    Mapping laying out chains and loops along qpu.long_path in the order of place_chains, and the two int layers
+    executing them. Logical qubits in no chain or loop and path overflow go to the qubits off the path. Loops of
+    even length that close on a hardware cycle get their closing gate in the second layer.
+    """
+    sequence = place_chains(qpu, chains, loops)
+    placed_log_qbs = set(sequence)
+    sequence.extend(log_qb for log_qb in problem_instance.variables if log_qb not in placed_log_qbs)
+    on_path = np.zeros(len(qpu.qubit_list), dtype=bool)
+    on_path[qpu.long_path] = True
+    hard_indices = np.concatenate((qpu.long_path, np.flatnonzero(~on_path)))
+    embedding = {qpu.qubit_list[hard_index]: log_qb for hard_index, log_qb in zip(hard_indices.tolist(), sequence)}
     mapping = Mapping(qpu, problem_instance, embedding)
+
+    def gates(log_pairs):
+        hard_gates = (frozenset((mapping.log2hard[log_qb0], mapping.log2hard[log_qb1])) for log_qb0, log_qb1 in log_pairs)
+        return [gate for gate in hard_gates if qpu.edge_id(gate) >= 0]
+
     int_layer0 = []
     int_layer1 = []
     for chain in chains:
-        for log_qb0, log_qb1 in zip(chain[::2], chain[1::2]):
-            hard_qb0, hard_qb1 = mapping.log2hard[log_qb0], mapping.log2hard[log_qb1]
-            int_layer0.append(frozenset((hard_qb0, hard_qb1)))
-        for log_qb0, log_qb1 in zip(chain[1::2], chain[2::2]):
-            hard_qb0, hard_qb1 = mapping.log2hard[log_qb0], mapping.log2hard[log_qb1]
-            int_layer1.append(frozenset((hard_qb0, hard_qb1)))
+        int_layer0.extend(gates(zip(chain[::2], chain[1::2])))
+        int_layer1.extend(gates(zip(chain[1::2], chain[2::2])))
     for loop in loops:
-        for log_qb0, log_qb1 in zip(loop[::2], loop[1::2]):
-            hard_qb0, hard_qb1 = mapping.log2hard[log_qb0], mapping.log2hard[log_qb1]
-            int_layer0.append(frozenset((hard_qb0, hard_qb1)))
-        for log_qb0, log_qb1 in zip(loop[1::2], loop[2::2]):
-            hard_qb0, hard_qb1 = mapping.log2hard[log_qb0], mapping.log2hard[log_qb1]
-            int_layer1.append(frozenset((hard_qb0, hard_qb1)))
+        int_layer0.extend(gates(zip(loop[::2], loop[1::2])))
+        int_layer1.extend(gates(zip(loop[1::2], loop[2::2])))
+        if len(loop) % 2 == 0:
+            int_layer1.extend(gates([(loop[-1], loop[0])]))
 
     return mapping, [int_layer0, int_layer1]
-
-
-
@@ -3,7 +3,9 @@ from unittest import TestCase
 import networkx as nx
 import dimod
 
-from Devices.quantum_hardware import Grid2dQPU
+import cirq
+
+from Devices.quantum_hardware import QPU, Grid2dQPU, LineQPU, XmonQPU
 
 from Router.Mapper.twoColorMapper import *
 from Router.GreedyRouter.edge_coloring import find_edge_coloring
@@ -80,9 +82,27 @@ class TestTwoColorMapper(TestCase):
             self.assertTrue(int_partners >= int_gate_count[0] + int_gate_count[1],
                             msg='twoColorMapper did not map as many logical qubits next to each other as advertised')
 
+    def test_irregular_devices(self):
+        bristlecone = XmonQPU(cirq.google.Bristlecone)
+        for qpu in [LineQPU(36), XmonQPU(cirq.google.Foxtail), bristlecone, QPU(bristlecone.graph.subgraph(
+                bristlecone.qubit_list[:50]).copy(), None)]:
+            variable_count = len(qpu.qubit_list)
+            bqm = dimod.generators.uniform(nx.random_regular_graph(3, variable_count, seed=2), dimod.SPIN)
+            mapping, int_layers = twoColorMapper(bqm, qpu)
+            for int_layer in int_layers:
+                qubits = [hard_qb for int_gate in int_layer for hard_qb in int_gate]
+                self.assertEqual(len(qubits), len(set(qubits)), msg='int_layer involves at least one qubit twice')
+                for int_gate in int_layer:
+                    self.assertTrue(qpu.has_edge(int_gate), msg='int gate is not a hardware edge')
+                    log_qb0, log_qb1 = (mapping.hard2log[hard_qb] for hard_qb in int_gate)
+                    self.assertIn(log_qb1, bqm.adj[log_qb0], msg='int gate is not a problem interaction')
 
-
-
-
-
-
+    def test_loops_closed_on_hardware_cycles(self):
+        qpu = Grid2dQPU(4, 4)
+        loops = [list(range(8)), list(range(8, 16))]
+        sequence = place_chains(qpu, [], loops)
+        self.assertEqual(list(range(16)), sorted(sequence), msg='placement lost or duplicated logical qubits')
+        path = [qpu.qubit_list[hard_index] for hard_index in qpu.long_path]
+        hard_qb = {log_qb: hard_qb for hard_qb, log_qb in zip(path, sequence)}
+        for loop in loops:
+            self.assertTrue(qpu.graph.has_edge(hard_qb[loop[0]], hard_qb[loop[-1]]), msg='loop was not closed')
@@ -0,0 +1,54 @@
+from typing import Type
+
+import numpy as np
+import dimod
+
+from Router.routing import Layer, Routing
+from Router.mapping import Mapping
+from Devices.quantum_hardware import QPU
+
+
+def swap_network_router(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU]) -> Routing:
+    """
+    Routes problem_instance with an odd-even transposition swap network along qpu.embedded_chain() (the qubits of
+    a LineQPU in order, the snake through a Grid2dQPU). Layer t swaps every chain edge (i, i+1) with i = t mod 2
+    and applies an int gate on it as well if the two logical qubits still have to interact. After at most n layers
+    every pair of logical qubits has been adjacent once, so any interaction graph is routed in O(n^2) time without
+    any search; the network stops after the last int gate and the swaps of its final layer are dropped. On devices
+    with more qubits than the problem has variables the network runs on the first n qubits of the chain, the other
+    sites stay empty.
+    """
+    log_qb_list = list(problem_instance.variables)
+    chain = list(qpu.embedded_chain())
+    assert len(chain) >= len(log_qb_list), 'more logical qubits than hardware qubits'
+    chain = chain[:len(log_qb_list)]
+    initial_mapping = Mapping(qpu, problem_instance, dict(zip(chain, log_qb_list)))
+
+    log_index = {log_qb: index for index, log_qb in enumerate(log_qb_list)}
+    pending = np.zeros((len(log_qb_list), len(log_qb_list)), dtype=bool)
+    for log_qb0, log_qb1 in problem_instance.quadratic:
+        pending[log_index[log_qb0], log_index[log_qb1]] = pending[log_index[log_qb1], log_index[log_qb0]] = True
+    pending_count = np.count_nonzero(pending) // 2
+
+    chain_edge_ids = np.array([qpu.edge_index[frozenset(pair)] for pair in zip(chain[:-1], chain[1:])], dtype=np.int64)
+    chain2log = np.arange(len(chain))
+    layers = []
+    edge_count = len(qpu.edge_array)
+    for step in range(len(chain)):
+        if pending_count == 0:
+            break
+        positions = np.arange(step % 2, len(chain) - 1, 2)
+        log_qbs0, log_qbs1 = chain2log[positions], chain2log[positions + 1]
+        interacting = pending[log_qbs0, log_qbs1]
+        pending[log_qbs0[interacting], log_qbs1[interacting]] = False
+        pending[log_qbs1[interacting], log_qbs0[interacting]] = False
+        pending_count -= np.count_nonzero(interacting)
+        int_mask, swap_mask = np.zeros(edge_count, dtype=bool), np.zeros(edge_count, dtype=bool)
+        int_mask[chain_edge_ids[positions[interacting]]] = True
+        if pending_count > 0:
+            swap_mask[chain_edge_ids[positions]] = True
+            chain2log[positions], chain2log[positions + 1] = log_qbs1, log_qbs0
+        layers.append(Layer.from_arrays(qpu, int_mask, swap_mask))
+    if len(layers) == 0:
+        layers.append(Layer(qpu))
+    return Routing.from_layers(problem_instance, qpu, initial_mapping, layers)
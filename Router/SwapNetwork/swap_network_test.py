@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Router.SwapNetwork.swap_network import swap_network_router
+from Router.GreedyRouter.greedy_router import greedy_router
+from Router.auto_router import auto_router
+from Devices.quantum_hardware import Grid2dQPU, LineQPU
+
+
+class TestSwapNetwork(TestCase):
+    def setUp(self) -> None:
+        self.qpus = [LineQPU(12), Grid2dQPU(3, 4), Grid2dQPU(4, 3)]
+
+    def test_complete_graph(self):
+        for qpu in self.qpus:
+            bqm = dimod.generators.uniform(nx.complete_graph(12), dimod.SPIN)
+            route = swap_network_router(bqm, qpu)
+            self.assertEqual(0, route.remaining_interactions.size(), msg='router did not finish all interactions')
+            self.assertLessEqual(len(route.layers), 12, msg='swap network is deeper than the number of qubits')
+            self.assertFalse(route.layers[-1].swap.any(), msg='final layer contains superfluous swaps')
+
+    def test_random_graphs(self):
+        for seed in range(10):
+            bqm = dimod.generators.uniform(nx.gnp_random_graph(12, 0.3, seed=seed), dimod.SPIN)
+            for qpu in self.qpus:
+                route = swap_network_router(bqm, qpu)
+                self.assertEqual(0, route.remaining_interactions.size(), msg='router did not finish all interactions')
+                for layer in route.layers:
+                    gate_count = np.bincount(qpu.edge_array[layer.swap | layer.int].ravel(), minlength=12)
+                    self.assertTrue((gate_count <= 1).all(), msg='qubit involved in two gates of one layer')
+
+    def test_larger_device(self):
+        bqm = dimod.generators.uniform(nx.complete_graph(20), dimod.SPIN)
+        for qpu in [LineQPU(25), Grid2dQPU(8, 8)]:
+            for route in [swap_network_router(bqm, qpu), auto_router(bqm, qpu)]:
+                self.assertEqual(0, route.remaining_interactions.size(), msg='router did not finish all interactions')
+                self.assertTrue(route.mapping.is_partial(), msg='device sites are not left empty')
+            self.assertLessEqual(len(swap_network_router(bqm, qpu).layers), 20,
+                                 msg='swap network is deeper than the number of logical qubits')
+
+    def test_auto_router(self):
+        qpu = Grid2dQPU(4, 4)
+        dense = dimod.generators.uniform(nx.gnp_random_graph(16, 0.8, seed=0), dimod.SPIN)
+        sparse = dimod.generators.uniform(nx.random_regular_graph(3, 16, seed=0), dimod.SPIN)
+        self.assertLessEqual(len(auto_router(dense, qpu).layers), 16, msg='dense problem was not routed by swap network')
+        self.assertEqual(0, auto_router(sparse, qpu).remaining_interactions.size(), msg='sparse problem not routed')
+
+    def test_auto_router_threshold(self):
+        for side, sparse_density, dense_density in ((4, 0.15, 0.4), (6, 0.06, 0.2), (8, 0.05, 0.15)):
+            qpu = Grid2dQPU(side, side)
+            sparse = dimod.generators.uniform(nx.gnp_random_graph(side * side, sparse_density, seed=0), dimod.SPIN)
+            self.assertLessEqual(len(auto_router(sparse, qpu).layers), len(greedy_router(sparse, qpu).layers),
+                                 msg='sparse problem was routed by swap network')
+            dense = dimod.generators.uniform(nx.gnp_random_graph(side * side, dense_density, seed=0), dimod.SPIN)
+            self.assertLessEqual(len(auto_router(dense, qpu).layers), side * side,
+                                 msg='dense problem was not routed by swap network')
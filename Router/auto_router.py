@@ -0,0 +1,24 @@
+from typing import Type
+
+import dimod
+
+from Router.routing import Routing
+from Router.GreedyRouter.greedy_router import greedy_router
+from Router.SwapNetwork.swap_network import swap_network_router
+from Devices.quantum_hardware import QPU
+
+
+def auto_router(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU],
+                interaction_factor: float = 0.35) -> Routing:
+    """
+    Routes problems with at least interaction_factor * n^1.5 interactions (n variables) with the swap network,
+    whose depth is at most n regardless of the problem, and sparser ones with greedy_router, whose depth grows with
+    the number of interactions. The factor is calibrated on gnp problems on square grids with 16, 36 and 64 qubits,
+    where both routers produce about the same depth at 0.3 to 0.4 n^1.5 interactions (a density of about 0.25,
+    0.12 and 0.09 respectively). QPUs without embedded_chain always use greedy_router.
+    """
+    variable_count = len(problem_instance.variables)
+    if hasattr(qpu, 'embedded_chain') and \
+            len(problem_instance.quadratic) >= interaction_factor * variable_count ** 1.5:
+        return swap_network_router(problem_instance, qpu)
+    return greedy_router(problem_instance, qpu)
@@ -1,12 +1,46 @@
-from typing import Type
+from typing import Type, List, Dict, Any
+from collections import abc
 
 import networkx as nx
+import numpy as np
 import dimod
 
 from Devices.quantum_hardware import QPU
 
 
+class IndexedMappingView(abc.Mapping):
+    """
+    Read-only dict-like view translating keys into values through an integer array, i.e.
+    view[key] = values[array[key_index[key]]], or None where the array holds -1. Used for Mapping.hard2log and
+    Mapping.log2hard.
+    """
+    def __init__(self, keys: List, key_index: Dict[Any, int], values: List, array: np.ndarray):
+        self._keys = keys
+        self._key_index = key_index
+        self._values = values
+        self._array = array
+
+    def __getitem__(self, key):
+        index = self._array[self._key_index[key]]
+        return self._values[index] if index >= 0 else None
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_index
+
+
 class Mapping:
+    """
+    Injection of the logical into the hardware qubits, stored as a pair of integer arrays: hard2log_array maps the
+    index of a hardware qubit (qpu.qubit_index) to the index of its logical qubit (log_index), or to -1 for an
+    empty site if the device has more qubits than the problem, and log2hard_array is its inverse. Swaps and lookups
+    are O(1), copies are two array copies.
+    """
     def __init__(self, qpu: Type[QPU], problem: dimod.BinaryQuadraticModel, partial_initial_mapping: dict = None):
         if problem.vartype is dimod.BINARY:
             problem.change_vartype(dimod.SPIN)
@@ -15,40 +49,75 @@ class Mapping:
         self.log_qbs = set(problem.variables)
         self.hard_qbs = set(qpu.qubits())
 
-        assert len(self.hard_qbs) == len(self.log_qbs), 'number of hardware qubits does not match number of logical qubits'
+        assert len(self.hard_qbs) >= len(self.log_qbs), 'more logical qubits than hardware qubits'
+
+        self.hard_qb_list = qpu.qubit_list
+        self.hard_index = qpu.qubit_index
+        self.log_qb_list = list(problem.variables)
+        self.log_index = {log_qb: index for index, log_qb in enumerate(self.log_qb_list)}
 
         if partial_initial_mapping is None:
-            self.hard2log = {hard_qb: log_qb for hard_qb, log_qb in zip(self.hard_qbs, self.log_qbs)}
-            self.log2hard = {log_qb: hard_qb for log_qb, hard_qb in zip(self.log_qbs, self.hard_qbs)}
+            initial_mapping = {hard_qb: log_qb for hard_qb, log_qb in zip(self.hard_qb_list, self.log_qb_list)}
         else:
             assert len(set(partial_initial_mapping.values())) == len(partial_initial_mapping.values()), 'partial_initial_mapping is not bijective'
+            initial_mapping = dict(partial_initial_mapping)
             if len(partial_initial_mapping) < len(self.log_qbs):
-                remaining_hard_qbs = self.hard_qbs - set(partial_initial_mapping.keys())
-                remaining_log_qbs = self.log_qbs - set(partial_initial_mapping.values())
-                initial_mapping = partial_initial_mapping
+                mapped_log_qbs = set(partial_initial_mapping.values())
+                remaining_hard_qbs = [hard_qb for hard_qb in self.hard_qb_list if hard_qb not in partial_initial_mapping]
+                remaining_log_qbs = [log_qb for log_qb in self.log_qb_list if log_qb not in mapped_log_qbs]
                 for hard_qb, log_qb in zip(remaining_hard_qbs, remaining_log_qbs):
                     initial_mapping[hard_qb] = log_qb
-            else:
-                initial_mapping = partial_initial_mapping
 
-            self.hard2log = initial_mapping
-            self.log2hard = {log_qb: hard_qb for hard_qb, log_qb in self.hard2log.items()}
+        self.hard2log_array = np.full(len(self.hard_qb_list), -1, dtype=np.int64)
+        self.log2hard_array = np.empty(len(self.log_qb_list), dtype=np.int64)
+        for hard_qb, log_qb in initial_mapping.items():
+            self.hard2log_array[self.hard_index[hard_qb]] = self.log_index[log_qb]
+            self.log2hard_array[self.log_index[log_qb]] = self.hard_index[hard_qb]
+        self._build_views()
+
+    def _build_views(self):
+        self.hard2log = IndexedMappingView(self.hard_qb_list, self.hard_index, self.log_qb_list, self.hard2log_array)
+        self.log2hard = IndexedMappingView(self.log_qb_list, self.log_index, self.hard_qb_list, self.log2hard_array)
+
+    def copy(self) -> 'Mapping':
+        """Snapshot of the mapping. The qubit labels and index dicts are shared, only the two arrays are copied."""
+        mapping = object.__new__(Mapping)
+        mapping.__dict__.update(self.__dict__)
+        mapping.hard2log_array = self.hard2log_array.copy()
+        mapping.log2hard_array = self.log2hard_array.copy()
+        mapping._build_views()
+        return mapping
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def swap_hard_indices(self, hard_index0: int, hard_index1: int):
+        log_index0, log_index1 = self.hard2log_array[hard_index0], self.hard2log_array[hard_index1]
+        self.hard2log_array[hard_index0], self.hard2log_array[hard_index1] = log_index1, log_index0
+        if log_index0 >= 0:
+            self.log2hard_array[log_index0] = hard_index1
+        if log_index1 >= 0:
+            self.log2hard_array[log_index1] = hard_index0
+
+    def is_partial(self) -> bool:
+        return len(self.log_qb_list) < len(self.hard_qb_list)
+
+    def occupied_hard_qbs(self) -> List:
+        """Hardware qubits holding a logical qubit, in the order of qpu.qubit_list."""
+        return [self.hard_qb_list[hard_index] for hard_index in np.flatnonzero(self.hard2log_array >= 0)]
 
     def swap(self, gate: frozenset):
         qb0, qb1 = list(gate)
-        if qb0 in self.hard_qbs:
-            assert qb1 in self.hard_qbs, 'impossible to swap hardware with logical qubit'
-            self.hard2log[qb0], self.hard2log[qb1] = self.hard2log[qb1], self.hard2log[qb0]
-            self.log2hard = {log_qb: hard_qb for hard_qb, log_qb in self.hard2log.items()}
+        if qb0 in self.hard_index:
+            assert qb1 in self.hard_index, 'impossible to swap hardware with logical qubit'
+            self.swap_hard_indices(self.hard_index[qb0], self.hard_index[qb1])
         else:
-            assert qb1 in self.log_qbs, 'impossible to swap hardware with logical qubit'
-            self.log2hard[qb0], self.log2hard[qb1] = self.log2hard[qb1], self.log2hard[qb0]
-            self.hard2log = {hard_qb: log_qb for log_qb, hard_qb in self.log2hard.items()}
+            assert qb1 in self.log_index, 'impossible to swap hardware with logical qubit'
+            self.swap_hard_indices(self.log2hard_array[self.log_index[qb0]], self.log2hard_array[self.log_index[qb1]])
 
     def update(self, layer):
-        for hard_qb0, hard_qb1 in layer.gates.edges():
-            if layer.gates[hard_qb0][hard_qb1]['swap']:
-                self.swap(frozenset((hard_qb0, hard_qb1)))
-
-
-
+        for gate in layer.swap_gates():
+            self.swap(gate)
@@ -0,0 +1,87 @@
+import json
+import time
+from typing import Dict
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfiler:
+    """Profiler interface that records nothing. Routers use it when no profiler is passed."""
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def record(self, name: str, value):
+        pass
+
+    def summary(self) -> Dict:
+        return {}
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Phase:
+    def __init__(self, timer: list):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer[0] += 1
+        self.timer[1] += time.perf_counter() - self.start
+        return False
+
+
+class RouterProfiler(NullProfiler):
+    """
+    Collects call counts and wall time of router phases (with profiler.phase(name): ...), event counters
+    (profiler.count(name)) and single values (profiler.record(name, value)). Nested phases are timed independently,
+    so the time of an outer phase includes its inner phases.
+
+        profiler = RouterProfiler()
+        route = greedy_router(bqm, qpu, profiler=profiler)
+        print(profiler.to_json())
+    """
+    enabled = True
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.values = {}
+
+    def phase(self, name: str) -> _Phase:
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.]
+        return _Phase(timer)
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name: str, value):
+        self.values[name] = value
+
+    def summary(self) -> Dict:
+        return {'phases': {name: {'calls': calls, 'time': total_time}
+                           for name, (calls, total_time) in self.timers.items()},
+                'counters': dict(self.counters),
+                'values': dict(self.values)}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.summary(), **kwargs)
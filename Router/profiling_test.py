@@ -0,0 +1,34 @@
+import json
+from unittest import TestCase
+
+import networkx as nx
+import dimod
+
+from Router.profiling import RouterProfiler, NULL_PROFILER
+from Router.GreedyRouter.greedy_router import greedy_router
+from Devices.quantum_hardware import Grid2dQPU
+
+
+class TestRouterProfiler(TestCase):
+    def test_greedy_router_profile(self):
+        bqm = dimod.generators.uniform(nx.random_regular_graph(4, 36, seed=0), dimod.SPIN, seed=0)
+        qpu = Grid2dQPU(6, 6)
+        profiler = RouterProfiler()
+        route = greedy_router(bqm, qpu, profiler=profiler)
+        summary = json.loads(profiler.to_json())
+        for phase in ['greedy_router', 'mapper', 'edge_coloring', 'execute_all_possible_int_gates',
+                      'decrease_int_pair_distance']:
+            self.assertIn(phase, summary['phases'], msg=f'phase {phase} not recorded')
+        self.assertEqual(1, summary['phases']['greedy_router']['calls'])
+        swap_count = sum(int(layer.swap.sum()) for layer in route.layers)
+        self.assertGreaterEqual(summary['counters']['swaps_applied'], swap_count,
+                                msg='fewer swaps counted than present in the routing')
+        self.assertGreaterEqual(summary['counters']['swaps_evaluated'], summary['counters']['swaps_applied'])
+        self.assertEqual(len(route.layers) - 1, summary['counters']['layers_opened'] -
+                         summary['counters'].get('layers_dropped', 0), msg='opened and dropped layers do not balance')
+        self.assertIn('mapper_int_gates', summary['values'])
+
+    def test_null_profiler(self):
+        with NULL_PROFILER.phase('phase'):
+            NULL_PROFILER.count('counter')
+        self.assertEqual({}, NULL_PROFILER.summary())
@@ -0,0 +1,17 @@
+from typing import Callable, Type
+
+import dimod
+
+from Devices.quantum_hardware import QPU
+from Router.routing import Routing
+
+
+def route_on_region(problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU],
+                    router: Callable[..., Routing], **router_kwargs) -> Routing:
+    """
+    Routes problem_instance with router on the compact region of qpu with as many qubits as the problem has
+    variables (see QPU.compact_region) and embeds the result into qpu, where the qubits outside the region are empty
+    sites. Routing cost then scales with the size of the problem instead of the size of the device.
+    """
+    region = qpu.subdevice(qpu.compact_region(len(problem_instance.variables)))
+    return router(problem_instance, region, **router_kwargs).embed(qpu)
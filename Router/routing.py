@@ -1,21 +1,30 @@
-from typing import Set, Type, List
-import copy as cp
+from typing import Dict, Iterator, Set, Type, List, Tuple
 
 import cirq
 import dimod
 import networkx as nx
+import numpy as np
+import sympy
 import matplotlib.pyplot as plt
 
 from Router.mapping import Mapping
+from Router.profiling import NULL_PROFILER
+from Router.scheduler import LayerScheduler
 from Devices.quantum_hardware import QPU
 
 
 class Layer:
+    """
+    One time step of a routing. The state of every hardware edge is kept in two boolean arrays indexed by the edge
+    ids of qpu.edge_index, and every hardware qubit stores the id of the edge it is busy with (or -1) in busy, so
+    that applicability checks do not need to scan any neighborhood.
+    """
     def __init__(self, qpu: Type[QPU], int_gates: Set[frozenset] = [], swap_gates: Set[frozenset] = []):
         self.qpu = qpu
-        self.gates = nx.Graph()
-        for hard_qb0, hard_qb1 in self.qpu.graph.edges():
-            self.gates.add_edge(hard_qb0, hard_qb1, swap=False, int=False)
+        edge_count = len(self.qpu.edge_array)
+        self.swap = np.zeros(edge_count, dtype=bool)
+        self.int = np.zeros(edge_count, dtype=bool)
+        self.busy = np.full(len(self.qpu.qubit_list), -1, dtype=np.int64)
         for gate in int_gates:
             if self.int_gate_applicable(gate):
                 self.apply_int_gate(gate)
@@ -27,45 +36,107 @@ class Layer:
             else:
                 print(f'SWAP-Gate {gate} cannot be applied in layer')
 
+    @classmethod
+    def from_arrays(cls, qpu: Type[QPU], int_mask: np.ndarray, swap_mask: np.ndarray) -> 'Layer':
+        """Layer with the given boolean masks over the hardware edges, e.g. as stored by a RoutingCache."""
+        layer = cls(qpu)
+        layer.int[:] = int_mask
+        layer.swap[:] = swap_mask
+        edge_ids = np.flatnonzero(layer.int | layer.swap)
+        layer.busy[qpu.edge_array[edge_ids, 0]] = edge_ids
+        layer.busy[qpu.edge_array[edge_ids, 1]] = edge_ids
+        return layer
+
+    def embed(self, qpu: Type[QPU], edge_map: np.ndarray) -> 'Layer':
+        """This layer on qpu, a device containing self.qpu, with edge_map[edge_id] the id on qpu of every edge."""
+        int_mask = np.zeros(len(qpu.edge_array), dtype=bool)
+        swap_mask = np.zeros(len(qpu.edge_array), dtype=bool)
+        int_mask[edge_map[self.int]] = True
+        swap_mask[edge_map[self.swap]] = True
+        return Layer.from_arrays(qpu, int_mask, swap_mask)
+
+    def is_empty(self) -> bool:
+        return not (self.int.any() or self.swap.any())
+
+    def edge_applicable(self, edge_id: int) -> bool:
+        qb0, qb1 = self.qpu.edge_array[edge_id]
+        busy0, busy1 = self.busy[qb0], self.busy[qb1]
+        return (busy0 == -1 or busy0 == edge_id) and (busy1 == -1 or busy1 == edge_id)
+
+    def applicable_edges(self) -> np.ndarray:
+        """Boolean mask over all hardware edges telling whether a SWAP gate could still be applied on them."""
+        edges = self.qpu.edge_array
+        edge_ids = np.arange(len(edges))
+        busy0, busy1 = self.busy[edges[:, 0]], self.busy[edges[:, 1]]
+        return ((busy0 == -1) | (busy0 == edge_ids)) & ((busy1 == -1) | (busy1 == edge_ids))
+
+    def blocked_edges(self) -> np.ndarray:
+        """
+        Boolean mask over all hardware edges telling whether one of their qubits is busy with a gate on another edge
+        in this layer. Routing.apply_swap and Routing.apply_int never place a gate on a blocked edge in or before
+        this layer.
+        """
+        edges = self.qpu.edge_array
+        edge_ids = np.arange(len(edges))
+        busy0, busy1 = self.busy[edges[:, 0]], self.busy[edges[:, 1]]
+        return ((busy0 != -1) & (busy0 != edge_ids)) | ((busy1 != -1) & (busy1 != edge_ids))
+
     def qbs_not_involved_in_other_gate(self, gate: frozenset) -> bool:
-        hard_qb0, hard_qb1 = list(gate)
-        for neighbor in self.gates.neighbors(hard_qb0):
-            if neighbor != hard_qb1:
-                if self.gates[neighbor][hard_qb0]['swap'] or self.gates[neighbor][hard_qb0]['int']:
-                    return False
-        for neighbor in self.gates.neighbors(hard_qb1):
-            if neighbor != hard_qb0:
-                if self.gates[neighbor][hard_qb1]['swap'] or self.gates[neighbor][hard_qb1]['int']:
-                    return False
-        return True
+        edge_id = self.qpu.edge_id(gate)
+        if edge_id == -1:
+            return not any(self.busy[self.qpu.qubit_index[hard_qb]] != -1 for hard_qb in gate)
+        return self.edge_applicable(edge_id)
 
     def int_gate_applicable(self, gate: frozenset) -> bool:
-        if not self.qpu.has_edge(gate):
+        edge_id = self.qpu.edge_id(gate)
+        if edge_id == -1:
             return False
-        hard_qb0, hard_qb1 = list(gate)
-        if self.gates[hard_qb0][hard_qb1]['int']:
+        if self.int[edge_id]:
             return False
-        return self.qbs_not_involved_in_other_gate(gate)
+        return self.edge_applicable(edge_id)
 
     def apply_int_gate(self, gate: frozenset) -> None:
         if self.int_gate_applicable(gate):
-            hard_qb0, hard_qb1 = list(gate)
-            self.gates[hard_qb0][hard_qb1]['int'] = True
+            edge_id = self.qpu.edge_id(gate)
+            self.int[edge_id] = True
+            self._update_busy(edge_id)
 
     def swap_gate_applicable(self, gate:  frozenset) -> bool:
-        if not self.qpu.has_edge(gate):
+        edge_id = self.qpu.edge_id(gate)
+        if edge_id == -1:
             return False
-        return self.qbs_not_involved_in_other_gate(gate)
+        return self.edge_applicable(edge_id)
 
     def apply_swap_gate(self, gate: frozenset) -> None:
         if self.swap_gate_applicable(gate):
-            hard_qb0, hard_qb1 = list(gate)
-            self.gates[hard_qb0][hard_qb1]['swap'] = not self.gates[hard_qb0][hard_qb1]['swap']
+            edge_id = self.qpu.edge_id(gate)
+            self.swap[edge_id] = not self.swap[edge_id]
+            self._update_busy(edge_id)
+
+    def _update_busy(self, edge_id: int) -> None:
+        qbs = self.qpu.edge_array[edge_id]
+        self.busy[qbs] = edge_id if self.swap[edge_id] or self.int[edge_id] else -1
+
+    def swap_gates(self) -> List[frozenset]:
+        return [self.qpu.edge_qubits(edge_id) for edge_id in np.flatnonzero(self.swap)]
+
+    def int_gates(self) -> List[frozenset]:
+        return [self.qpu.edge_qubits(edge_id) for edge_id in np.flatnonzero(self.int)]
+
+    @property
+    def gates(self) -> nx.Graph:
+        """networkx view of the layer with boolean 'swap' and 'int' edge attributes, built on demand."""
+        gates = nx.Graph()
+        qubit_list = self.qpu.qubit_list
+        for edge_id, (qb0, qb1) in enumerate(self.qpu.edge_array):
+            gates.add_edge(qubit_list[qb0], qubit_list[qb1], swap=bool(self.swap[edge_id]), int=bool(self.int[edge_id]))
+        return gates
 
     def draw(self, mapping: Mapping=None, ax=None, show: bool=True):
         gate_lists = {'y': [], 'b': [], 'g': []}
-        for hard_qb0, hard_qb1 in self.gates.edges():
-            swap_b, int_b = self.gates[hard_qb0][hard_qb1]['swap'], self.gates[hard_qb0][hard_qb1]['int']
+        for edge_id in np.flatnonzero(self.swap | self.int):
+            swap_b, int_b = self.swap[edge_id], self.int[edge_id]
+            hard_qb0, hard_qb1 = self.qpu.edge_qubits(edge_id)
             if swap_b and int_b:
                 gate_lists['y'].append((hard_qb0, hard_qb1))
             elif swap_b:
@@ -79,6 +150,24 @@ class Layer:
             self.qpu.draw(gate_lists=gate_lists, mapping=mapping, ax=ax, show=show)
 
 
+class StreamedLayer:
+    """
+    A finished layer handed out by a streaming router: mapping is the mapping in front of the layer and
+    mapping_delta the new logical qubit of every hardware qubit the layer swaps.
+    """
+    def __init__(self, index: int, layer: Layer, mapping: Mapping, mapping_delta: Dict):
+        self.index = index
+        self.layer = layer
+        self.mapping = mapping
+        self.mapping_delta = mapping_delta
+
+    def int_gates(self) -> List[frozenset]:
+        return self.layer.int_gates()
+
+    def swap_gates(self) -> List[frozenset]:
+        return self.layer.swap_gates()
+
+
 class Routing:
     def __init__(self, problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], initial_mapping: Mapping = None):
         self.problem = problem_instance
@@ -88,59 +177,148 @@ class Routing:
             self.initial_mapping = Mapping(self.qpu, self.problem)
         else:
             self.initial_mapping = initial_mapping
-        self.mapping = cp.deepcopy(self.initial_mapping)
+        self.mapping = self.initial_mapping.copy()
         self.layers = [Layer(self.qpu)]
+        self.profiler = NULL_PROFILER
+        self.scheduler = LayerScheduler(self.qpu)
+        self._build_interaction_index()
+
+    def _build_interaction_index(self):
+        """
+        Index of the remaining interactions by hardware edge, kept up to date by apply_swap and apply_int:
+        _pending_keys holds every remaining interaction as pair key (see _pair_key) of its logical indices and
+        executable_edges the ids of the hardware edges whose two qubits currently hold a remaining interaction.
+        A swap only changes the edges around its two qubits, so updates cost O(degree).
+        """
+        log_index = self.mapping.log_index
+        self._pending_keys = {self._pair_key(log_index[log_qb0], log_index[log_qb1])
+                              for log_qb0, log_qb1 in self.remaining_interactions.edges()}
+        indptr, neighbors, edge_ids = self.qpu.incidence
+        self._incident_edges = [list(zip(neighbors[indptr[qb]:indptr[qb + 1]].tolist(),
+                                         edge_ids[indptr[qb]:indptr[qb + 1]].tolist()))
+                                for qb in range(len(self.qpu.qubit_list))]
+        log_indices = self.mapping.hard2log_array[self.qpu.edge_array]
+        self.executable_edges = {edge_id for edge_id, (log_index0, log_index1) in enumerate(log_indices.tolist())
+                                 if self._pair_key(log_index0, log_index1) in self._pending_keys}
+
+    def _pair_key(self, log_index0: int, log_index1: int) -> int:
+        if log_index0 < 0 or log_index1 < 0:
+            return -1
+        if log_index0 > log_index1:
+            log_index0, log_index1 = log_index1, log_index0
+        return log_index0 * len(self.mapping.log_qb_list) + log_index1
+
+    def _update_interaction_index(self, hard_index0: int, hard_index1: int):
+        hard2log = self.mapping.hard2log_array
+        for hard_index in (hard_index0, hard_index1):
+            log_index = int(hard2log[hard_index])
+            for neighbor, edge_id in self._incident_edges[hard_index]:
+                if self._pair_key(log_index, int(hard2log[neighbor])) in self._pending_keys:
+                    self.executable_edges.add(edge_id)
+                else:
+                    self.executable_edges.discard(edge_id)
+
+    @classmethod
+    def from_layers(cls, problem_instance: dimod.BinaryQuadraticModel, qpu: Type[QPU], initial_mapping: Mapping,
+                    layers: List[Layer]) -> 'Routing':
+        """
+        Routing of problem_instance consisting of the given layers. The layers are replayed on initial_mapping to
+        obtain the final mapping and the remaining interactions.
+        """
+        routing = cls(problem_instance, qpu, initial_mapping=initial_mapping)
+        routing.layers = layers
+        qubit_list = qpu.qubit_list
+        for layer in layers:
+            for edge_id in np.flatnonzero(layer.int):
+                qb0, qb1 = qpu.edge_array[edge_id]
+                log_qb0 = routing.mapping.hard2log[qubit_list[qb0]]
+                log_qb1 = routing.mapping.hard2log[qubit_list[qb1]]
+                routing.remaining_interactions.remove_edge(log_qb0, log_qb1)
+            routing.mapping.update(layer)
+        routing._build_interaction_index()
+        routing.scheduler.rebuild(layers)
+        return routing
+
+    def embed(self, qpu: Type[QPU]) -> 'Routing':
+        """
+        This routing on qpu, a device containing self.qpu (e.g. the device self.qpu was cut from with
+        qpu.compact_region and qpu.subdevice). The qubits of qpu outside self.qpu are empty sites.
+        """
+        edge_map = np.array([qpu.edge_index[self.qpu.edge_qubits(edge_id)]
+                             for edge_id in range(len(self.qpu.edge_array))], dtype=np.int64)
+        initial_mapping = Mapping(qpu, self.problem, {hard_qb: log_qb for hard_qb, log_qb
+                                                      in self.initial_mapping.hard2log.items() if log_qb is not None})
+        return Routing.from_layers(self.problem, qpu, initial_mapping,
+                                   [layer.embed(qpu, edge_map) for layer in self.layers])
+
+    def closed_layer_count(self) -> int:
+        """
+        Number of leading layers that can not receive any further gate, because every hardware edge is blocked
+        (see Layer.blocked_edges) in that layer or a later one. The last layer is never counted as closed.
+        """
+        last_blocked = self.scheduler.earliest_layers().min(initial=len(self.layers) + self.scheduler.offset) - 1
+        return int(min(max(last_blocked - self.scheduler.offset, 0), len(self.layers) - 1))
+
+    def open_layer(self) -> Layer:
+        self.layers.append(Layer(self.qpu))
+        self.profiler.count('layers_opened')
+        return self.layers[-1]
+
+    def pop_front_layer(self) -> Layer:
+        """Removes and returns the first layer, e.g. once it is closed (see closed_layer_count)."""
+        self.scheduler.offset += 1
+        return self.layers.pop(0)
+
+    def _layer_index(self, layer_number: int) -> int:
+        """Index into self.layers of scheduler layer layer_number, opening a new layer if it is past the last one."""
+        layer_index = max(layer_number - self.scheduler.offset, 0)
+        if layer_index == len(self.layers):
+            self.open_layer()
+        return layer_index
 
     def apply_swap(self, gate: frozenset, attempt_int: bool = False):
-        assert self.qpu.has_edge(gate), 'SWAP gate not supported on hardware graph'
-
-        def internal_apply_swap(layer_index: int):
-            self.layers[layer_index].apply_swap_gate(gate)
-            self.mapping.swap(gate)
-            if attempt_int:
-                log_qb0, log_qb1 = self.mapping.hard2log(list(gate)[0]), self.mapping.hard2log(list(gate)[1])
-                if self.remaining_interactions.has_edge(log_qb0, log_qb1):
-                    self.apply_int(gate)
-
-        if not self.layers[-1].swap_gate_applicable(gate):
-            self.layers.append(Layer(self.qpu))
-            internal_apply_swap(-1)
+        """
+        Adds a SWAP gate in the earliest layer after the last gate on one of its qubits (found in O(1) by the
+        scheduler) and applies it to the mapping.
+        """
+        edge_id = self.qpu.edge_id(gate)
+        assert edge_id >= 0, 'SWAP gate not supported on hardware graph'
+        layer_index = self._layer_index(self.scheduler.swap_layer(edge_id))
+        layer = self.layers[layer_index]
+        layer.apply_swap_gate(gate)
+        qb0, qb1 = self.qpu.edge_array[edge_id].tolist()
+        if layer.busy[qb0] == -1:
+            # cancelled out with a SWAP gate already in that layer
+            self.scheduler.rescan_qubit(qb0, self.layers)
+            self.scheduler.rescan_qubit(qb1, self.layers)
         else:
-            if len(self.layers) == 1:
-                internal_apply_swap(-1)
-            else:
-                for layer_index in range(len(self.layers)-1, 0, -1):
-                    if not self.layers[layer_index - 1].swap_gate_applicable(gate):
-                        internal_apply_swap(layer_index)
-                        break
-                    elif layer_index == 1:
-                        internal_apply_swap(0)
+            self.scheduler.place(edge_id, layer_index + self.scheduler.offset, is_int=False)
+        self.profiler.count('swaps_applied')
+        self.mapping.swap(gate)
+        self._update_interaction_index(qb0, qb1)
+        if attempt_int and edge_id in self.executable_edges:
+            self.apply_int(gate)
 
     def apply_int(self, gate: frozenset):
-        assert self.qpu.has_edge(gate), 'INT gate not supported on hardware graph'
-        log_qb0, log_qb1 = self.mapping.hard2log[list(gate)[0]], self.mapping.hard2log[list(gate)[1]]
-        assert self.remaining_interactions.has_edge(log_qb0, log_qb1), 'int gate does not process any remaining interaction'
-
-        if not self.layers[-1].int_gate_applicable(gate):
-            self.layers.append(Layer(self.qpu))
-            self.layers[-1].apply_int_gate(gate)
-            self.remaining_interactions.remove_edge(log_qb0, log_qb1)
-        else:
-            if len(self.layers) == 1:
-                self.layers[-1].apply_int_gate(gate)
-                self.remaining_interactions.remove_edge(log_qb0, log_qb1)
-            else:
-                for layer_index in range(len(self.layers)-1, 0, -1):
-                    if not self.layers[layer_index - 1].int_gate_applicable(gate):
-                        self.layers[layer_index].apply_int_gate(gate)
-                        self.remaining_interactions.remove_edge(log_qb0, log_qb1)
-                        break
+        """Adds an int gate in the earliest layer it fits into (see apply_swap)."""
+        edge_id = self.qpu.edge_id(gate)
+        assert edge_id >= 0, 'INT gate not supported on hardware graph'
+        assert edge_id in self.executable_edges, 'int gate does not process any remaining interaction'
+        layer_index = self._layer_index(self.scheduler.int_layer(edge_id))
+        self.layers[layer_index].apply_int_gate(gate)
+        self.scheduler.place(edge_id, layer_index + self.scheduler.offset, is_int=True)
+
+        log_index0, log_index1 = self.mapping.hard2log_array[self.qpu.edge_array[edge_id]].tolist()
+        self.remaining_interactions.remove_edge(self.mapping.log_qb_list[log_index0],
+                                                self.mapping.log_qb_list[log_index1])
+        self._pending_keys.discard(self._pair_key(log_index0, log_index1))
+        self.executable_edges.discard(edge_id)
 
     def draw(self):
         layer_count = len(self.layers)
         if layer_count > 1:
             layer_batches = [self.layers[x:x+9] for x in range(0, len(self.layers), 9)]
-            mapping = cp.deepcopy(self.initial_mapping)
+            mapping = self.initial_mapping.copy()
             layer_index = 0
             for layers in layer_batches:
                 fig, axs = plt.subplots(3, 3, subplot_kw={'clip_on': False, 'frame_on': False})
@@ -157,32 +335,87 @@ class Routing:
         else:
             self.layers[0].draw(mapping=self.initial_mapping)
 
-    def build_cirq(self, betas, gammas):
-
-        circuit = cirq.Circuit()
-        swap_gate = cirq.SWAP
-        layers = self.layers
+    def _phase_moments(self, layer: Layer, mapping: Mapping, gamma) -> List[cirq.Moment]:
+        qubit_list = self.qpu.qubit_list
+        operations, trailing_swaps = [], []
+        for edge_id in np.flatnonzero(layer.int):
+            hard_qb0, hard_qb1 = (qubit_list[qb] for qb in self.qpu.edge_array[edge_id])
+            weight = float(self.problem.adj[mapping.hard2log[hard_qb0]][mapping.hard2log[hard_qb1]])
+            zz_gate = cirq.ZZPowGate(exponent=2 * gamma * weight / np.pi, global_shift=-0.5)
+            operations.append(zz_gate.on(hard_qb0, hard_qb1))
+        for edge_id in np.flatnonzero(layer.swap):
+            swap_gate = cirq.SWAP.on(*(qubit_list[qb] for qb in self.qpu.edge_array[edge_id]))
+            if layer.int[edge_id]:
+                trailing_swaps.append(swap_gate)
+            else:
+                operations.append(swap_gate)
+        return [cirq.Moment(ops) for ops in (operations, trailing_swaps) if len(ops) > 0]
 
+    def build_cirq(self, depth: int = 1, gammas=None, betas=None) -> cirq.Circuit:
+        """
+        Compiles the routing into a QAOA circuit on the hardware qubits. By default the angles are the sympy symbols
+        gamma_k and beta_k (see qaoa_symbols), so the circuit is built once and resolved for every parameter point,
+        e.g. with cirq.Simulator().simulate(circuit, param_resolver={'gamma_0': 0.1, 'beta_0': 0.2}).
+        The layers are traversed in reverse order on every second round, which undoes the permutation of the previous
+        round: after an even number of rounds the logical qubits are back at the initial mapping, after an odd
+        number they are at the final mapping of the routing. Empty sites of a partial mapping stay in |0>.
+        """
+        if gammas is None or betas is None:
+            gammas, betas = qaoa_symbols(depth)
+        mapping = self.initial_mapping.copy()
+        moments = [cirq.Moment(cirq.H(hard_qb) for hard_qb in mapping.occupied_hard_qbs())]
+        layers = list(self.layers)
         for gamma, beta in zip(gammas, betas):
-            for layer in self.layers:
-                gate_list = []
-                for gate_qbs in layer['swap']:
-                    gate_list.append(swap_gate(*gate_qbs))
-                circuit.append(gate_list)
-
-                gate_list = []
-                for gate_qbs in layer['int']:
-                    log_qb0 = self.hard2log[gate_qbs[0]]
-                    log_qb1 = self.hard2log[gate_qbs[1]]
-                    weight = self.logical_graph.edges[log_qb0, log_qb1]['weight']
-                    gate_list.append(gates.Rzz(gamma * weight).on(*gate_qbs))
-                circuit.append(gate_list)
+            linear_ops = [cirq.rz(2 * gamma * float(bias)).on(mapping.log2hard[log_qb])
+                          for log_qb, bias in self.problem.linear.items() if bias != 0]
+            if len(linear_ops) > 0:
+                moments.append(cirq.Moment(linear_ops))
+            for layer in layers:
+                moments.extend(self._phase_moments(layer, mapping, gamma))
+                mapping.update(layer)
             layers.reverse()
-            cirq.Rx(2 * beta).on_each(*self.hardware_graph.nodes)
-
+            moments.append(cirq.Moment(cirq.rx(2 * beta).on(hard_qb) for hard_qb in mapping.occupied_hard_qbs()))
+        return cirq.Circuit(moments)
 
 
+def stream_layers(steps: Iterator[Routing], window: int = 8) -> Iterator[StreamedLayer]:
+    """
+    Turns a router that yields its Routing after every step into a stream of finished layers. After each step the
+    closed layers are removed from the front of routing.layers and yielded, so only the open layers are kept in
+    memory; when the router is done the remaining layers are yielded as well.
+    Gates on idle hardware edges may still be placed in early layers, so without a window (window=None) the open
+    layers can span most of the routing and hardly any layer is yielded before the router is done. With a window,
+    the oldest layers are closed early as soon as more than window layers are open. Gates that would have gone
+    into them are placed later instead, which bounds memory and latency at the price of a possibly deeper
+    routing: with the default of 8, greedy_router on 8x8 to 12x12 grids yields two thirds or more of its layers
+    early and gets at most 2 layers deeper, while windows of 2 to 4 cost up to 20 % more depth.
+    """
+    routing, mapping, index = None, None, 0
+    for routing in steps:
+        if mapping is None:
+            mapping = routing.initial_mapping.copy()
+        close_count = routing.closed_layer_count()
+        if window is not None:
+            close_count = max(close_count, len(routing.layers) - window)
+        for _ in range(min(close_count, len(routing.layers) - 1)):
+            streamed_layer, mapping = _streamed_layer(index, routing.pop_front_layer(), mapping)
+            index += 1
+            yield streamed_layer
+    if routing is not None:
+        for layer in routing.layers:
+            streamed_layer, mapping = _streamed_layer(index, layer, mapping)
+            index += 1
+            yield streamed_layer
 
 
+def _streamed_layer(index: int, layer: Layer, mapping: Mapping) -> Tuple[StreamedLayer, Mapping]:
+    next_mapping = mapping.copy()
+    next_mapping.update(layer)
+    mapping_delta = {hard_qb: next_mapping.hard2log[hard_qb] for gate in layer.swap_gates() for hard_qb in gate}
+    return StreamedLayer(index, layer, mapping, mapping_delta), next_mapping
 
 
+def qaoa_symbols(depth: int) -> Tuple[List[sympy.Symbol], List[sympy.Symbol]]:
+    gammas = [sympy.Symbol(f'gamma_{k}') for k in range(depth)]
+    betas = [sympy.Symbol(f'beta_{k}') for k in range(depth)]
+    return gammas, betas
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import tempfile
+from functools import wraps
+from typing import Callable, Type
+
+import numpy as np
+import dimod
+
+from Devices.quantum_hardware import QPU
+from Router.routing import Routing
+from Router.routing_io import canonical_variables, save_routing, load_routing
+
+
+def problem_structure_hash(problem: dimod.BinaryQuadraticModel) -> str:
+    """Hash of the variables and the interaction graph of problem; biases do not contribute."""
+    variables = canonical_variables(problem)
+    index = {variable: position for position, variable in enumerate(variables)}
+    edges = sorted(tuple(sorted((index[u], index[v]))) for u, v in problem.quadratic)
+    digest = hashlib.sha256(repr(variables).encode())
+    digest.update(np.array(edges, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def qpu_hash(qpu: Type[QPU]) -> str:
+    digest = hashlib.sha256(repr(qpu.qubit_list).encode())
+    digest.update(qpu.edge_array.tobytes())
+    return digest.hexdigest()
+
+
+class RoutingCache:
+    """
+    Content addressed on-disk cache of routings. Routers only look at the interaction graph of a problem, so a
+    routing is stored under a hash of the problem structure, the hardware graph and the router, and is rebound to
+    the weights of whatever problem of the same structure is routed next. Every entry is one .npz file written by
+    routing_io.save_routing; the least recently used entries are deleted once the directory grows beyond max_bytes.
+    Usage is like joblib.Memory:
+
+        cached_router = RoutingCache('./Data/routing_cache').cache(greedy_router)
+        routing = cached_router(bqm, qpu)
+    """
+    def __init__(self, directory: str = './Data/routing_cache', max_bytes: int = 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, problem: dimod.BinaryQuadraticModel, qpu: Type[QPU], router_name: str) -> str:
+        digest = hashlib.sha256(router_name.encode())
+        digest.update(problem_structure_hash(problem).encode())
+        digest.update(qpu_hash(qpu).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key: str, problem: dimod.BinaryQuadraticModel, qpu: Type[QPU]) -> Routing:
+        """The routing stored under key, rebound to problem, or None on a miss."""
+        path = self.path(key)
+        try:
+            routing = load_routing(path, problem, qpu)
+        except (OSError, KeyError, ValueError, AssertionError):
+            return None
+        os.utime(path)
+        return routing
+
+    def store(self, key: str, routing: Routing):
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as file:
+            save_routing(routing, file)
+        os.replace(file.name, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits into max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total_bytes -= size
+
+    def cache(self, router: Callable[[dimod.BinaryQuadraticModel, Type[QPU]], Routing]) -> Callable:
+        router_name = f'{router.__module__}.{router.__qualname__}'
+
+        @wraps(router)
+        def cached_router(problem: dimod.BinaryQuadraticModel, qpu: Type[QPU]) -> Routing:
+            key = self.key(problem, qpu, router_name)
+            routing = self.load(key, problem, qpu)
+            if routing is None:
+                routing = router(problem, qpu)
+                self.store(key, routing)
+            return routing
+        return cached_router
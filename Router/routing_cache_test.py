@@ -0,0 +1,64 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Router.routing_cache import RoutingCache, problem_structure_hash
+from Router.GreedyRouter.greedy_router import greedy_router
+from Devices.quantum_hardware import Grid2dQPU
+
+
+class TestRoutingCache(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.qpu = Grid2dQPU(4, 4)
+        self.problem_graph = nx.random_regular_graph(3, 16, seed=1)
+        self.calls = 0
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def counting_router(self, problem, qpu):
+        self.calls += 1
+        return greedy_router(problem, qpu)
+
+    def test_structure_hash(self):
+        bqm0 = dimod.generators.uniform(self.problem_graph, dimod.SPIN, seed=0)
+        bqm1 = dimod.generators.uniform(self.problem_graph, dimod.SPIN, seed=1)
+        other = dimod.generators.uniform(nx.random_regular_graph(3, 16, seed=2), dimod.SPIN, seed=0)
+        self.assertEqual(problem_structure_hash(bqm0), problem_structure_hash(bqm1), msg='hash depends on biases')
+        self.assertNotEqual(problem_structure_hash(bqm0), problem_structure_hash(other), msg='hash ignores structure')
+
+    def test_rebind(self):
+        cached_router = RoutingCache(self.directory.name).cache(self.counting_router)
+        bqm0 = dimod.generators.uniform(self.problem_graph, dimod.SPIN, seed=0)
+        bqm1 = dimod.generators.uniform(self.problem_graph, dimod.SPIN, seed=1)
+        routing0 = cached_router(bqm0, self.qpu)
+        routing1 = cached_router(bqm1, self.qpu)
+        self.assertEqual(self.calls, 1, msg='second routing of the same structure was not a cache hit')
+        self.assertIs(routing1.problem, bqm1, msg='cached routing was not rebound to the new problem')
+        self.assertEqual(routing1.remaining_interactions.number_of_edges(), 0, msg='rebound routing is incomplete')
+        self.assertEqual(len(routing0.layers), len(routing1.layers), msg='layer count changed')
+        for layer0, layer1 in zip(routing0.layers, routing1.layers):
+            self.assertTrue(np.array_equal(layer0.int, layer1.int) and np.array_equal(layer0.swap, layer1.swap),
+                            msg='layers changed')
+            self.assertTrue(np.array_equal(layer0.busy, layer1.busy), msg='busy qubits were not restored')
+        self.assertTrue(np.array_equal(routing0.mapping.hard2log_array, routing1.mapping.hard2log_array),
+                        msg='final mapping changed')
+
+    def test_eviction(self):
+        cache = RoutingCache(self.directory.name)
+        cached_router = cache.cache(self.counting_router)
+        bqms = [dimod.generators.uniform(nx.random_regular_graph(3, 16, seed=seed), dimod.SPIN) for seed in range(4)]
+        cached_router(bqms[0], self.qpu)
+        entry_size = max(os.path.getsize(os.path.join(self.directory.name, name))
+                         for name in os.listdir(self.directory.name))
+        cache.max_bytes = 2 * entry_size + 64
+        for bqm in bqms[1:]:
+            cached_router(bqm, self.qpu)
+        self.assertLessEqual(len(os.listdir(self.directory.name)), 2, msg='cache exceeds its size limit')
+        cached_router(bqms[-1], self.qpu)
+        self.assertEqual(self.calls, 4, msg='most recently used entry was evicted')
@@ -0,0 +1,106 @@
+from typing import Iterator, List, Tuple, Type
+
+import numpy as np
+import dimod
+
+from Devices.quantum_hardware import QPU
+from Router.mapping import Mapping
+from Router.routing import Layer, Routing
+
+
+FORMAT_VERSION = 1
+
+
+def canonical_variables(problem: dimod.BinaryQuadraticModel) -> List:
+    """The variables of problem in a label-determined order, independent of the order they were added in."""
+    return sorted(problem.variables, key=repr)
+
+
+def save_routing(routing: Routing, file):
+    """
+    Writes routing to file (a path or binary file object) as uncompressed .npz containing only integer arrays:
+    edge_array (the hardware edge index the masks refer to), initial_hard2log (position of the logical qubit of
+    every hardware qubit in canonical_variables(problem), -1 for empty sites) and the packed per-layer bitsets int and swap of shape
+    (layer count, ceil(edge count / 8)). The problem and the device are not stored; they are passed on loading.
+    """
+    variables = canonical_variables(routing.problem)
+    position = {variable: index for index, variable in enumerate(variables)}
+    mapping = routing.initial_mapping
+    initial_hard2log = np.array([position.get(mapping.hard2log[hard_qb], -1) for hard_qb in mapping.hard_qb_list],
+                                dtype=np.int64)
+    if isinstance(file, str):
+        with open(file, 'wb') as file_object:
+            return save_routing(routing, file_object)
+    np.savez(file, format_version=np.array(FORMAT_VERSION), edge_array=routing.qpu.edge_array,
+             initial_hard2log=initial_hard2log,
+             int=np.packbits(np.array([layer.int for layer in routing.layers]), axis=1),
+             swap=np.packbits(np.array([layer.swap for layer in routing.layers]), axis=1))
+
+
+class RoutingArchive:
+    """
+    Lazy reader of a file written by save_routing. Only the small index arrays are read on construction, the
+    packed int and swap bitsets on the first access to a layer; Layer objects are built one at a time by layer()
+    and iter_layers(), so a circuit builder can stream through a long routing without materializing all of its
+    layers.
+    """
+    def __init__(self, file):
+        self._data = np.load(file)
+        assert int(self._data['format_version']) == FORMAT_VERSION, 'unsupported routing file version'
+        self.edge_array = self._data['edge_array']
+        self.initial_hard2log = self._data['initial_hard2log']
+        self._int = None
+        self._swap = None
+
+    def __len__(self) -> int:
+        if self._int is not None:
+            return len(self._int)
+        with self._data.zip.open('int.npy') as member:
+            version = np.lib.format.read_magic(member)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(member)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(member)
+        return shape[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._data.close()
+
+    def check_qpu(self, qpu: Type[QPU]):
+        assert np.array_equal(qpu.edge_array, self.edge_array), 'routing was stored for a different hardware graph'
+
+    def layer_masks(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Boolean int and swap masks over the hardware edges of layer index."""
+        if self._int is None:
+            self._int, self._swap = self._data['int'], self._data['swap']
+        edge_count = len(self.edge_array)
+        return (np.unpackbits(self._int[index], count=edge_count).astype(bool),
+                np.unpackbits(self._swap[index], count=edge_count).astype(bool))
+
+    def layer(self, index: int, qpu: Type[QPU]) -> Layer:
+        return Layer.from_arrays(qpu, *self.layer_masks(index))
+
+    def iter_layers(self, qpu: Type[QPU]) -> Iterator[Layer]:
+        self.check_qpu(qpu)
+        for index in range(len(self)):
+            yield self.layer(index, qpu)
+
+    def initial_mapping(self, problem: dimod.BinaryQuadraticModel, qpu: Type[QPU]) -> Mapping:
+        variables = canonical_variables(problem)
+        return Mapping(qpu, problem, {qpu.qubit_list[hard_index]: variables[log_index]
+                                      for hard_index, log_index in enumerate(self.initial_hard2log) if log_index >= 0})
+
+    def routing(self, problem: dimod.BinaryQuadraticModel, qpu: Type[QPU]) -> Routing:
+        """Fully materialized Routing of problem (which may have other biases than the stored one) on qpu."""
+        return Routing.from_layers(problem, qpu, self.initial_mapping(problem, qpu), list(self.iter_layers(qpu)))
+
+
+def load_routing(file, problem: dimod.BinaryQuadraticModel, qpu: Type[QPU]) -> Routing:
+    with RoutingArchive(file) as archive:
+        return archive.routing(problem, qpu)
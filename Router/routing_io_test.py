@@ -0,0 +1,56 @@
+import io
+import pickle
+from unittest import TestCase
+
+import numpy as np
+import networkx as nx
+import dimod
+
+from Router.routing_io import save_routing, load_routing, RoutingArchive
+from Router.GreedyRouter.greedy_router import greedy_router
+from Devices.quantum_hardware import Grid2dQPU
+
+
+class TestRoutingIO(TestCase):
+    def setUp(self) -> None:
+        self.qpu = Grid2dQPU(6, 6)
+        self.bqm = dimod.generators.uniform(nx.random_regular_graph(4, 36, seed=0), dimod.SPIN, seed=0)
+        self.routing = greedy_router(self.bqm, self.qpu)
+        self.file = io.BytesIO()
+        save_routing(self.routing, self.file)
+        self.file.seek(0)
+
+    def test_round_trip(self):
+        loaded = load_routing(self.file, self.bqm, self.qpu)
+        self.assertEqual(len(loaded.layers), len(self.routing.layers), msg='layer count changed')
+        for layer, loaded_layer in zip(self.routing.layers, loaded.layers):
+            self.assertTrue(np.array_equal(layer.int, loaded_layer.int), msg='int gates changed')
+            self.assertTrue(np.array_equal(layer.swap, loaded_layer.swap), msg='swap gates changed')
+        for hard_qb in self.qpu.qubit_list:
+            self.assertEqual(self.routing.initial_mapping.hard2log[hard_qb], loaded.initial_mapping.hard2log[hard_qb],
+                             msg='initial mapping changed')
+            self.assertEqual(self.routing.mapping.hard2log[hard_qb], loaded.mapping.hard2log[hard_qb],
+                             msg='final mapping changed')
+        self.assertEqual(loaded.remaining_interactions.number_of_edges(), 0, msg='loaded routing is incomplete')
+
+    def test_lazy_layers(self):
+        with RoutingArchive(self.file) as archive:
+            self.assertEqual(len(archive), len(self.routing.layers), msg='wrong layer count')
+            self.assertIsNone(archive._int, msg='layer bitsets read before any layer was accessed')
+            for layer, streamed_layer in zip(self.routing.layers, archive.iter_layers(self.qpu)):
+                self.assertTrue(np.array_equal(layer.busy, streamed_layer.busy), msg='busy qubits changed')
+
+    def test_size(self):
+        self.assertLess(len(self.file.getvalue()), len(pickle.dumps(self.routing)) / 10,
+                        msg='serialized routing is not compact')
+
+    def test_partial_mapping(self):
+        bqm = dimod.generators.uniform(nx.random_regular_graph(3, 20, seed=1), dimod.SPIN, seed=1)
+        routing = greedy_router(bqm, self.qpu)
+        file = io.BytesIO()
+        save_routing(routing, file)
+        file.seek(0)
+        loaded = load_routing(file, bqm, self.qpu)
+        for hard_qb in self.qpu.qubit_list:
+            self.assertEqual(routing.mapping.hard2log[hard_qb], loaded.mapping.hard2log[hard_qb],
+                             msg='final mapping changed')
@@ -4,9 +4,11 @@ import copy as cp
 import cirq
 import networkx as nx
 import dimod
+import numpy as np
 from numpy.random import choice
 
 from Router.routing import Layer, Routing
+from Router.GreedyRouter.greedy_router import greedy_router
 from Router.mapping import Mapping
 from Devices.quantum_hardware import Grid2dQPU
 
@@ -72,6 +74,18 @@ class TestLayer(TestCase):
         self.layer.apply_swap_gate(gate)
         self.layer.apply_swap_gate(gate)
         self.assertFalse(self.layer.gates[hard_qb0][hard_qb1]['swap'], msg="did not delete swap operation after second application")
+        self.assertTrue(self.layer.swap_gate_applicable(frozenset((hard_qb0, cirq.GridQubit(0, 1)))),
+                        msg="qubits still busy after swap operation got deleted")
+
+    def test_busy_mask(self):
+        gate = frozenset((cirq.GridQubit(1, 1), cirq.GridQubit(1, 2)))
+        self.layer.apply_swap_gate(gate)
+        self.layer.apply_int_gate(gate)
+        edge_id = self.layer.qpu.edge_id(gate)
+        for hard_qb in gate:
+            self.assertEqual(edge_id, self.layer.busy[self.layer.qpu.qubit_index[hard_qb]], msg="busy mask not updated")
+        self.assertSetEqual({gate}, set(self.layer.swap_gates()), msg="swap gates of layer are not reported correctly")
+        self.assertSetEqual({gate}, set(self.layer.int_gates()), msg="int gates of layer are not reported correctly")
 
 
 class TestRouting(TestCase):
@@ -122,9 +136,123 @@ class TestRouting(TestCase):
                          msg='interaction has not been deleted from routing.remaining_interactions')
 
 
+class TestBuildCirq(TestCase):
+    def setUp(self) -> None:
+        self.qpu = Grid2dQPU(2, 2)
+        self.problem_instance = dimod.generators.uniform(nx.complete_graph(4), dimod.SPIN, low=-1.0, high=1.0)
+        for log_qb in self.problem_instance.variables:
+            self.problem_instance.set_linear(log_qb, 0.1 * (log_qb + 1))
+        self.routing = greedy_router(self.problem_instance, self.qpu)
+
+    def logical_expectation(self, gammas, betas) -> float:
+        log_qbs = list(self.problem_instance.variables)
+        spins = 1 - 2 * ((np.arange(2 ** len(log_qbs))[:, None] >> np.arange(len(log_qbs))[::-1]) & 1)
+        energies = np.array([self.problem_instance.energy(dict(zip(log_qbs, sample))) for sample in spins])
+        state = np.full(2 ** len(log_qbs), 2 ** (-len(log_qbs) / 2), dtype=complex)
+        for gamma, beta in zip(gammas, betas):
+            state = np.exp(-1j * gamma * (energies - self.problem_instance.offset)) * state
+            mixer = np.array([[np.cos(beta), -1j * np.sin(beta)], [-1j * np.sin(beta), np.cos(beta)]])
+            full_mixer = np.array([[1.0]])
+            for _ in log_qbs:
+                full_mixer = np.kron(full_mixer, mixer)
+            state = full_mixer @ state
+        return float(np.sum(np.abs(state) ** 2 * energies))
+
+    def hardware_expectation(self, circuit, resolver, depth) -> float:
+        qubit_order = self.qpu.qubit_list
+        result = cirq.Simulator().simulate(circuit, param_resolver=resolver, qubit_order=qubit_order)
+        probabilities = np.abs(result.final_state_vector) ** 2
+        mapping = self.routing.initial_mapping.copy()
+        if depth % 2 == 1:
+            for layer in self.routing.layers:
+                mapping.update(layer)
+        expectation = 0
+        for index, probability in enumerate(probabilities):
+            bits = [(index >> (len(qubit_order) - 1 - qb)) & 1 for qb in range(len(qubit_order))]
+            sample = {mapping.hard2log[hard_qb]: 1 - 2 * bit for hard_qb, bit in zip(qubit_order, bits)
+                      if mapping.hard2log[hard_qb] is not None}
+            expectation += probability * self.problem_instance.energy(sample)
+        return expectation
+
+    def test_build_cirq(self):
+        for depth in (1, 2):
+            circuit = self.routing.build_cirq(depth)
+            for gammas, betas in (([0.3, -0.2], [0.7, 0.1]), ([1.1, 0.4], [-0.3, 0.5])):
+                resolver = {**{f'gamma_{k}': gammas[k] for k in range(depth)},
+                            **{f'beta_{k}': betas[k] for k in range(depth)}}
+                self.assertAlmostEqual(self.logical_expectation(gammas[:depth], betas[:depth]),
+                                       self.hardware_expectation(circuit, resolver, depth), places=4,
+                                       msg='compiled circuit does not reproduce the QAOA expectation value')
 
+    def test_moment_packing(self):
+        circuit = self.routing.build_cirq(1)
+        gate_count = sum(len(layer.int_gates()) + len(layer.swap_gates()) for layer in self.routing.layers)
+        self.assertEqual(gate_count, sum(1 for op in circuit.all_operations() if len(op.qubits) == 2))
+        self.assertTrue(len(circuit) <= 2 * len(self.routing.layers) + 3, msg='gates of a layer are not packed into shared moments')
 
 
+class TestPartialBuildCirq(TestBuildCirq):
+    def setUp(self) -> None:
+        super().setUp()
+        self.qpu = Grid2dQPU(2, 3)
+        self.routing = greedy_router(self.problem_instance, self.qpu, compact=False)
+
+    def test_empty_sites(self):
+        self.assertEqual(2, len(self.qpu.qubit_list) - len(self.routing.initial_mapping.occupied_hard_qbs()))
+        mapping = self.routing.initial_mapping.copy()
+        for layer in self.routing.layers:
+            mapping.update(layer)
+        circuit = self.routing.build_cirq(1)
+        result = cirq.Simulator().simulate(circuit, param_resolver={'gamma_0': 0.3, 'beta_0': 0.7},
+                                           qubit_order=self.qpu.qubit_list)
+        probabilities = np.abs(result.final_state_vector) ** 2
+        for hard_index, hard_qb in enumerate(self.qpu.qubit_list):
+            if mapping.hard2log[hard_qb] is None:
+                excited = (np.arange(len(probabilities)) >> (len(self.qpu.qubit_list) - 1 - hard_index)) & 1
+                self.assertAlmostEqual(0., probabilities[excited == 1].sum(), msg='empty site left |0>')
+
+
+class TestCompactRegion(TestCase):
+    def setUp(self) -> None:
+        self.qpu = Grid2dQPU(8, 8)
+        self.bqm = dimod.generators.uniform(nx.random_regular_graph(3, 12, seed=0), dimod.SPIN, seed=0)
+
+    def test_embed(self):
+        routing = greedy_router(self.bqm, self.qpu)
+        self.assertIs(self.qpu, routing.qpu)
+        self.assertEqual(0, routing.remaining_interactions.number_of_edges(), msg='not all interactions were routed')
+        occupied = routing.initial_mapping.occupied_hard_qbs()
+        self.assertEqual(12, len(occupied))
+        self.assertTrue(nx.is_connected(self.qpu.graph.subgraph(occupied)), msg='problem was not routed on a region')
+        full_device = greedy_router(self.bqm, self.qpu, compact=False)
+        self.assertEqual(0, full_device.remaining_interactions.number_of_edges(), msg='not all interactions were routed')
+
+
+class TestInteractionIndex(TestCase):
+    def setUp(self) -> None:
+        self.qpu = Grid2dQPU(4, 5)
+        self.problem_instance = dimod.generators.uniform(nx.random_regular_graph(4, 16, seed=0), dimod.SPIN, seed=0)
+        self.routing = Routing(self.problem_instance, self.qpu)
 
+    def brute_force_executable_edges(self):
+        return {edge_id for edge_id in range(len(self.qpu.edge_array))
+                if self.routing.remaining_interactions.has_edge(
+                    *(self.routing.mapping.hard2log[hard_qb] for hard_qb in self.qpu.edge_qubits(edge_id)))}
 
+    def test_executable_edges(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            if len(self.routing.executable_edges) > 0 and rng.random() < 0.3:
+                self.routing.apply_int(self.qpu.edge_qubits(min(self.routing.executable_edges)))
+            else:
+                self.routing.apply_swap(self.qpu.edge_qubits(rng.integers(len(self.qpu.edge_array))),
+                                        attempt_int=rng.random() < 0.5)
+            self.assertEqual(self.brute_force_executable_edges(), self.routing.executable_edges,
+                             msg='interaction index out of date')
 
+    def test_from_layers(self):
+        routing = greedy_router(self.problem_instance, self.qpu)
+        replayed = Routing.from_layers(self.problem_instance, self.qpu, routing.initial_mapping, routing.layers[:3])
+        self.routing = replayed
+        self.assertEqual(self.brute_force_executable_edges(), replayed.executable_edges,
+                         msg='interaction index not rebuilt after replay')
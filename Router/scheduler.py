@@ -0,0 +1,100 @@
+from typing import List, Tuple, Type
+
+import numpy as np
+
+from Devices.quantum_hardware import QPU
+
+
+class LayerScheduler:
+    """
+    ASAP placement of gates into the layers of a routing in O(1) per gate. For every hardware qubit q it keeps the
+    frontier last[q], the last layer in which q is busy, edge[q], the edge q is busy with there, and before[q], the
+    last layer in which q is busy with any other edge (-1 if none). A gate on edge e can be placed in every layer
+    after the last one in which one of its qubits is busy with another edge, which is before[q] if edge[q] == e and
+    last[q] otherwise; an int gate additionally has to follow the last int gate on e (last_int[e]).
+    Layer numbers count from the first layer of the routing, including the offset layers that were removed from the
+    front of routing.layers (see Routing.pop_front_layer).
+    """
+    def __init__(self, qpu: Type[QPU]):
+        self.qpu = qpu
+        qubit_count = len(qpu.qubit_list)
+        self.last = np.full(qubit_count, -1, dtype=np.int64)
+        self.edge = np.full(qubit_count, -1, dtype=np.int64)
+        self.before = np.full(qubit_count, -1, dtype=np.int64)
+        self.last_int = np.full(len(qpu.edge_array), -1, dtype=np.int64)
+        self.offset = 0
+
+    def blocking_layer(self, edge_id: int) -> int:
+        """Last layer in which a qubit of edge_id is busy with another edge, or -1."""
+        block = -1
+        for qb in self.qpu.edge_array[edge_id]:
+            qb_block = self.before[qb] if self.edge[qb] == edge_id else self.last[qb]
+            if qb_block > block:
+                block = qb_block
+        return int(block)
+
+    def swap_layer(self, edge_id: int) -> int:
+        """Earliest layer a SWAP gate on edge_id can be placed in."""
+        return self.blocking_layer(edge_id) + 1
+
+    def int_layer(self, edge_id: int) -> int:
+        """Earliest layer an int gate on edge_id can be placed in."""
+        return max(self.blocking_layer(edge_id), int(self.last_int[edge_id])) + 1
+
+    def place(self, edge_id: int, layer_number: int, is_int: bool):
+        """Records a gate on edge_id placed in layer layer_number (no earlier than swap_layer/int_layer allow)."""
+        for qb in self.qpu.edge_array[edge_id]:
+            if self.edge[qb] == edge_id:
+                self.last[qb] = max(self.last[qb], layer_number)
+            else:
+                self.before[qb] = self.last[qb]
+                self.last[qb] = layer_number
+                self.edge[qb] = edge_id
+        if is_int:
+            self.last_int[edge_id] = max(self.last_int[edge_id], layer_number)
+
+    def rescan_qubit(self, qb: int, layers: List):
+        """Recomputes the frontier of qb from the busy arrays of layers, e.g. after two SWAP gates cancelled out."""
+        self.last[qb] = self.edge[qb] = self.before[qb] = -1
+        for index in range(len(layers) - 1, -1, -1):
+            busy = layers[index].busy[qb]
+            if busy == -1:
+                continue
+            if self.last[qb] == -1:
+                self.last[qb], self.edge[qb] = index + self.offset, busy
+            elif busy != self.edge[qb]:
+                self.before[qb] = index + self.offset
+                break
+
+    def rebuild(self, layers: List):
+        """Frontier of the given layers, the first of them being layer offset."""
+        for qb in range(len(self.last)):
+            self.rescan_qubit(qb, layers)
+        self.last_int[:] = -1
+        for index, layer in enumerate(layers):
+            self.last_int[layer.int] = index + self.offset
+
+    def earliest_layers(self) -> np.ndarray:
+        """swap_layer for every edge id at once."""
+        edges = self.qpu.edge_array
+        edge_ids = np.arange(len(edges))
+        blocks = [np.where(self.edge[qbs] == edge_ids, self.before[qbs], self.last[qbs]) for qbs in edges.T]
+        return np.maximum(blocks[0], blocks[1]) + 1
+
+
+def compact(routing) -> Tuple[object, int]:
+    """
+    Reschedules routing ASAP: its gates are replayed layer by layer (int gates before the SWAP gates of a layer)
+    into a new routing on the same initial mapping, which moves every gate to the earliest layer its qubits allow.
+    Returns the new routing and the number of layers saved. Routings built by apply_swap/apply_int are compact up
+    to empty layers a router opened at the end (greedy_router drops them); routings assembled from layers (e.g. by
+    the swap network, routing_io or a streamed router with a window) may not be.
+    """
+    qpu = routing.qpu
+    compacted = type(routing)(routing.problem, qpu, initial_mapping=routing.initial_mapping)
+    for layer in routing.layers:
+        for edge_id in np.flatnonzero(layer.int):
+            compacted.apply_int(qpu.edge_qubits(edge_id))
+        for edge_id in np.flatnonzero(layer.swap):
+            compacted.apply_swap(qpu.edge_qubits(edge_id))
+    return compacted, len(routing.layers) - len(compacted.layers)
@@ -0,0 +1,120 @@
+from unittest import TestCase
+
+import networkx as nx
+import dimod
+import numpy as np
+
+from Router.routing import Layer, Routing
+from Router.scheduler import LayerScheduler, compact
+from Router.GreedyRouter.greedy_router import greedy_router
+from Router.SwapNetwork.swap_network import swap_network_router
+from Devices.quantum_hardware import Grid2dQPU
+
+
+def walk_back(layers, gate, applicable) -> int:
+    """Layer index found by walking back from the last layer, as Routing.apply_swap/apply_int used to do."""
+    if not applicable(layers[-1], gate):
+        layers.append(Layer(layers[-1].qpu))
+        return len(layers) - 1
+    for layer_index in range(len(layers) - 1, 0, -1):
+        if not applicable(layers[layer_index - 1], gate):
+            return layer_index
+    return 0
+
+
+class TestLayerScheduler(TestCase):
+    def test_placement_matches_walk_back(self):
+        qpu = Grid2dQPU(4, 3)
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            scheduler = LayerScheduler(qpu)
+            layers, reference = [Layer(qpu)], [Layer(qpu)]
+            for _ in range(200):
+                edge_id = int(rng.integers(len(qpu.edge_array)))
+                gate = qpu.edge_qubits(edge_id)
+                is_int = rng.random() < 0.5
+                if is_int:
+                    reference[walk_back(reference, gate, Layer.int_gate_applicable)].apply_int_gate(gate)
+                    layer_number = scheduler.int_layer(edge_id)
+                else:
+                    reference[walk_back(reference, gate, Layer.swap_gate_applicable)].apply_swap_gate(gate)
+                    layer_number = scheduler.swap_layer(edge_id)
+                if layer_number == len(layers):
+                    layers.append(Layer(qpu))
+                if is_int:
+                    layers[layer_number].apply_int_gate(gate)
+                else:
+                    layers[layer_number].apply_swap_gate(gate)
+                if layers[layer_number].busy[qpu.edge_array[edge_id][0]] == -1:
+                    for qb in qpu.edge_array[edge_id]:
+                        scheduler.rescan_qubit(qb, layers)
+                else:
+                    scheduler.place(edge_id, layer_number, is_int)
+                self.assertEqual(len(reference), len(layers), msg='scheduler opened a different number of layers')
+                for layer, reference_layer in zip(layers, reference):
+                    self.assertTrue(np.array_equal(layer.int, reference_layer.int), msg='int gates differ')
+                    self.assertTrue(np.array_equal(layer.swap, reference_layer.swap), msg='SWAP gates differ')
+
+    def test_rebuild(self):
+        qpu = Grid2dQPU(4, 4)
+        problem = dimod.generators.uniform(nx.random_regular_graph(3, 16, seed=1), dimod.SPIN, seed=1)
+        route = greedy_router(problem, qpu)
+        scheduler = LayerScheduler(qpu)
+        scheduler.rebuild(route.layers)
+        for name in ('last', 'edge', 'before', 'last_int'):
+            self.assertTrue(np.array_equal(getattr(scheduler, name), getattr(route.scheduler, name)),
+                            msg=f'rebuilt frontier differs in {name}')
+
+
+class TestClosedLayerCount(TestCase):
+    def test_matches_blocked_edges(self):
+        qpu = Grid2dQPU(4, 4)
+        problem = dimod.generators.uniform(nx.random_regular_graph(3, 16, seed=2), dimod.SPIN, seed=2)
+        full_route = greedy_router(problem, qpu)
+        layers = full_route.layers
+        for layer_count in range(1, len(layers) + 1):
+            route = Routing.from_layers(problem, qpu, full_route.initial_mapping, layers[:layer_count])
+            blocked, expected = np.zeros(len(qpu.edge_array), dtype=bool), 0
+            for layer_index in range(layer_count - 1, 0, -1):
+                blocked |= layers[layer_index].blocked_edges()
+                if blocked.all():
+                    expected = layer_index
+                    break
+            self.assertEqual(expected, route.closed_layer_count(), msg='closed layer count differs from blocked edges')
+
+
+class TestCompact(TestCase):
+    def assert_equivalent(self, route, compacted):
+        self.assertEqual(route.mapping.hard2log, compacted.mapping.hard2log, msg='final mappings differ')
+        self.assertEqual(0, compacted.remaining_interactions.number_of_edges(), msg='interactions left out')
+        self.assertLessEqual(sum(layer.swap.sum() for layer in compacted.layers),
+                             sum(layer.swap.sum() for layer in route.layers), msg='compaction added SWAP gates')
+
+    def test_swap_network(self):
+        qpu = Grid2dQPU(3, 3)
+        problem = dimod.generators.uniform(nx.complete_graph(9), dimod.SPIN, seed=0)
+        route = swap_network_router(problem, qpu)
+        compacted, saved = compact(route)
+        self.assertGreaterEqual(saved, 0, msg='compaction added layers')
+        self.assertEqual(len(route.layers) - saved, len(compacted.layers), msg='wrong number of saved layers')
+        self.assert_equivalent(route, compacted)
+
+    def test_greedy_router(self):
+        for side, seed in ((4, 0), (6, 0), (8, 1)):
+            qpu = Grid2dQPU(side, side)
+            problem = dimod.generators.uniform(nx.random_regular_graph(3, side ** 2, seed=seed), dimod.SPIN, seed=seed)
+            route = greedy_router(problem, qpu)
+            self.assertFalse(route.layers[-1].is_empty(), msg='greedy router left an empty last layer')
+            self.assertEqual(0, compact(route)[1], msg='greedy routing is not compact')
+
+    def test_sparse_layers(self):
+        qpu = Grid2dQPU(4, 4)
+        problem = dimod.generators.uniform(nx.random_regular_graph(3, 16, seed=3), dimod.SPIN, seed=3)
+        route = greedy_router(problem, qpu)
+        sparse_layers = []
+        for layer in route.layers:
+            sparse_layers.extend([layer, Layer(qpu)])
+        sparse = Routing.from_layers(problem, qpu, route.initial_mapping, sparse_layers)
+        compacted, saved = compact(sparse)
+        self.assertEqual(len(sparse_layers) - len(route.layers), saved, msg='empty layers not removed')
+        self.assert_equivalent(sparse, compacted)
@@ -45,5 +45,26 @@ class TestMapping(TestCase):
             self.assertEqual(log_qb0, self.mapping.hard2log[hard_qb1])
             self.assertEqual(log_qb1, self.mapping.hard2log[hard_qb0])
 
+    def test_copy(self):
+        mapping_copy = self.mapping.copy()
+        hard_qb0, hard_qb1 = list(self.qpu.qubits())[:2]
+        log_qb0 = self.mapping.hard2log[hard_qb0]
+        mapping_copy.swap(frozenset((hard_qb0, hard_qb1)))
+        self.assertEqual(log_qb0, self.mapping.hard2log[hard_qb0], msg='swap on copy changed the original mapping')
+        self.assertEqual(log_qb0, mapping_copy.hard2log[hard_qb1], msg='swap on copy did not update the copy')
 
-
+    def test_partial_mapping(self):
+        qpu = Grid2dQPU(5, 6)
+        mapping = Mapping(qpu, self.problem)
+        self.assertEqual(24, len(mapping.occupied_hard_qbs()))
+        self.assertTrue(mapping.is_partial())
+        hard_qbs = list(qpu.qubit_list)
+        for _ in range(50):
+            hard_qb0, hard_qb1 = (hard_qbs[index] for index in choice(len(hard_qbs), 2, replace=False))
+            log_qb0, log_qb1 = mapping.hard2log[hard_qb0], mapping.hard2log[hard_qb1]
+            mapping.swap(frozenset((hard_qb0, hard_qb1)))
+            self.assertEqual(log_qb0, mapping.hard2log[hard_qb1])
+            self.assertEqual(log_qb1, mapping.hard2log[hard_qb0])
+            for log_qb in self.problem.variables:
+                self.assertEqual(log_qb, mapping.hard2log[mapping.log2hard[log_qb]], msg='partial mapping inconsistent')
+        self.assertEqual(6, sum(1 for hard_qb in hard_qbs if mapping.hard2log[hard_qb] is None))